@@ -11,6 +11,7 @@ from app.blueprints import register_blueprints
 from app.config.development_config import DevelopmentConfig
 from app.extension import mail, api, celery
 from app.utils.celery_utils import make_celery
+from app.utils.db import register_request_session
 from app.utils.error_handlers.system_wide_error_handler import (
     register_system_wide_error_handlers,
 )
@@ -20,12 +21,17 @@ from app.utils.setup_cors import set_up_cors
 
 
 # noinspection PyGlobalUndefined
-def create_app():
-    """Factory function to create the Flask app instance."""
+def create_app(config: type = DevelopmentConfig):
+    """
+    Factory function to create the Flask app instance.
+
+    Parameters:
+        config (type): The configuration class to load, DevelopmentConfig by default.
+    """
     template_dir = path.join(path.abspath(path.dirname(__file__)), "templates")
 
     app = Flask(__name__, template_folder=template_dir)
-    app.config.from_object(DevelopmentConfig)
+    app.config.from_object(config)
 
     set_up_cors(app)
 
@@ -37,6 +43,7 @@ def create_app():
     mail.init_app(app)
 
     setup_logging(app)
+    register_request_session(app)
     register_system_wide_error_handlers(app)
     register_blueprints(api)
     add_jwt_after_request_handler(app)
@@ -48,9 +48,40 @@ class BaseConfig:  # pylint: disable=too-few-public-methods
     LOGGING_PATH = path.join(getcwd(), "logs", "authentication.log")
     IS_PRODUCTION = getenv("ENVIRONMENT", "") == "production"
 
+    DB_REQUEST_SCOPED_SESSION = getenv("DB_REQUEST_SCOPED_SESSION", "false").lower() == "true"
+    DB_REQUEST_STATS = getenv("DB_REQUEST_STATS", "false").lower() == "true"
+    ESTABLISHMENT_SPATIAL_INDEX = getenv("ESTABLISHMENT_SPATIAL_INDEX", "false").lower() == "true"
+
     FRONTEND_URL = getenv("FRONTEND_URL", "http://localhost:5000")
     CELERY_BROKER_URL = getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND = getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    RESERVATION_GRACE_PERIOD_MINUTES = int(getenv("RESERVATION_GRACE_PERIOD_MINUTES", "30"))
+    RESERVATION_EXPIRY_BATCH_SIZE = int(getenv("RESERVATION_EXPIRY_BATCH_SIZE", "500"))
+    SLOT_EVENTS_HEARTBEAT_SECONDS = int(getenv("SLOT_EVENTS_HEARTBEAT_SECONDS", "15"))
+    CELERYBEAT_SCHEDULE = {
+        "expire-stale-reservations": {
+            "task": "app.tasks.expire_stale_reservations",
+            "schedule": timedelta(
+                seconds=int(getenv("RESERVATION_EXPIRY_INTERVAL_SECONDS", "60"))
+            ),
+            "kwargs": {
+                "grace_period_minutes": RESERVATION_GRACE_PERIOD_MINUTES,
+                "batch_size": RESERVATION_EXPIRY_BATCH_SIZE,
+            },
+        },
+        "reconcile-slot-availability": {
+            "task": "app.tasks.reconcile_slot_availability",
+            "schedule": timedelta(
+                seconds=int(getenv("SLOT_AVAILABILITY_RECONCILE_INTERVAL_SECONDS", "3600"))
+            ),
+        },
+        "rebuild-weekly-schedules": {
+            "task": "app.tasks.rebuild_weekly_schedules",
+            "schedule": timedelta(
+                seconds=int(getenv("WEEKLY_SCHEDULE_REBUILD_INTERVAL_SECONDS", "86400"))
+            ),
+        },
+    }
 
     R2_ACCOUNT_ID = getenv("R2_ACCOUNT_ID")
     R2_ACCESS_KEY_ID = getenv("R2_ACCESS_KEY_ID")
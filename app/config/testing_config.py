@@ -10,5 +10,6 @@ class TestingConfig(BaseConfig):  # pylint: disable=R0903
     """Testing configuration."""
 
     TESTING = True
+    DB_STATEMENT_BUDGET_STRICT = True
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
     MAIL_USERNAME = getenv("MAIL_USERNAME")
@@ -13,3 +13,5 @@ from app.models.parking_slot import ParkingSlot
 from app.models.parking_transaction import ParkingTransaction
 from app.models.pricing_plan import PricingPlan
 from app.models.vehicle_type import VehicleType
+from app.models.slot_availability import SlotAvailability
+from app.models.opening_interval import OpeningInterval
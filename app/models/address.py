@@ -56,7 +56,6 @@ class AddressRepository:
             address = Address(**address_data)
             session.add(address)
             session.flush()
-            session.refresh(address)
             return address.address_id
 
     @staticmethod
@@ -88,5 +87,5 @@ class AddressRepository:
             address = session.query(Address).filter_by(address_id=address_id).first()
             for key, value in address_data.items():
                 setattr(address, key, value)
-            session.commit()
+            session.flush()
             return address.to_dict()
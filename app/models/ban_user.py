@@ -74,13 +74,13 @@ class BanUserRepository:
     def unban_user(user_id: int):
         with session_scope() as session:
             session.query(BanUser).filter(BanUser.user_id == user_id).delete()
-            session.commit()
+            session.flush()
 
     @staticmethod
     def update_banned_user(data: dict):
         with session_scope() as session:
             session.query(BanUser).filter(BanUser.user_id == data["user_id"]).update(data)
-            session.commit()
+            session.flush()
 
     @staticmethod
     def get_ban_user(ban_uuid: bytes):
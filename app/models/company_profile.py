@@ -4,7 +4,9 @@
 
 from typing import overload, Union
 
-from sqlalchemy import TIMESTAMP, CheckConstraint, Column, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    TIMESTAMP, CheckConstraint, Column, ForeignKey, Integer, String, func, lambda_stmt, select
+)
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -60,7 +62,6 @@ class CompanyProfileRepository:
             company_profile = CompanyProfile(**profile_data)
             session.add(company_profile)
             session.flush()
-            session.refresh(company_profile)
             return company_profile.profile_id
 
     @staticmethod
@@ -78,13 +79,15 @@ class CompanyProfileRepository:
         """Get company profile by user id or profile id."""
         if profile_id:
             with session_scope() as session:
-                company_profile = session.query(
-                    CompanyProfile
-                ).filter_by(profile_id=profile_id).first()
+                company_profile = session.execute(lambda_stmt(
+                    lambda: select(CompanyProfile).where(CompanyProfile.profile_id == profile_id)
+                )).scalar()
                 return company_profile.to_dict() if company_profile else {}
         elif user_id:
             with session_scope() as session:
-                company_profile = session.query(CompanyProfile).filter_by(user_id=user_id).first()
+                company_profile = session.execute(lambda_stmt(
+                    lambda: select(CompanyProfile).where(CompanyProfile.user_id == user_id)
+                )).scalar()
                 return company_profile.to_dict() if company_profile else {}
         return {}
     @staticmethod
@@ -3,7 +3,8 @@
 from typing import overload
 
 from sqlalchemy import (
-    BigInteger, CheckConstraint, Column, ForeignKey, Integer, String, Text, TIMESTAMP, func, text,
+    BigInteger, CheckConstraint, Column, ForeignKey, Integer, String, Text, TIMESTAMP, func, insert,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -102,6 +103,16 @@ class EstablishmentDocumentRepository:
             session.refresh(new_document)
             return new_document
     @staticmethod
+    def create_establishment_documents(documents: list[dict]) -> list[int]:
+        """Create many establishment documents with one bulk insert, returning their ids."""
+        if not documents:
+            return []
+        with session_scope() as session:
+            return list(session.scalars(
+                insert(EstablishmentDocument).returning(EstablishmentDocument.document_id),
+                documents,
+            ))
+    @staticmethod
     @overload
     def get_document(document_id: int):
         """Get establishment document by document id."""
@@ -132,4 +143,4 @@ class EstablishmentDocumentRepository:
             document = session.query(EstablishmentDocument).get(document_id)
             for key, value in data.items():
                 setattr(document, key, value)
-            session.commit()
+            session.flush()
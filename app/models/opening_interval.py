@@ -0,0 +1,80 @@
+"""
+    Weekly opening intervals per establishment, derived from its operating hours and
+    replaced in the same transaction as every write to them, so an "open at" search is one
+    indexed EXISTS per establishment instead of reading its operating hours. The
+    establishments open 24/7 are open whatever their intervals.
+"""
+
+from sqlalchemy import (
+    CheckConstraint, Column, ForeignKey, Integer, SmallInteger, delete, insert, or_, select,
+)
+
+from app.models.base import Base
+from app.utils.db import session_scope
+from app.utils.weekly_schedule import MINUTES_PER_WEEK
+
+
+class OpeningInterval(Base):  # pylint: disable=too-few-public-methods
+    """An interval of minutes of the week, in Asia/Manila time, an establishment is open."""
+    __tablename__ = "opening_interval"
+
+    establishment_id = Column(
+        Integer, ForeignKey("parking_establishment.establishment_id"), primary_key=True
+    )
+    opens_at = Column(SmallInteger, primary_key=True)
+    closes_at = Column(SmallInteger, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint(
+            f"opens_at >= 0 AND opens_at < closes_at AND closes_at <= {MINUTES_PER_WEEK}",
+            name="opening_interval_minutes_check",
+        ),
+    )
+
+
+class OpeningIntervalRepository:
+    """Repository for the OpeningInterval rows."""
+
+    @staticmethod
+    def replace_intervals(schedules: dict[int, list[tuple[int, int]]], scheduled=None):
+        """
+        Replace the opening intervals of establishments. Call it inside the
+        transaction_scope of the write to their schedule, so both are committed together.
+
+        Parameters:
+            schedules: The (opens_at, closes_at) intervals of every establishment, by ID.
+            scheduled: A select of the IDs of the establishments that have a schedule, when
+                rebuilding all of them: the intervals of any other are removed. It is read
+                when removing them, so an establishment given a schedule since the
+                schedules were read keeps its intervals.
+        """
+        if not schedules and scheduled is None:
+            return
+        removed = OpeningInterval.establishment_id.in_(list(schedules))
+        if scheduled is not None:
+            removed = or_(removed, OpeningInterval.establishment_id.not_in(scheduled))
+        with session_scope() as session:
+            session.execute(delete(OpeningInterval).where(removed))
+            rows = [
+                {"establishment_id": establishment_id, "opens_at": start, "closes_at": end}
+                for establishment_id, intervals in sorted(schedules.items())
+                for start, end in intervals
+            ]
+            if rows:
+                session.execute(insert(OpeningInterval), rows)
+
+    @staticmethod
+    def open_at(establishment_id, minute: int):
+        """
+        Get the condition keeping the establishments with an interval open at a minute of
+        the week, served by the primary key of their intervals.
+
+        Parameters:
+            establishment_id: The establishment ID column the condition is correlated to.
+            minute (int): The minute of the week, in Asia/Manila time.
+        """
+        return select(OpeningInterval.establishment_id).where(
+            OpeningInterval.establishment_id == establishment_id,
+            OpeningInterval.opens_at <= minute,
+            OpeningInterval.closes_at > minute,
+        ).exists()
@@ -3,12 +3,15 @@
 from enum import Enum as PyEnum
 
 from sqlalchemy import (
-    Column, Integer, Boolean, ForeignKey, UniqueConstraint, CheckConstraint, String, Time
+    Column, Integer, Boolean, ForeignKey, UniqueConstraint, CheckConstraint, String, Time, insert,
+    select,
 )
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
-from app.utils.db import session_scope
+from app.models.opening_interval import OpeningIntervalRepository
+from app.utils.db import session_scope, transaction_scope
+from app.utils.weekly_schedule import build_intervals
 
 
 # Enum for days of the week
@@ -68,29 +71,37 @@ class OperatingHoursRepository:
     @staticmethod
     def get_operating_hours(establishment_id):
         """Get operating hours of a parking establishment."""
-        with session_scope() as session:
+        with session_scope(read_only=True) as session:
             operating_hours = session.query(
                 OperatingHour).filter_by(establishment_id=establishment_id).all()
             return [hour.to_dict() for hour in operating_hours]
 
     @staticmethod
     def create_operating_hours(establishment_id, operating_hours: dict):
-        """Create operating hours for a parking establishment."""
-        with session_scope() as session:
-            for day, hours in operating_hours.items():
-                operating_hour = OperatingHour(
-                    establishment_id=establishment_id,
-                    day_of_week=day,
-                    is_enabled=hours.get('is_enabled'),
-                    opening_time=hours.get('opening_time'),
-                    closing_time=hours.get('closing_time')
-                )
-                session.add(operating_hour)
+        """Create the operating hours of every day for a parking establishment at once."""
+        if not operating_hours:
+            return []
+        with transaction_scope() as session:
+            hours_ids = list(session.scalars(
+                insert(OperatingHour).returning(OperatingHour.hours_id),
+                [
+                    {
+                        "establishment_id": establishment_id,
+                        "day_of_week": day,
+                        "is_enabled": hours.get('is_enabled'),
+                        "opening_time": hours.get('opening_time'),
+                        "closing_time": hours.get('closing_time'),
+                    }
+                    for day, hours in operating_hours.items()
+                ],
+            ))
+            OperatingHoursRepository.refresh_schedules([establishment_id])
+            return hours_ids
 
     @staticmethod
     def update_operating_hours(establishment_id, operating_hours: dict):
         """Update operating hours for a parking establishment."""
-        with session_scope() as session:
+        with transaction_scope() as session:
             for day, hours in operating_hours.items():
                 operating_hour = session.query(OperatingHour).filter_by(
                     establishment_id=establishment_id, day_of_week=day
@@ -98,4 +109,42 @@ class OperatingHoursRepository:
                 operating_hour.is_enabled = hours.get('is_enabled')
                 operating_hour.opening_time = hours.get('opening_time')
                 operating_hour.closing_time = hours.get('closing_time')
-            session.commit()
+            session.flush()
+            OperatingHoursRepository.refresh_schedules([establishment_id])
+
+    @staticmethod
+    def refresh_schedules(establishment_ids: list[int] = None) -> int:
+        """
+        Rebuild the opening intervals of establishments from their operating hours, of all
+        of them when not given. Call it inside the transaction_scope of the write to the
+        hours, so the intervals are committed along.
+
+        The hours are read with FOR UPDATE and the intervals replaced in the same
+        transaction, so a concurrent write to the hours either waits for the rebuild or
+        is read by it, and is never overwritten with the intervals of the hours before it.
+
+        Returns:
+            int: The number of establishments rebuilt.
+        """
+        statement = select(
+            OperatingHour.establishment_id, OperatingHour.day_of_week, OperatingHour.is_enabled,
+            OperatingHour.opening_time, OperatingHour.closing_time,
+        ).order_by(OperatingHour.hours_id).with_for_update()
+        if establishment_ids is not None:
+            statement = statement.where(OperatingHour.establishment_id.in_(establishment_ids))
+        with transaction_scope() as session:
+            days_by_establishment = {
+                establishment_id: [] for establishment_id in establishment_ids or ()
+            }
+            for establishment_id, *day in session.execute(statement):
+                days_by_establishment.setdefault(establishment_id, []).append(day)
+            OpeningIntervalRepository.replace_intervals(
+                {
+                    establishment_id: build_intervals(days)
+                    for establishment_id, days in days_by_establishment.items()
+                },
+                scheduled=(
+                    select(OperatingHour.establishment_id) if establishment_ids is None else None
+                ),
+            )
+            return len(days_by_establishment)
@@ -7,20 +7,83 @@
 
 # pylint: disable=E1102, C0415, disable=too-few-public-methods
 
-from typing import Union, overload
+from math import asin, cos, degrees, pi, radians, sin
+from os import getenv
+from typing import NamedTuple, Union, overload
 from uuid import uuid4
 
 from sqlalchemy import (
-    Boolean, Column, Integer, Text, UUID, DECIMAL, func, update, ForeignKey, TIMESTAMP,
-    CheckConstraint, String,
+    Boolean, Column, Double, Integer, Text, UUID, DECIMAL, func, update, ForeignKey, TIMESTAMP,
+    CheckConstraint, Index, String, cast, lambda_stmt, literal, or_, select, text, true,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import joinedload, relationship, selectinload
 
 from app.exceptions.establishment_lookup_exceptions import EstablishmentDoesNotExist
 from app.models.base import Base
-from app.models.parking_slot import ParkingSlot
+from app.models.company_profile import CompanyProfile
+from app.models.opening_interval import OpeningIntervalRepository
+from app.models.parking_slot import (
+    ParkingSlot, SLOT_LIST_PROJECTION, SlotFeature, slot_list_statement,
+)
 from app.models.pricing_plan import PricingPlan
-from app.utils.db import session_scope
+from app.models.slot_availability import SlotAvailabilityRepository
+from app.models.vehicle_type import SizeCategory, VehicleType
+from app.utils.db import run_after_commit, session_scope, statement_budget
+from app.utils.engine import get_engine
+from app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page
+from app.utils.projection import Projection, to_str
+from app.utils.prefix_index import PrefixIndex
+from app.utils.spatial_index import SpatialIndex
+from app.utils.weekly_schedule import minute_of_week
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * pi / 180
+# The word similarity a name must have with the searched name, when not given.
+DEFAULT_NAME_SIMILARITY = 0.4
+# The values counted by every facet of a filtered search.
+SEARCH_FACETS = {
+    "space_type": ("indoor", "outdoor", "covered", "uncovered"),
+    "slot_features": tuple(feature.value for feature in SlotFeature),
+    "vehicle_size": tuple(size.name for size in SizeCategory),
+    "is_premium": (True, False),
+}
+
+
+def haversine_km(latitude_1, longitude_1, latitude_2, longitude_2):
+    """
+    Build the expression of the great-circle distance in km between two points with the
+    haversine formula, which stays accurate for the short distances between parking lots.
+    """
+    half_latitude_delta = (func.radians(latitude_2) - func.radians(latitude_1)) / 2
+    half_longitude_delta = (func.radians(longitude_2) - func.radians(longitude_1)) / 2
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(
+        func.power(func.sin(half_latitude_delta), 2)
+        + func.cos(func.radians(latitude_1)) * func.cos(func.radians(latitude_2))
+        * func.power(func.sin(half_longitude_delta), 2)
+    ))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """
+    Get the latitude and longitude bounds of the circle of a radius around coordinates.
+    The longitude bounds are None when the circle reaches a pole or crosses the
+    antimeridian, since every longitude may then be within the radius.
+    """
+    latitude_delta = radius_km / KM_PER_DEGREE
+    min_latitude, max_latitude = latitude - latitude_delta, latitude + latitude_delta
+    if min_latitude <= -90 or max_latitude >= 90:
+        return max(min_latitude, -90), min(max_latitude, 90), None, None
+    longitude_delta = degrees(asin(min(1.0, sin(radians(latitude_delta)) / cos(radians(latitude)))))
+    min_longitude, max_longitude = longitude - longitude_delta, longitude + longitude_delta
+    if min_longitude < -180 or max_longitude > 180:
+        return min_latitude, max_latitude, None, None
+    return min_latitude, max_latitude, min_longitude, max_longitude
+
+
+def uses_trigram_search() -> bool:
+    """Whether names are searched with pg_trgm, which only PostgreSQL provides."""
+    return get_engine().dialect.name == "postgresql"
 
 
 class ParkingEstablishment(Base):
@@ -61,6 +124,18 @@ class ParkingEstablishment(Base):
             "space_type IN ('indoor', 'outdoor', 'covered', 'uncovered')",
             name="parking_establishment_space_type_check",
         ),
+        Index(
+            "ix_parking_establishment_verified_location", "latitude", "longitude",
+            postgresql_where=text("verified"),
+        ),
+        Index(
+            "ix_parking_establishment_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_parking_establishment_verified_space_type", "space_type", "establishment_id",
+            postgresql_where=text("verified"),
+        ),
     )
 
     company_profile = relationship("CompanyProfile", back_populates="parking_establishments")
@@ -98,49 +173,383 @@ class ParkingEstablishment(Base):
 
     def calculate_distance_from(self, latitude: float, longitude: float) -> float:
         """Calculate distance from given coordinates to this establishment"""
-        radius_km = 6371
-        return radius_km * func.acos(
-            func.cos(func.radians(latitude))
-            * func.cos(func.radians(self.latitude))
-            * func.cos(func.radians(self.longitude) - func.radians(longitude))
-            + func.sin(func.radians(latitude)) * func.sin(func.radians(self.latitude))
+        return haversine_km(latitude, longitude, self.latitude, self.longitude)
+
+    @classmethod
+    def distance_from(cls, latitude: float, longitude: float):
+        """Get the expression of the distance in km from the given coordinates"""
+        return haversine_km(latitude, longitude, cls.latitude, cls.longitude)
+
+    @classmethod
+    def within_radius(cls, latitude: float, longitude: float, radius_km: float) -> list:
+        """
+        Get the conditions keeping the establishments within a radius of the given
+        coordinates. The bounding box of the circle is checked first, so the location index
+        narrows the candidates and the exact distance is only computed for them. Its bounds
+        are cast to the type of the columns: compared with floats, the columns would be
+        cast instead and the index could not be used.
+        """
+        min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(
+            latitude, longitude, radius_km
         )
+        conditions = [cls.latitude.between(
+            cast(min_latitude, cls.latitude.type), cast(max_latitude, cls.latitude.type)
+        )]
+        if min_longitude is not None:
+            conditions.append(cls.longitude.between(
+                cast(min_longitude, cls.longitude.type), cast(max_longitude, cls.longitude.type)
+            ))
+        conditions.append(cls.distance_from(latitude, longitude) <= radius_km)
+        return conditions
+
+    @classmethod
+    def name_similarity(cls, name: str):
+        """
+        Get the expression of the pg_trgm word similarity of a searched name with the name,
+        from 0 to 1: how well the name's closest word sequence matches, typos included.
+        It is cast from real to double precision, so the value the rows are ordered by is
+        the one written into the search cursor, without rounding.
+        """
+        return cast(func.word_similarity(name, cls.name), Double)
+
+    @classmethod
+    def name_matches(cls, name: str):
+        """
+        Get the condition keeping the establishments whose name contains the searched name
+        or is word similar to it above pg_trgm.word_similarity_threshold. Both operators
+        are served by the trigram index of the name.
+        """
+        return or_(cls.name.ilike(f"%{name}%"), literal(name).op("<%")(cls.name))
 
     @classmethod
     def order_by_distance(
         cls, latitude: float, longitude: float, ascending: bool = True
     ):
         """Get order_by expression for distance-based sorting"""
-        radius_km = 6371
-        distance_formula = radius_km * func.acos(
-            func.cos(func.radians(latitude))
-            * func.cos(func.radians(cls.latitude))
-            * func.cos(func.radians(cls.longitude) - func.radians(longitude))
-            + func.sin(func.radians(latitude)) * func.sin(func.radians(cls.latitude))
-        )
+        distance_formula = cls.distance_from(latitude, longitude)
         return distance_formula.asc() if ascending else distance_formula.desc()
 
     @staticmethod
     def get_establishment_id(establishment_uuid: str):
         """Get establishment ID by UUID"""
         with session_scope() as session:
-            establishment = (
-                session.query(ParkingEstablishment)
-                .filter(ParkingEstablishment.uuid == establishment_uuid)
-                .first()
+            establishment_id = session.execute(lambda_stmt(
+                lambda: select(ParkingEstablishment.establishment_id)
+                .where(ParkingEstablishment.uuid == establishment_uuid)
+            )).scalar()
+            if establishment_id is None:
+                raise EstablishmentDoesNotExist("Establishment does not exist.")
+            return establishment_id
+
+
+class SearchFilters(NamedTuple):
+    """
+    The facet filters of an establishment search. Each of them is pushed into the SQL of
+    the search as a condition on the establishment or a correlated EXISTS.
+    """
+    slot_features: tuple = ()
+    vehicle_size: str = None
+    is_premium: bool = None
+    min_rate: float = None
+    max_rate: float = None
+    rate_type: str = "hourly"
+    space_type: str = None
+    open_at: int = None
+
+    @classmethod
+    def from_query(cls, query_dict: dict) -> "SearchFilters":
+        """
+        Get the filters of a validated establishment query. open_now and open_at are
+        turned into the minute of the week, in Asia/Manila time, to be open at.
+        """
+        open_at = None
+        if query_dict.get("open_at") is not None:
+            open_at = minute_of_week(query_dict["open_at"])
+        elif query_dict.get("open_now"):
+            open_at = minute_of_week()
+        return cls(
+            slot_features=tuple(query_dict.get("slot_features") or ()),
+            vehicle_size=query_dict.get("vehicle_size"),
+            is_premium=query_dict.get("is_premium"),
+            min_rate=query_dict.get("min_rate"),
+            max_rate=query_dict.get("max_rate"),
+            rate_type=query_dict.get("rate_type") or "hourly",
+            space_type=query_dict.get("space_type"),
+            open_at=open_at,
+        )
+
+    def is_empty(self) -> bool:
+        """Whether no filter is set."""
+        return not self.slot_features and all(value is None for value in (
+            self.vehicle_size, self.is_premium, self.min_rate, self.max_rate, self.space_type,
+            self.open_at,
+        ))
+
+    def conditions(self) -> list:
+        """
+        Get the conditions keeping the establishments matching the filters. The slot
+        filters are met by one active slot, and every requested feature by a slot of its
+        own, since a slot has a single feature. The rate bounds are met by an enabled
+        pricing plan of rate_type, and open_at by being open 24/7 or by an opening
+        interval.
+        """
+        conditions = []
+        if self.space_type is not None:
+            conditions.append(ParkingEstablishment.space_type == self.space_type)
+        if self.open_at is not None:
+            conditions.append(or_(
+                ParkingEstablishment.is24_7.is_(True),
+                OpeningIntervalRepository.open_at(
+                    ParkingEstablishment.establishment_id, self.open_at
+                ),
+            ))
+        if self.slot_features:
+            conditions += [
+                self._slot_exists(SlotFeature(feature)) for feature in self.slot_features
+            ]
+        elif self.vehicle_size is not None or self.is_premium is not None:
+            conditions.append(self._slot_exists())
+        if self.min_rate is not None or self.max_rate is not None:
+            plan = select(PricingPlan.plan_id).where(
+                PricingPlan.establishment_id == ParkingEstablishment.establishment_id,
+                PricingPlan.is_enabled.is_(True),
+                PricingPlan.rate_type == self.rate_type,
             )
-            return establishment.establishment_id
+            if self.min_rate is not None:
+                plan = plan.where(PricingPlan.rate >= self.min_rate)
+            if self.max_rate is not None:
+                plan = plan.where(PricingPlan.rate <= self.max_rate)
+            conditions.append(plan.exists())
+        return conditions
+
+    def _slot_exists(self, slot_feature: SlotFeature = None):
+        slot = select(ParkingSlot.slot_id).where(
+            ParkingSlot.establishment_id == ParkingEstablishment.establishment_id,
+            ParkingSlot.is_active.is_(True),
+        )
+        if slot_feature is not None:
+            slot = slot.where(ParkingSlot.slot_features == slot_feature)
+        if self.vehicle_size is not None:
+            slot = slot.where(ParkingSlot.vehicle_type_id.in_(
+                select(VehicleType.vehicle_type_id)
+                .where(VehicleType.size_category == SizeCategory[self.vehicle_size])
+            ))
+        if self.is_premium is not None:
+            slot = slot.where(ParkingSlot.is_premium.is_(self.is_premium))
+        return slot.exists()
+
+
+def search_facets(conditions: list):
+    """
+    Build the one-row subquery counting the establishments meeting the search conditions
+    by every value of SEARCH_FACETS. An establishment is counted for a slot facet value
+    when one of its active slots has it. The columns are labeled facet_<facet>_<index>.
+    """
+    matching = select(
+        ParkingEstablishment.establishment_id, ParkingEstablishment.space_type
+    ).where(*conditions).cte("matching_establishments")
+    slot_conditions = {
+        "slot_features": lambda value: ParkingSlot.slot_features == SlotFeature(value),
+        "vehicle_size": lambda value: VehicleType.size_category == SizeCategory[value],
+        "is_premium": ParkingSlot.is_premium.is_,
+    }
+    establishment_counts = select(*(
+        func.count().filter(matching.c.space_type == value).label(f"facet_space_type_{index}")
+        for index, value in enumerate(SEARCH_FACETS["space_type"])
+    )).select_from(matching).subquery()
+    slot_counts = select(*(
+        func.count(ParkingSlot.establishment_id.distinct()).filter(
+            condition(value)
+        ).label(f"facet_{facet}_{index}")
+        for facet, condition in slot_conditions.items()
+        for index, value in enumerate(SEARCH_FACETS[facet])
+    )).select_from(matching).join(
+        ParkingSlot, ParkingSlot.establishment_id == matching.c.establishment_id
+    ).join(
+        VehicleType, VehicleType.vehicle_type_id == ParkingSlot.vehicle_type_id
+    ).where(ParkingSlot.is_active.is_(True)).subquery()
+    return establishment_counts, slot_counts
+
+
+def read_search_facets(rows: list) -> dict:
+    """Read the facet counts carried by the rows of a search, all zero without rows."""
+    row = rows[0]._mapping if rows else {}  # pylint: disable=protected-access
+    return {
+        facet: {
+            str(value).lower() if isinstance(value, bool) else value:
+                row.get(f"facet_{facet}_{index}", 0)
+            for index, value in enumerate(values)
+        }
+        for facet, values in SEARCH_FACETS.items()
+    }
+
+
+def _to_title(value):
+    return value.title() if value else ''
+
+
+ESTABLISHMENT_LIST_PROJECTION = Projection(
+    establishment_id=ParkingEstablishment.establishment_id,
+    uuid=(ParkingEstablishment.uuid, to_str),
+    profile_id=ParkingEstablishment.profile_id,
+    space_type=ParkingEstablishment.space_type,
+    space_layout=ParkingEstablishment.space_layout,
+    custom_layout=ParkingEstablishment.custom_layout,
+    dimensions=ParkingEstablishment.dimensions,
+    is24_7=ParkingEstablishment.is24_7,
+    access_info=ParkingEstablishment.access_info,
+    custom_access=ParkingEstablishment.custom_access,
+    verified=ParkingEstablishment.verified,
+    created_at=(ParkingEstablishment.created_at, to_str),
+    updated_at=(ParkingEstablishment.updated_at, to_str),
+    name=ParkingEstablishment.name,
+    lighting=ParkingEstablishment.lighting,
+    accessibility=ParkingEstablishment.accessibility,
+    nearby_landmarks=(ParkingEstablishment.nearby_landmarks, _to_title),
+    longitude=(ParkingEstablishment.longitude, float),
+    latitude=(ParkingEstablishment.latitude, float),
+    facilities=ParkingEstablishment.facilities,
+)
 
 
 class ParkingEstablishmentRepository:
     """Class for operations related to parking establishment"""
     @staticmethod
+    def search_statement(  # pylint: disable=too-many-arguments
+        establishment_name: str = None, user_longitude: float = None,
+        user_latitude: float = None, radius_km: float = None,
+        *, filters: SearchFilters = None, facets: bool = False,
+    ):
+        """
+        Build the statement searching verified establishments along their slot counts, and
+        their distance when a location is given, only within radius_km of it when given,
+        and only those matching the filters. The rows are ordered by search_sort_key. The
+        slot counts are read from the slot_availability counters, not counted.
+
+        On PostgreSQL the name is matched with pg_trgm, so misspelled names are found too,
+        and the rows carry their name_similarity. Run name_similarity_statement first in
+        the same transaction to set the threshold.
+
+        With facets, every row also carries the facet counts of all the establishments
+        found, read with read_search_facets, so they cost no extra round trip.
+        """
+        # Written as the bare column, the predicate of the partial indexes: PostgreSQL does
+        # not prove that verified IS TRUE implies it, and would not use them.
+        conditions = [ParkingEstablishment.verified]
+        if establishment_name is not None and uses_trigram_search():
+            conditions.append(ParkingEstablishment.name_matches(establishment_name))
+        elif establishment_name is not None:
+            conditions.append(ParkingEstablishment.name.ilike(f"%{establishment_name}%"))
+        located = user_longitude is not None and user_latitude is not None
+        if located and radius_km is not None:
+            conditions += ParkingEstablishment.within_radius(
+                user_latitude, user_longitude, radius_km
+            )
+        if filters is not None:
+            conditions += filters.conditions()
+        statement = select(
+            ParkingEstablishment,
+            *SlotAvailabilityRepository.establishment_totals(
+                ParkingEstablishment.establishment_id
+            ),
+        ).where(*conditions)
+        if establishment_name is not None and uses_trigram_search():
+            statement = statement.add_columns(
+                ParkingEstablishment.name_similarity(establishment_name).label("name_similarity")
+            )
+        if located:
+            statement = statement.add_columns(
+                ParkingEstablishment.distance_from(
+                    latitude=user_latitude, longitude=user_longitude
+                ).label("distance")
+            )
+        if facets:
+            for counts in search_facets(conditions):
+                statement = statement.join_from(
+                    ParkingEstablishment, counts, true()
+                ).add_columns(*counts.c)
+        return statement
+
+    @staticmethod
+    def name_similarity_statement(name_similarity: float = None):
+        """
+        Build the statement setting the word similarity threshold of the trigram name
+        search for the current transaction.
+        """
+        if name_similarity is None:
+            name_similarity = DEFAULT_NAME_SIMILARITY
+        return select(func.set_config(
+            "pg_trgm.word_similarity_threshold", str(name_similarity), True
+        ))
+
+    @staticmethod
+    def search_sort_key(
+        user_longitude: float = None, user_latitude: float = None,
+        establishment_name: str = None,
+    ) -> tuple:
+        """
+        Return the keyset the search is paginated on: nearest first when located, otherwise
+        the most similar names first when searching by name with pg_trgm.
+        """
+        if user_longitude is not None and user_latitude is not None:
+            return (
+                ParkingEstablishment.distance_from(
+                    latitude=user_latitude, longitude=user_longitude
+                ),
+                ParkingEstablishment.establishment_id,
+            )
+        if establishment_name is not None and uses_trigram_search():
+            return (
+                -ParkingEstablishment.name_similarity(establishment_name),
+                ParkingEstablishment.establishment_id,
+            )
+        return (ParkingEstablishment.establishment_id,)
+
+    @staticmethod
+    def search_row_key(row) -> tuple:
+        """Return the sort key of a row of the search statement."""
+        if "distance" in row._fields:
+            return row.distance, row[0].establishment_id
+        if "name_similarity" in row._fields:
+            return -row.name_similarity, row[0].establishment_id
+        return (row[0].establishment_id,)
+
+    @staticmethod
+    def pricing_plans_statement(establishment_ids: list[int]):
+        """Build the statement loading the pricing plans of all the given establishments."""
+        return select(PricingPlan).where(PricingPlan.establishment_id.in_(establishment_ids))
+
+    @staticmethod
+    def build_search_results(establishments: list, pricing_plans: list) -> list[dict]:
+        """Combine the rows of the search statement with their establishments' pricing plans."""
+        plans_by_establishment = {}
+        for plan in pricing_plans:
+            plans_by_establishment.setdefault(plan.establishment_id, []).append(plan.to_dict())
+        result = []
+        for row in establishments:
+            establishment, total_slots, open_slots, occupied_slots, reserved_slots = row[:5]
+            establishment_dict = establishment.to_dict()
+            establishment_dict.update({
+                "total_slots": total_slots,
+                "open_slots": open_slots,
+                "occupied_slots": occupied_slots,
+                "reserved_slots": reserved_slots,
+                "pricing_plans": plans_by_establishment.get(establishment.establishment_id, [])
+            })
+            if "distance" in row._fields:
+                establishment_dict["distance"] = row.distance
+            if "name_similarity" in row._fields:
+                establishment_dict["name_similarity"] = row.name_similarity
+            result.append(establishment_dict)
+        return result
+    @staticmethod
     def create_establishment(establishment_data: dict):
         """Create a new parking establishment."""
         with session_scope() as session:
             new_parking_establishment = ParkingEstablishment(**establishment_data)
             session.add(new_parking_establishment)
-            session.commit()
+            session.flush()
+            refresh_indexes_on_commit(session, [new_parking_establishment.establishment_id])
             return new_parking_establishment.establishment_id
     @staticmethod
     @overload
@@ -148,69 +557,180 @@ class ParkingEstablishmentRepository:
         """Get parking establishments by verification status."""
     @staticmethod
     @overload
-    def get_establishments(
-        establishment_name: str = None, user_longitude: float = None, user_latitude: float = None
-    ) -> list:
-        """Get all parking establishments."""
-    @staticmethod
-    @overload
     def get_establishments() -> list:
         """Get all parking establishments."""
     @staticmethod
-    def get_establishments(
-        verification_status: bool = None, establishment_name: str = None,
-        user_longitude: float = None, user_latitude: float = None
-    ) -> list:
+    def get_establishments(verification_status: bool = None) -> list:
         """Get parking establishments by verification status."""
-        with session_scope() as session:
-            if verification_status is not None:
-                establishments = (
-                    session.query(ParkingEstablishment)
-                    .filter(ParkingEstablishment.verified == verification_status)
-                    .all()
+        statement = select(*ESTABLISHMENT_LIST_PROJECTION.columns)
+        if verification_status is not None:
+            statement = statement.where(ParkingEstablishment.verified == verification_status)
+        with session_scope(read_only=True) as session:
+            return ESTABLISHMENT_LIST_PROJECTION.to_dicts(session.execute(statement))
+
+    @staticmethod
+    def lists_all(  # pylint: disable=too-many-arguments
+        establishment_name: str, user_longitude: float, user_latitude: float,
+        filters: SearchFilters, facets: bool,
+    ) -> bool:
+        """Whether a search has nothing to search by, so it lists every establishment."""
+        return (
+            establishment_name is None
+            and (user_longitude is None or user_latitude is None)
+            and (filters is None or filters.is_empty())
+            and not facets
+        )
+
+    @staticmethod
+    def search_establishments(  # pylint: disable=too-many-arguments
+        establishment_name: str = None, user_longitude: float = None,
+        user_latitude: float = None, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE,
+        *, radius_km: float = None, name_similarity: float = None,
+        filters: SearchFilters = None, facets: bool = False,
+    ) -> tuple[list, str, dict]:
+        """
+        Get a page of parking establishments. When a name, a location, filters or facets
+        are given, only the verified establishments matching them are returned, nearest
+        first, along their slot counts, pricing plans and distance. With a radius_km, only
+        the establishments within it of the location are returned. Without a location, the
+        establishments found by name are ordered by name similarity, which must be at least
+        name_similarity, DEFAULT_NAME_SIMILARITY by default.
+
+        Returns:
+            tuple: The establishments of the page, the next page cursor, and the facet
+                counts of all the establishments found when facets is set, otherwise None.
+        """
+        with session_scope(read_only=True) as session:
+            if ParkingEstablishmentRepository.lists_all(
+                establishment_name, user_longitude, user_latitude, filters, facets
+            ):
+                rows, next_cursor = fetch_page(
+                    session, select(*ESTABLISHMENT_LIST_PROJECTION.columns),
+                    (ParkingEstablishment.establishment_id,), after=after, limit=limit
                 )
-                return [establishment.to_dict() for establishment in establishments]
-            if establishment_name is not None or (user_longitude is not None and
-                                                  user_latitude is not None):
-                query = session.query(
-                    ParkingEstablishment,
-                    func.count(ParkingSlot.slot_id).label("total_slots"),
-                    func.count(ParkingSlot.slot_id).filter(
-                        ParkingSlot.slot_status == "open").label("open_slots"),
-                    func.count(ParkingSlot.slot_id).filter(
-                        ParkingSlot.slot_status == "occupied").label("occupied_slots"),
-                    func.count(ParkingSlot.slot_id).filter(
-                        ParkingSlot.slot_status == "reserved").label("reserved_slots")
-                ).outerjoin(ParkingSlot).group_by(ParkingEstablishment.establishment_id).where(
-                    ParkingEstablishment.verified.is_(True)
+                return ESTABLISHMENT_LIST_PROJECTION.to_dicts(rows), next_cursor, None
+            trigram_search = establishment_name is not None and uses_trigram_search()
+            # The similarity threshold when searching by name, the search and the pricing
+            # plans of the whole page.
+            with statement_budget(session, 3 if trigram_search else 2, "Establishment search"):
+                if trigram_search:
+                    session.execute(
+                        ParkingEstablishmentRepository.name_similarity_statement(name_similarity)
+                    )
+                rows, next_cursor = fetch_page(
+                    session,
+                    ParkingEstablishmentRepository.search_statement(
+                        establishment_name, user_longitude, user_latitude, radius_km,
+                        filters=filters, facets=facets,
+                    ),
+                    ParkingEstablishmentRepository.search_sort_key(
+                        user_longitude, user_latitude, establishment_name
+                    ),
+                    after=after, limit=limit, key=ParkingEstablishmentRepository.search_row_key,
                 )
-                if establishment_name is not None:
-                    query = query.filter(ParkingEstablishment.name.ilike(f"%{establishment_name}%"))
-                if user_longitude is not None and user_latitude is not None:
-                    query = query.order_by(
-                        ParkingEstablishment.order_by_distance(
-                            latitude=user_latitude, longitude=user_longitude, ascending=True
-                        )
+                establishment_ids = [row[0].establishment_id for row in rows]
+                pricing_plans = session.execute(
+                    ParkingEstablishmentRepository.pricing_plans_statement(establishment_ids)
+                ).scalars().all() if establishment_ids else []
+            return ParkingEstablishmentRepository.build_search_results(
+                rows, pricing_plans
+            ), next_cursor, read_search_facets(rows) if facets else None
+
+    @staticmethod
+    def get_nearest_establishments(nearest: list[tuple[int, float]]) -> list[dict]:
+        """
+        Get the search results of the establishments found by ESTABLISHMENT_INDEX, with one
+        IN query for the establishments and one for their pricing plans.
+
+        Parameters:
+            nearest (list): The (establishment_id, distance) of the establishments, nearest
+                first.
+
+        Returns:
+            list: The establishments, shaped like the results of search_establishments and
+                in the same order, except those no longer verified.
+        """
+        if not nearest:
+            return []
+        distances = dict(nearest)
+        with session_scope(read_only=True) as session:
+            with statement_budget(session, 2, "Nearest establishments"):
+                rows = session.execute(
+                    ParkingEstablishmentRepository.search_statement().where(
+                        ParkingEstablishment.establishment_id.in_(distances)
                     )
-                establishments = query.all()
-                result = []
-                for establishment, total_slots, open_slots, occupied_slots, reserved_slots in \
-                    establishments:
-                    pricing_plans = session.query(PricingPlan).filter(
-                        PricingPlan.establishment_id == establishment.establishment_id
-                    ).all()
-                    establishment_dict = establishment.to_dict()
-                    establishment_dict.update({
-                        "total_slots": total_slots,
-                        "open_slots": open_slots,
-                        "occupied_slots": occupied_slots,
-                        "reserved_slots": reserved_slots,
-                        "pricing_plans": [plan.to_dict() for plan in pricing_plans]
-                    })
-                    result.append(establishment_dict)
-                return result
-            establishments = session.query(ParkingEstablishment).all()
+                ).all()
+                pricing_plans = session.execute(
+                    ParkingEstablishmentRepository.pricing_plans_statement(list(distances))
+                ).scalars().all()
+            results = ParkingEstablishmentRepository.build_search_results(rows, pricing_plans)
+        for result in results:
+            result["distance"] = distances[result["establishment_id"]]
+        return sorted(results, key=lambda result: (result["distance"], result["establishment_id"]))
+
+    @staticmethod
+    def get_indexed_coordinates(establishment_ids: list[int] = None) -> list[tuple]:
+        """
+        Get the (establishment_id, latitude, longitude) of the verified establishments,
+        all of them or those among the given IDs, to load ESTABLISHMENT_INDEX. They are
+        read from the primary, since a lagging replica would miss the establishment whose
+        commit made it re-read.
+        """
+        statement = select(
+            ParkingEstablishment.establishment_id,
+            ParkingEstablishment.latitude,
+            ParkingEstablishment.longitude,
+        ).where(ParkingEstablishment.verified.is_(True))
+        if establishment_ids is not None:
+            statement = statement.where(
+                ParkingEstablishment.establishment_id.in_(establishment_ids)
+            )
+        with session_scope() as session:
+            return [tuple(row) for row in session.execute(statement)]
+
+    @staticmethod
+    def get_suggestion_entries(establishment_ids: list[int] = None) -> list[tuple]:
+        """
+        Get the (establishment_id, name, texts, suggestion) of the verified establishments,
+        all of them or those among the given IDs, to load ESTABLISHMENT_NAME_INDEX. The
+        establishments are also suggested by their nearby landmarks. They are read from the
+        primary, since a lagging replica would miss the establishment whose commit made it
+        re-read.
+        """
+        statement = select(
+            ParkingEstablishment.establishment_id,
+            ParkingEstablishment.uuid,
+            ParkingEstablishment.name,
+            ParkingEstablishment.nearby_landmarks,
+        ).where(ParkingEstablishment.verified.is_(True))
+        if establishment_ids is not None:
+            statement = statement.where(
+                ParkingEstablishment.establishment_id.in_(establishment_ids)
+            )
+        with session_scope() as session:
+            return [
+                (
+                    establishment_id,
+                    name,
+                    [nearby_landmarks],
+                    {"uuid": str(establishment_uuid), "name": name},
+                )
+                for establishment_id, establishment_uuid, name, nearby_landmarks
+                in session.execute(statement)
+            ]
+
+    @staticmethod
+    def get_establishments_by_ids(establishment_ids: list[int]) -> list[dict]:
+        """Get the parking establishments with the given IDs in a single query."""
+        if not establishment_ids:
+            return []
+        with session_scope() as session:
+            establishments = session.execute(
+                select(ParkingEstablishment)
+                .where(ParkingEstablishment.establishment_id.in_(establishment_ids))
+            ).scalars()
             return [establishment.to_dict() for establishment in establishments]
+
     @staticmethod
     @overload
     def get_establishment(establishment_uuid: str) -> dict:
@@ -228,7 +748,7 @@ class ParkingEstablishmentRepository:
         establishment_uuid: str = None, profile_id: int = None, establishment_id: int = None
     ) -> Union[dict]:
         """Get parking establishment by UUID, profile id, or establishment id."""
-        with session_scope() as session:
+        with session_scope(read_only=True) as session:
             establishment: ParkingEstablishment
             if establishment_id is not None:
                 establishment = (
@@ -251,6 +771,84 @@ class ParkingEstablishmentRepository:
             if establishment is None:
                 raise EstablishmentDoesNotExist("Establishment does not exist.")
             return establishment.to_dict()
+
+    @staticmethod
+    def get_establishment_details(
+        establishment_uuid: str = None, profile_id: int = None, manager_id: int = None,
+        include: tuple = ("operating_hours", "slots", "payment_methods", "pricing_plans"),
+    ) -> dict:
+        """
+        Get a parking establishment together with its related records in one read-only
+        snapshot. The establishment and its company profile are read with one joined
+        query and each collection named in include is eager loaded right after it, in
+        the same transaction, instead of being fetched through its own repository. The
+        slots are read as a column projection.
+
+        Parameters:
+            establishment_uuid (str): The UUID of the establishment.
+            profile_id (int): The company profile ID owning the establishment.
+            manager_id (int): The user ID of the manager owning the establishment.
+            include (tuple): Related records to load, any of "operating_hours", "slots",
+                "payment_methods", "pricing_plans", "documents", "company_profile"
+                and "address".
+
+        Returns:
+            dict: The establishment under "establishment" and each included relation
+                under its own key, shaped like the results of their repositories.
+        """
+        options = {
+            "operating_hours": selectinload(ParkingEstablishment.operating_hours),
+            "payment_methods": selectinload(ParkingEstablishment.payment_methods),
+            "pricing_plans": selectinload(ParkingEstablishment.pricing_plans),
+            "documents": selectinload(ParkingEstablishment.documents),
+            "company_profile": joinedload(ParkingEstablishment.company_profile),
+            "address": joinedload(ParkingEstablishment.company_profile).selectinload(
+                CompanyProfile.addresses
+            ),
+        }
+        statement = select(ParkingEstablishment).options(
+            *(options[name] for name in include if name in options)
+        )
+        if establishment_uuid is not None:
+            statement = statement.where(ParkingEstablishment.uuid == establishment_uuid)
+        elif profile_id is not None:
+            statement = statement.where(ParkingEstablishment.profile_id == profile_id)
+        else:
+            statement = statement.join(ParkingEstablishment.company_profile).where(
+                CompanyProfile.user_id == manager_id
+            )
+        with session_scope(snapshot=True) as session:
+            establishment = session.execute(statement.limit(1)).unique().scalar()
+            if establishment is None:
+                raise EstablishmentDoesNotExist("Establishment does not exist.")
+            details = {"establishment": establishment.to_dict()}
+            if "operating_hours" in include:
+                details["operating_hours"] = [
+                    hour.to_dict() for hour in establishment.operating_hours
+                ]
+            if "slots" in include:
+                details["slots"] = SLOT_LIST_PROJECTION.to_dicts(session.execute(
+                    slot_list_statement(establishment.establishment_id)
+                ))
+            if "payment_methods" in include:
+                details["payment_methods"] = [
+                    method.to_dict() for method in establishment.payment_methods
+                ]
+            if "pricing_plans" in include:
+                details["pricing_plans"] = [
+                    plan.to_dict() for plan in establishment.pricing_plans
+                ]
+            if "documents" in include:
+                details["documents"] = [
+                    document.to_dict() for document in establishment.documents
+                ]
+            if "company_profile" in include:
+                details["company_profile"] = establishment.company_profile.to_dict()
+            if "address" in include:
+                addresses = establishment.company_profile.addresses
+                details["address"] = addresses[0].to_dict() if addresses else {}
+            return details
+
     @staticmethod
     def update_parking_establishment(establishment_data: dict):
         """Update parking establishment details."""
@@ -263,7 +861,8 @@ class ParkingEstablishmentRepository:
                 .where(ParkingEstablishment.establishment_id == establishment_id)
                 .values(establishment_data)
             )
-            session.commit()
+            session.flush()
+            refresh_indexes_on_commit(session, [establishment_id])
     @staticmethod
     def verify_parking_establishment(establishment_uuid: bytes):
         """Verify a parking establishment."""
@@ -274,4 +873,25 @@ class ParkingEstablishmentRepository:
                 .where(ParkingEstablishment.establishment_id == establishment_id)
                 .values(verified=True)
             )
-            session.commit()
+            session.flush()
+            refresh_indexes_on_commit(session, [establishment_id])
+
+
+# The locations of the verified establishments, for the nearest establishments searches.
+ESTABLISHMENT_INDEX = SpatialIndex(
+    ParkingEstablishmentRepository.get_indexed_coordinates,
+    max_age_seconds=int(getenv("ESTABLISHMENT_INDEX_MAX_AGE_SECONDS", "300")),
+)
+ESTABLISHMENT_NAME_INDEX = PrefixIndex(
+    ParkingEstablishmentRepository.get_suggestion_entries,
+    max_age_seconds=int(getenv("ESTABLISHMENT_NAME_INDEX_MAX_AGE_SECONDS", "300")),
+)
+
+
+def refresh_indexes_on_commit(session, establishment_ids: list[int]):
+    """Refresh the written establishments in the in-process indexes once they commit."""
+    def mark_dirty():
+        ESTABLISHMENT_INDEX.mark_dirty(establishment_ids)
+        ESTABLISHMENT_NAME_INDEX.mark_dirty(establishment_ids)
+
+    run_after_commit(session, mark_dirty)
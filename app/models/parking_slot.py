@@ -9,17 +9,21 @@ from typing import Any, overload, Literal
 
 from sqlalchemy import (
     Column, Integer, String, Numeric, Boolean, SmallInteger, TIMESTAMP, ForeignKey, CheckConstraint,
-    UniqueConstraint,
+    Index, UniqueConstraint, lambda_stmt, select, text, update,
 )
-from sqlalchemy.dialects.postgresql import ENUM
+from sqlalchemy.dialects.postgresql import ENUM, insert
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.exceptions.slot_lookup_exceptions import SlotNotFound
 from app.models.base import Base
+from app.models.slot_availability import COUNTED_STATUSES, SlotAvailabilityRepository
 from app.models.vehicle_type import VehicleType
-from app.utils.db import session_scope
+from app.utils import slot_status_map
+from app.utils.db import session_scope, transaction_scope
+from app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page
+from app.utils.projection import Projection, to_enum_value, to_isoformat, to_str
 
 
 # Enum for slot status
@@ -73,6 +77,11 @@ class ParkingSlot(Base):  # pylint: disable=too-few-public-methods
         UniqueConstraint(
             "establishment_id", "slot_code", name="unique_establishment_slot_code"
         ),
+        Index(
+            "ix_parking_slot_establishment_facets",
+            "establishment_id", "slot_features", "vehicle_type_id", "is_premium",
+            postgresql_where=text("is_active"),
+        ),
     )
 
     parking_establishment = relationship("ParkingEstablishment", back_populates="parking_slots")
@@ -105,9 +114,11 @@ class ParkingSlot(Base):  # pylint: disable=too-few-public-methods
     def get_id(uuid: str) -> int:
         """Get the ID of the parking slot."""
         with session_scope() as session:
-            slot = session.query(ParkingSlot).filter_by(uuid=uuid).first()
-            if slot:
-                return slot.slot_id
+            slot_id = session.execute(
+                lambda_stmt(lambda: select(ParkingSlot.slot_id).where(ParkingSlot.uuid == uuid))
+            ).scalar()
+            if slot_id:
+                return slot_id
             raise SlotNotFound("Slot not found")
 
 
@@ -124,9 +135,62 @@ class ParkingSlot(Base):  # pylint: disable=too-few-public-methods
     #     return base_multiplier * slot_multiplier * feature_mult
 
 
+# The slot information returned by the list reads, along the slot's vehicle type.
+SLOT_LIST_PROJECTION = Projection(
+    slot_id=ParkingSlot.slot_id,
+    uuid=(ParkingSlot.uuid, to_str),
+    establishment_id=ParkingSlot.establishment_id,
+    slot_code=ParkingSlot.slot_code,
+    slot_status=(ParkingSlot.slot_status, to_enum_value),
+    is_active=ParkingSlot.is_active,
+    slot_multiplier=(ParkingSlot.slot_multiplier, to_str),
+    floor_level=ParkingSlot.floor_level,
+    base_rate=(ParkingSlot.base_rate, to_str),
+    is_premium=ParkingSlot.is_premium,
+    slot_features=(ParkingSlot.slot_features, to_enum_value),
+    created_at=(ParkingSlot.created_at, to_isoformat),
+    updated_at=(ParkingSlot.updated_at, to_isoformat),
+    vehicle_type_name=VehicleType.name,
+    vehicle_type_code=VehicleType.code,
+    vehicle_type_size=(VehicleType.size_category, to_enum_value),
+)
+
+
+def slot_list_statement(establishment_id: int = None):
+    """Build the statement selecting SLOT_LIST_PROJECTION, for one or all establishments."""
+    statement = select(*SLOT_LIST_PROJECTION.columns).join(
+        VehicleType, ParkingSlot.vehicle_type_id == VehicleType.vehicle_type_id
+    )
+    if establishment_id:
+        statement = statement.where(ParkingSlot.establishment_id == establishment_id)
+    return statement
+
+
+def slot_counts_statement():
+    """Build the statement counting the slots by establishment, vehicle type and status."""
+    return select(
+        ParkingSlot.establishment_id,
+        ParkingSlot.vehicle_type_id,
+        func.count().label("total_slots"),
+        *(
+            func.count().filter(ParkingSlot.slot_status == status).label(f"{status}_slots")
+            for status in COUNTED_STATUSES
+        ),
+    ).group_by(ParkingSlot.establishment_id, ParkingSlot.vehicle_type_id)
+
+
 class ParkingSlotRepository:
     """Repository for ParkingSlot model."""
     @staticmethod
+    def reconcile_availability() -> int:
+        """
+        Correct the slot_availability counters that drifted from the slots.
+
+        Returns:
+            int: The number of counters corrected or removed.
+        """
+        return SlotAvailabilityRepository.reconcile(slot_counts_statement())
+    @staticmethod
     def create_slot(slot_data: dict) -> int:
         """
         Create a new parking slot.
@@ -137,12 +201,48 @@ class ParkingSlotRepository:
         Returns:
             int: The ID of the newly created slot.
         """
-        with session_scope() as session:
+        with transaction_scope() as session:
             new_slot = ParkingSlot(**slot_data)
             session.add(new_slot)
             session.flush()
             session.refresh(new_slot)
+            SlotAvailabilityRepository.record_changes([(
+                new_slot.establishment_id, new_slot.vehicle_type_id, None, new_slot.slot_status
+            )])
+            slot_status_map.queue_invalidation(session, [new_slot.establishment_id])
             return new_slot.slot_id
+    @staticmethod
+    def create_slots(slots: list[dict]) -> set[str]:
+        """
+        Insert many parking slots of one establishment with batched multi-row INSERTs,
+        skipping the slots whose code the establishment already uses.
+
+        Parameters:
+            slots (list): Dictionaries of slot details, all with the same keys.
+
+        Returns:
+            set: The slot codes that were inserted.
+        """
+        if not slots:
+            return set()
+        with transaction_scope() as session:
+            created = session.execute(
+                insert(ParkingSlot).on_conflict_do_nothing(
+                    constraint="unique_establishment_slot_code"
+                ).returning(
+                    ParkingSlot.slot_code, ParkingSlot.establishment_id,
+                    ParkingSlot.vehicle_type_id, ParkingSlot.slot_status,
+                ),
+                slots,
+            ).all()
+            SlotAvailabilityRepository.record_changes(
+                (slot.establishment_id, slot.vehicle_type_id, None, slot.slot_status)
+                for slot in created
+            )
+            slot_status_map.queue_invalidation(
+                session, {slot.establishment_id for slot in created}
+            )
+            return {slot.slot_code for slot in created}
 
     @staticmethod
     @overload
@@ -225,6 +325,41 @@ class ParkingSlotRepository:
             return {}
 
 
+    @staticmethod
+    def get_slots_by_ids(slot_ids: list[int]) -> list[dict]:
+        """
+        Get the parking slots with the given IDs in a single query.
+
+        Parameters:
+            slot_ids (list[int]): The IDs of the slots.
+
+        Returns:
+            list: List of parking slot objects, shaped like the result of get_slot.
+        """
+        if not slot_ids:
+            return []
+        with session_scope() as session:
+            rows = session.execute(
+                select(
+                    ParkingSlot,
+                    VehicleType.name.label("vehicle_type_name"),
+                    VehicleType.code.label("vehicle_type_code"),
+                    VehicleType.size_category.label("vehicle_type_size"),
+                ).join(
+                    VehicleType, ParkingSlot.vehicle_type_id == VehicleType.vehicle_type_id
+                ).where(ParkingSlot.slot_id.in_(slot_ids))
+            ).all()
+            slots = []
+            for slot, vehicle_type_name, vehicle_type_code, vehicle_type_size in rows:
+                slot_dict = slot.to_dict()
+                slot_dict.update({
+                    "vehicle_type_name": vehicle_type_name,
+                    "vehicle_type_code": vehicle_type_code,
+                    "vehicle_type_size": vehicle_type_size.value
+                })
+                slots.append(slot_dict)
+            return slots
+
     @staticmethod
     def delete_slot(slot_uuid: bytes) -> int:
         """
@@ -236,10 +371,14 @@ class ParkingSlotRepository:
         Returns:
             int: The ID of the deleted slot.
         """
-        with session_scope() as session:
+        with transaction_scope() as session:
             slot = session.query(ParkingSlot).get(slot_uuid)
             if slot:
                 session.delete(slot)
+                SlotAvailabilityRepository.record_changes([
+                    (slot.establishment_id, slot.vehicle_type_id, slot.slot_status, None)
+                ])
+                slot_status_map.queue_invalidation(session, [slot.establishment_id])
                 return slot.slot_id
             raise SlotNotFound("Slot not found")
 
@@ -254,11 +393,30 @@ class ParkingSlotRepository:
         Returns:
             int: The ID of the updated slot.
         """
-        with session_scope() as session:
+        with transaction_scope() as session:
+            counted_columns = (
+                ParkingSlot.establishment_id, ParkingSlot.vehicle_type_id, ParkingSlot.slot_status
+            )
+            before = session.execute(
+                select(*counted_columns)
+                .where(ParkingSlot.uuid == slot_data.get("uuid"))
+                .with_for_update()
+            ).first()
             result = session.query(ParkingSlot).filter(
                 ParkingSlot.uuid == slot_data.get("uuid")
             ).update(slot_data)
             if result:
+                after = session.execute(
+                    select(*counted_columns).where(ParkingSlot.uuid == slot_data.get("uuid"))
+                ).first()
+                if before != after:
+                    SlotAvailabilityRepository.record_changes([
+                        (*before[:2], before.slot_status, None),
+                        (*after[:2], None, after.slot_status),
+                    ])
+                slot_status_map.queue_invalidation(
+                    session, {before.establishment_id, after.establishment_id}
+                )
                 return result
             raise SlotNotFound("Slot not found")
 
@@ -295,29 +453,63 @@ class ParkingSlotRepository:
         Returns:
             list: List of parking slot objects.
         """
+        with session_scope(read_only=True) as session:
+            return SLOT_LIST_PROJECTION.to_dicts(
+                session.execute(slot_list_statement(establishment_id))
+            )
+    @staticmethod
+    def get_slot_grid(establishment_id: int) -> list[dict[str, Any]]:
+        """
+        Get all parking slots of an establishment for the slot-grid reads, from the grid
+        kept in Redis when SLOT_STATUS_MAP_ENABLED is set.
+
+        Parameters:
+            establishment_id (int): The ID of the establishment.
+
+        Returns:
+            list: List of parking slot objects, shaped like the result of get_slots.
+        """
+        if establishment_id is None or not slot_status_map.is_enabled():
+            return ParkingSlotRepository.get_slots(establishment_id)
+        return slot_status_map.get_slots(establishment_id, ParkingSlotRepository.load_slot_grid)
+    @staticmethod
+    def load_slot_grid(establishment_id: int) -> list[dict[str, Any]]:
+        """
+        Read the slots of an establishment to rebuild its grid in Redis. They are read
+        from the primary, since a replica may not have the write the grid was dropped for.
+
+        Parameters:
+            establishment_id (int): The ID of the establishment.
+
+        Returns:
+            list: List of parking slot objects, shaped like the result of get_slots.
+        """
         with session_scope() as session:
-            if establishment_id:
-                query = session.query(
-                    ParkingSlot,
-                    VehicleType.name.label("vehicle_type_name"),
-                    VehicleType.code.label("vehicle_type_code"),
-                    VehicleType.size_category.label("vehicle_type_size"),
-                ).filter_by(establishment_id=establishment_id).join(
-                    VehicleType,ParkingSlot.vehicle_type_id == VehicleType.vehicle_type_id
-                ).all()
-            else:
-                query = session.query(ParkingSlot).all()
-            slots = []
-            for slot, vehicle_type_name, vehicle_type_code, vehicle_type_size in query:
-                slot_dict = slot.to_dict()
-                slot_dict.update({
-                    "vehicle_type_name": vehicle_type_name,
-                    "vehicle_type_code": vehicle_type_code,
-                    "vehicle_type_size": vehicle_type_size.value
-                })
-                slot_dict.pop("vehicle_type_id")
-                slots.append(slot_dict)
-            return slots
+            return SLOT_LIST_PROJECTION.to_dicts(
+                session.execute(slot_list_statement(establishment_id))
+            )
+    @staticmethod
+    def get_slots_page(
+        establishment_id: int, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list[dict[str, Any]], str]:
+        """
+        Get a page of the parking slots of an establishment, ordered by their ID.
+
+        Parameters:
+            establishment_id (int): The ID of the establishment.
+            after (tuple): The decoded cursor of the previous page.
+            limit (int): The maximum number of slots to return.
+
+        Returns:
+            tuple: List of parking slot objects, shaped like the result of get_slots, and
+                the next page cursor.
+        """
+        with session_scope(read_only=True) as session:
+            rows, next_cursor = fetch_page(
+                session, slot_list_statement(establishment_id), (ParkingSlot.slot_id,),
+                after=after, limit=limit,
+            )
+            return SLOT_LIST_PROJECTION.to_dicts(rows), next_cursor
     @staticmethod
     @overload
     def change_slot_status(
@@ -344,13 +536,126 @@ class ParkingSlotRepository:
         Returns:
             int: The ID of the updated slot.
         """
-        with session_scope() as session:
+        with transaction_scope() as session:
             slot = None
+            # The row stays locked until the commit, so a concurrent change reads the
+            # status written here rather than applying its counter delta to the same one.
             if slot_uuid:
-                slot = session.query(ParkingSlot).filter_by(uuid=slot_uuid).first()
+                slot = (
+                    session.query(ParkingSlot).filter_by(uuid=slot_uuid).with_for_update().first()
+                )
             if slot_id:
-                slot = session.query(ParkingSlot).filter_by(slot_id=slot_id).first()
+                slot = (
+                    session.query(ParkingSlot).filter_by(slot_id=slot_id).with_for_update().first()
+                )
             if slot:
+                SlotAvailabilityRepository.record_changes([
+                    (slot.establishment_id, slot.vehicle_type_id, slot.slot_status, new_status)
+                ])
+                slot_status_map.queue_status_changes(
+                    session, [(slot.establishment_id, slot.slot_id, new_status)]
+                )
                 slot.slot_status = new_status
                 return slot.slot_id
             raise SlotNotFound("Slot not found")
+    @staticmethod
+    def claim_slot(
+        slot_uuid: str, new_status: Literal["occupied", "reserved"] = "reserved"
+    ) -> int | None:
+        """
+        Atomically move an open parking slot to a new status with a single conditional
+        UPDATE ... WHERE slot_status = 'open' RETURNING. Concurrent claims of the same slot
+        serialize on its row lock and only the first one updates the row.
+
+        Parameters:
+            slot_uuid (str): The UUID of the slot.
+            new_status (SlotStatus): The status of the claimed slot.
+
+        Returns:
+            int: The ID of the claimed slot, or None when it does not exist or is not open.
+        """
+        with transaction_scope() as session:
+            slot = session.execute(
+                update(ParkingSlot)
+                .where(ParkingSlot.uuid == slot_uuid)
+                .where(ParkingSlot.slot_status == SlotStatus.open)
+                .values(slot_status=new_status, updated_at=func.current_timestamp())
+                .returning(
+                    ParkingSlot.slot_id, ParkingSlot.establishment_id, ParkingSlot.vehicle_type_id
+                )
+                .execution_options(synchronize_session=False)
+            ).first()
+            if slot is None:
+                return None
+            SlotAvailabilityRepository.record_changes([
+                (slot.establishment_id, slot.vehicle_type_id, SlotStatus.open, new_status)
+            ])
+            slot_status_map.queue_status_changes(
+                session, [(slot.establishment_id, slot.slot_id, new_status)]
+            )
+            return slot.slot_id
+    @staticmethod
+    def claim_open_slot(  # pylint: disable=too-many-arguments
+        establishment_id: int, vehicle_type_id: int, *, floor_level: int = None,
+        is_premium: bool = None, slot_features: str = None,
+        new_status: Literal["occupied", "reserved"] = "reserved",
+    ) -> dict:
+        """
+        Atomically move the best open slot of an establishment to a new status. The slot is
+        picked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent claims each take a
+        different slot instead of queueing on the same row.
+
+        Parameters:
+            establishment_id (int): The ID of the establishment.
+            vehicle_type_id (int): The vehicle type the slot must accept.
+            floor_level (int): The preferred floor, the nearest floors are picked first.
+            is_premium (bool): Whether the slot must be premium, either when None.
+            slot_features (str): The feature the slot must have, any when None.
+            new_status (SlotStatus): The status of the claimed slot.
+
+        Returns:
+            dict: The slot_id, uuid, slot_code and floor_level of the claimed slot, or an
+                empty dictionary when no open slot matches.
+        """
+        candidate = select(ParkingSlot.slot_id).where(
+            ParkingSlot.establishment_id == establishment_id,
+            ParkingSlot.vehicle_type_id == vehicle_type_id,
+            ParkingSlot.slot_status == SlotStatus.open,
+            ParkingSlot.is_active.is_(True),
+        )
+        if is_premium is not None:
+            candidate = candidate.where(ParkingSlot.is_premium.is_(is_premium))
+        if slot_features is not None:
+            candidate = candidate.where(ParkingSlot.slot_features == slot_features)
+        if floor_level is not None:
+            candidate = candidate.order_by(func.abs(ParkingSlot.floor_level - floor_level))
+        candidate = candidate.order_by(
+            ParkingSlot.is_premium, ParkingSlot.slot_multiplier, ParkingSlot.floor_level,
+            ParkingSlot.slot_id,
+        ).limit(1).with_for_update(skip_locked=True)
+        with transaction_scope() as session:
+            slot = session.execute(
+                update(ParkingSlot)
+                .where(ParkingSlot.slot_id == candidate.scalar_subquery())
+                .where(ParkingSlot.slot_status == SlotStatus.open)
+                .values(slot_status=new_status, updated_at=func.current_timestamp())
+                .returning(
+                    ParkingSlot.slot_id, ParkingSlot.uuid, ParkingSlot.slot_code,
+                    ParkingSlot.floor_level, ParkingSlot.vehicle_type_id,
+                )
+                .execution_options(synchronize_session=False)
+            ).first()
+            if slot is None:
+                return {}
+            SlotAvailabilityRepository.record_changes([
+                (establishment_id, slot.vehicle_type_id, SlotStatus.open, new_status)
+            ])
+            slot_status_map.queue_status_changes(
+                session, [(establishment_id, slot.slot_id, new_status)]
+            )
+            return {
+                "slot_id": slot.slot_id,
+                "uuid": str(slot.uuid),
+                "slot_code": slot.slot_code,
+                "floor_level": slot.floor_level,
+            }
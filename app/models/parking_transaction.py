@@ -6,13 +6,17 @@ from enum import Enum as PyEnum
 from typing import Literal, overload
 
 from sqlalchemy import (
-    Column, Enum, Integer, ForeignKey, TIMESTAMP, text, Numeric, UUID, update, func
+    Column, Enum, Integer, ForeignKey, TIMESTAMP, text, Numeric, UUID, update, func, Index,
+    select,
 )
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
 from app.models.parking_slot import ParkingSlot
-from app.utils.db import session_scope
+from app.models.slot_availability import SlotAvailabilityRepository
+from app.utils import slot_status_map
+from app.utils.db import session_scope, transaction_scope
+from app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page
 
 
 # Define custom Enum types for 'payment_status' and 'transaction_status'
@@ -74,6 +78,14 @@ class ParkingTransaction(
     duration_type = Column(Enum(DurationTypeEnum), nullable=False)
     duration = Column(Integer, nullable=False)
 
+    __table_args__ = (
+        Index("ix_parking_transaction_slot_id_created_at", "slot_id", "created_at"),
+        Index(
+            "ix_parking_transaction_reserved_created_at", "created_at",
+            postgresql_where=text("status = 'reserved'"),
+        ),
+    )
+
     parking_slots = relationship("ParkingSlot", back_populates="transactions")
     user = relationship("User", back_populates="transactions")
 
@@ -106,7 +118,7 @@ class ParkingTransactionRepository:
         with session_scope() as session:
             transaction = ParkingTransaction(**data)
             session.add(transaction)
-            session.commit()
+            session.flush()
             return transaction.transaction_id
 
     @classmethod
@@ -184,6 +196,90 @@ class ParkingTransactionRepository:
                 transactions_arr_dict.append(transaction_dict)
             return transactions_arr_dict
 
+    @classmethod
+    def get_user_transactions(
+        cls, user_id: int, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list[dict], str]:
+        """
+        Get a page of the transactions of a user, newest first.
+
+        Parameters:
+            user_id (int): The ID of the user.
+            after (tuple): The decoded cursor of the previous page.
+            limit (int): The maximum number of transactions to return.
+
+        Returns:
+            tuple: The transactions merged with their slot, and the next page cursor.
+        """
+        statement = select(ParkingTransaction, ParkingSlot).join(
+            ParkingSlot, ParkingSlot.slot_id == ParkingTransaction.slot_id
+        ).where(ParkingTransaction.user_id == user_id)
+        with session_scope(read_only=True) as session:
+            rows, next_cursor = fetch_page(
+                session, statement,
+                (ParkingTransaction.created_at, ParkingTransaction.transaction_id),
+                after=after, limit=limit, descending=True,
+            )
+            transactions = []
+            for transaction, parking_slot in rows:
+                transaction_dict = transaction.to_dict()
+                parking_slot_dict = parking_slot.to_dict()
+                parking_slot_dict.pop('uuid')
+                transaction_dict.update(parking_slot_dict)
+                transactions.append(transaction_dict)
+            return transactions, next_cursor
+
+    @classmethod
+    def get_establishment_transactions(  # pylint: disable=R0913, R0914, R0917
+        cls, establishment_id: int, status: str = None, start_date=None, end_date=None,
+        after: tuple = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list[dict], str]:
+        """
+        Get a page of the transactions made on the slots of an establishment, newest first.
+
+        Parameters:
+            establishment_id (int): The ID of the establishment.
+            status (str): Only return the transactions with this status.
+            start_date (datetime): Only return the transactions created at or after this date.
+            end_date (datetime): Only return the transactions created before this date.
+            after (tuple): The decoded cursor of the previous page.
+            limit (int): The maximum number of transactions to return.
+
+        Returns:
+            tuple: The transactions, each with the code and floor level of its slot, and
+                the next page cursor.
+        """
+        statement = select(
+            ParkingTransaction,
+            ParkingSlot.uuid.label("slot_uuid"),
+            ParkingSlot.slot_code,
+            ParkingSlot.floor_level,
+        ).join(
+            ParkingSlot, ParkingSlot.slot_id == ParkingTransaction.slot_id
+        ).where(ParkingSlot.establishment_id == establishment_id)
+        if status is not None:
+            statement = statement.where(ParkingTransaction.status == status)
+        if start_date is not None:
+            statement = statement.where(ParkingTransaction.created_at >= start_date)
+        if end_date is not None:
+            statement = statement.where(ParkingTransaction.created_at < end_date)
+        with session_scope(read_only=True) as session:
+            rows, next_cursor = fetch_page(
+                session, statement,
+                (ParkingTransaction.created_at, ParkingTransaction.transaction_id),
+                after=after, limit=limit, descending=True,
+            )
+            transactions = []
+            for transaction, slot_uuid, slot_code, floor_level in rows:
+                transaction_dict = transaction.to_dict()
+                transaction_dict.update({
+                    "slot_uuid": str(slot_uuid),
+                    "slot_code": slot_code,
+                    "floor_level": floor_level,
+                })
+                transactions.append(transaction_dict)
+            return transactions, next_cursor
+
     @classmethod
     def update_transaction_status(
         cls, transaction_uuid: str, status: Literal["active", "completed", "cancelled"]
@@ -195,7 +291,7 @@ class ParkingTransactionRepository:
                 .values(status=status)
                 .where(ParkingTransaction.uuid == transaction_uuid)
             )
-            session.commit()
+            session.flush()
     @classmethod
     def update_entry_exit_time(
         cls, transaction_uuid: str, entry_time = None, exit_time = None
@@ -207,7 +303,7 @@ class ParkingTransactionRepository:
                 .values(entry_time=entry_time, exit_time=exit_time)
                 .where(ParkingTransaction.uuid == transaction_uuid)
             )
-            session.commit()
+            session.flush()
     @classmethod
     def update_payment_status(
         cls, transaction_uuid: str, payment_status: Literal["completed", "failed"]
@@ -219,8 +315,63 @@ class ParkingTransactionRepository:
                 .values(payment_status=payment_status)
                 .where(ParkingTransaction.uuid == transaction_uuid)
             )
-            session.commit()
+            session.flush()
+    @staticmethod
+    def expire_reservations(reserved_before, limit: int) -> tuple[int, list[dict]]:
+        """
+        Cancel one batch of the reservations made before a cutoff and release their slots,
+        with one set-based UPDATE ... RETURNING for the transactions and one for the slots,
+        in a single transaction. The oldest reservations not locked by a concurrent
+        transaction are picked first.
+
+        Parameters:
+            reserved_before (datetime): Reservations created before it have expired.
+            limit (int): The maximum number of reservations to expire.
 
+        Returns:
+            tuple: The number of expired reservations, and the slot_id and
+                establishment_id of every released slot.
+        """
+        stale = (
+            select(ParkingTransaction.transaction_id)
+            .where(ParkingTransaction.status == "reserved")
+            .where(ParkingTransaction.created_at < reserved_before)
+            .order_by(ParkingTransaction.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        with transaction_scope() as session:
+            slot_ids = session.scalars(
+                update(ParkingTransaction)
+                .where(ParkingTransaction.transaction_id.in_(stale))
+                .values(status="cancelled", updated_at=func.current_timestamp())
+                .returning(ParkingTransaction.slot_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not slot_ids:
+                return 0, []
+            released = session.execute(
+                update(ParkingSlot)
+                .where(ParkingSlot.slot_id.in_(set(slot_ids)))
+                .where(ParkingSlot.slot_status == "reserved")
+                .values(slot_status="open", updated_at=func.current_timestamp())
+                .returning(
+                    ParkingSlot.slot_id, ParkingSlot.establishment_id, ParkingSlot.vehicle_type_id
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            SlotAvailabilityRepository.record_changes(
+                (establishment_id, vehicle_type_id, "reserved", "open")
+                for _, establishment_id, vehicle_type_id in released
+            )
+            slot_status_map.queue_status_changes(
+                session,
+                ((establishment_id, slot_id, "open") for slot_id, establishment_id, _ in released),
+            )
+            return len(slot_ids), [
+                {"slot_id": slot_id, "establishment_id": establishment_id}
+                for slot_id, establishment_id, _ in released
+            ]
 
     @classmethod
     def is_user_have_an_ongoing_transaction(cls, user_id: int) -> bool:
@@ -59,7 +59,6 @@ class PaymentMethodRepository:
             payment_method = PaymentMethod(**payment_method_data)
             session.add(payment_method)
             session.flush()
-            session.refresh(payment_method)
             return payment_method.method_id
 
     @staticmethod
@@ -84,7 +83,7 @@ class PaymentMethodRepository:
     @staticmethod
     def get_payment_methods(establishment_id: int):
         """Get payment methods by establishment id."""
-        with session_scope() as session:
+        with session_scope(read_only=True) as session:
             payment_methods = session.query(
                 PaymentMethod).filter_by(establishment_id=establishment_id).all()
             return [method.to_dict() for method in payment_methods]
@@ -10,7 +10,7 @@ from enum import Enum as PyEnum
 
 from sqlalchemy import (
     Column, Integer, Numeric, Boolean, TIMESTAMP, func, ForeignKey, UniqueConstraint,
-    CheckConstraint, String
+    CheckConstraint, Index, String, insert, text
 )
 from sqlalchemy.orm import relationship
 
@@ -47,7 +47,11 @@ class PricingPlan(Base):
         CheckConstraint(
             "rate_type IN ('hourly', 'daily', 'monthly')",
             name='pricing_plan_rate_type_check'
-        )
+        ),
+        Index(
+            'ix_pricing_plan_enabled_rate', 'rate_type', 'rate', 'establishment_id',
+            postgresql_where=text('is_enabled')
+        ),
     )
 
     parking_establishment = relationship("ParkingEstablishment", backref="pricing_plans")
@@ -72,24 +76,27 @@ class PricingPlanRepository:
 
     @staticmethod
     def create_pricing_plan(establishment_id: int, pricing_plans: list):
-        """Create pricing plan for a parking establishment."""
+        """Create pricing plans for a parking establishment with one bulk insert."""
+        if not pricing_plans:
+            return []
         with session_scope() as session:
-            pricing_plan_ids = []
-            for plan in pricing_plans:
-                pricing_plan = PricingPlan(
-                    establishment_id=establishment_id,
-                    rate_type=plan.get('rate_type'),
-                    rate=plan.get('rate')
-                )
-                session.add(pricing_plan)
-                session.flush()
-                pricing_plan_ids.append(pricing_plan.plan_id)
-            return pricing_plan_ids
+            return list(session.scalars(
+                insert(PricingPlan).returning(PricingPlan.plan_id),
+                [
+                    {
+                        "establishment_id": establishment_id,
+                        "rate_type": plan.get('rate_type'),
+                        "is_enabled": plan.get('is_enabled', False),
+                        "rate": plan.get('rate'),
+                    }
+                    for plan in pricing_plans
+                ],
+            ))
 
     @staticmethod
     def get_pricing_plans(establishment_id: int):
         """Get pricing plans of a parking establishment."""
-        with session_scope() as session:
+        with session_scope(read_only=True) as session:
             pricing_plans = session.query(
                 PricingPlan).filter_by(establishment_id=establishment_id).all()
             return [plan.to_dict() for plan in pricing_plans]
@@ -105,7 +112,7 @@ class PricingPlanRepository:
                 if pricing_plan is not None:
                     pricing_plan.rate = plan.get('rate')
                     pricing_plan.is_enabled = plan.get('is_enabled')
-            session.commit()
+            session.flush()
 
     @staticmethod
     def delete_pricing_plans(establishment_id: int):
@@ -115,4 +122,4 @@ class PricingPlanRepository:
                 PricingPlan).filter_by(establishment_id=establishment_id).all()
             for plan in pricing_plans:
                 session.delete(plan)
-            session.commit()
+            session.flush()
@@ -0,0 +1,181 @@
+"""
+    Slot counters per establishment and vehicle type. They are updated in the same
+    transaction as every slot write, so reading the availability of an establishment never
+    needs to count its slots.
+"""
+
+# pylint: disable=E1102
+
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import (
+    Column, ForeignKey, Integer, TIMESTAMP, delete, func, or_, select, text, tuple_,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.base import Base
+from app.utils.db import session_scope
+from app.utils.engine import get_engine
+
+COUNTED_STATUSES = ("open", "occupied", "reserved")
+COUNTER_COLUMNS = ("total_slots", "open_slots", "occupied_slots", "reserved_slots")
+
+
+class SlotAvailability(Base):  # pylint: disable=too-few-public-methods
+    """Slot counters of an establishment for one vehicle type."""
+    __tablename__ = "slot_availability"
+
+    establishment_id = Column(
+        Integer, ForeignKey("parking_establishment.establishment_id"), primary_key=True
+    )
+    vehicle_type_id = Column(
+        Integer, ForeignKey("vehicle_type.vehicle_type_id"), primary_key=True
+    )
+    total_slots = Column(Integer, nullable=False, default=0)
+    open_slots = Column(Integer, nullable=False, default=0)
+    occupied_slots = Column(Integer, nullable=False, default=0)
+    reserved_slots = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        TIMESTAMP, default=func.current_timestamp(), onupdate=func.current_timestamp()
+    )
+
+    def to_dict(self):
+        """Return the slot counters as a dictionary."""
+        if self is None:
+            return {}
+        return {
+            "establishment_id": self.establishment_id,
+            "vehicle_type_id": self.vehicle_type_id,
+            "total_slots": self.total_slots,
+            "open_slots": self.open_slots,
+            "occupied_slots": self.occupied_slots,
+            "reserved_slots": self.reserved_slots,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class SlotAvailabilityRepository:
+    """Repository for the SlotAvailability counters."""
+
+    @staticmethod
+    def record_changes(changes: Iterable[tuple]):
+        """
+        Apply slot writes to the counters with one upsert. Call it inside the
+        transaction_scope of the slot write, so both are committed together.
+
+        Parameters:
+            changes: (establishment_id, vehicle_type_id, old_status, new_status) tuples, with
+                no old status for a created slot and no new status for a deleted one.
+        """
+        deltas = {}
+        for establishment_id, vehicle_type_id, old_status, new_status in changes:
+            delta = deltas.setdefault((establishment_id, vehicle_type_id), Counter())
+            old_status = getattr(old_status, "value", old_status)
+            new_status = getattr(new_status, "value", new_status)
+            if old_status is None:
+                delta["total_slots"] += 1
+            elif old_status in COUNTED_STATUSES:
+                delta[f"{old_status}_slots"] -= 1
+            if new_status is None:
+                delta["total_slots"] -= 1
+            elif new_status in COUNTED_STATUSES:
+                delta[f"{new_status}_slots"] += 1
+        # The rows are upserted in key order, so concurrent writers lock them in one order.
+        rows = [
+            {
+                "establishment_id": establishment_id,
+                "vehicle_type_id": vehicle_type_id,
+                **{column: delta[column] for column in COUNTER_COLUMNS},
+            }
+            for (establishment_id, vehicle_type_id), delta in sorted(deltas.items())
+            if any(delta.values())
+        ]
+        if not rows:
+            return
+        statement = insert(SlotAvailability)
+        with session_scope() as session:
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[
+                        SlotAvailability.establishment_id, SlotAvailability.vehicle_type_id
+                    ],
+                    set_={
+                        **{
+                            column: getattr(SlotAvailability, column)
+                            + getattr(statement.excluded, column)
+                            for column in COUNTER_COLUMNS
+                        },
+                        "updated_at": func.current_timestamp(),
+                    },
+                ),
+                rows,
+            )
+
+    @staticmethod
+    def establishment_totals(establishment_id) -> list:
+        """
+        Build the scalar subqueries summing the counters of every vehicle type of one
+        establishment, labelled with the COUNTER_COLUMNS. They are correlated on
+        establishment_id, e.g. a column of the enclosing statement, so PostgreSQL only
+        sums the counters of the rows left after its ORDER BY and LIMIT, rather than
+        those of every establishment.
+        """
+        return [
+            func.coalesce(
+                select(func.sum(getattr(SlotAvailability, column)))
+                .where(SlotAvailability.establishment_id == establishment_id)
+                .scalar_subquery(),
+                0,
+            ).cast(Integer).label(column)
+            for column in COUNTER_COLUMNS
+        ]
+
+    @staticmethod
+    def reconcile(counts) -> int:
+        """
+        Replace the counters that drifted with the actual counts of the slots.
+
+        Writers are blocked for the duration of the recount, so no slot write committed
+        meanwhile can be lost.
+
+        Parameters:
+            counts: The statement counting the slots by establishment and vehicle type,
+                with the establishment_id, vehicle_type_id and COUNTER_COLUMNS as columns.
+
+        Returns:
+            int: The number of counters corrected or removed.
+        """
+        statement = insert(SlotAvailability).from_select(
+            ["establishment_id", "vehicle_type_id", *COUNTER_COLUMNS], counts
+        )
+        with session_scope() as session:
+            if get_engine().dialect.name == "postgresql":
+                session.execute(text("LOCK TABLE slot_availability IN EXCLUSIVE MODE"))
+            corrected = session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[
+                        SlotAvailability.establishment_id, SlotAvailability.vehicle_type_id
+                    ],
+                    set_={
+                        **{
+                            column: getattr(statement.excluded, column)
+                            for column in COUNTER_COLUMNS
+                        },
+                        "updated_at": func.current_timestamp(),
+                    },
+                    where=or_(*(
+                        getattr(SlotAvailability, column) != getattr(statement.excluded, column)
+                        for column in COUNTER_COLUMNS
+                    )),
+                ).returning(SlotAvailability.establishment_id)
+            ).all()
+            counted = counts.subquery()
+            removed = session.execute(
+                delete(SlotAvailability).where(
+                    tuple_(
+                        SlotAvailability.establishment_id, SlotAvailability.vehicle_type_id
+                    ).not_in(select(counted.c.establishment_id, counted.c.vehicle_type_id))
+                ).returning(SlotAvailability.establishment_id)
+            ).all()
+            return len(corrected) + len(removed)
@@ -9,7 +9,7 @@ from typing import overload
 from uuid import uuid4
 
 from sqlalchemy import (
-    Column, Integer, Enum, select, update, CheckConstraint, UniqueConstraint,
+    Column, Integer, Enum, lambda_stmt, select, update, CheckConstraint, UniqueConstraint,
     UUID, String, DateTime, Boolean, func
 )
 from sqlalchemy.orm import relationship
@@ -19,7 +19,8 @@ from app.models.ban_user import BanUser
 from app.models.base import Base
 from app.routes.auth import AccountIsNotVerifiedException
 from app.utils.db import session_scope
-from app.utils.engine import get_session
+from app.utils.pagination import DEFAULT_PAGE_SIZE, fetch_page
+from app.utils.projection import Projection, to_enum_value, to_isoformat, to_str, to_text
 
 
 class UserRole(PyEnum):  # pylint: disable=C0115
@@ -128,6 +129,24 @@ class User(Base):
             return user.user_id
 
 
+# The user information returned by the list reads, without the OTP and verification secrets.
+USER_LIST_PROJECTION = Projection(
+    user_id=User.user_id,
+    uuid=(User.uuid, to_str),
+    nickname=User.nickname,
+    first_name=(User.first_name, to_text),
+    last_name=(User.last_name, to_text),
+    middle_name=(User.middle_name, to_text),
+    suffix=(User.suffix, to_text),
+    email=User.email,
+    phone_number=User.phone_number,
+    role=(User.role, to_enum_value),
+    plate_number=User.plate_number,
+    is_verified=User.is_verified,
+    created_at=(User.created_at, to_isoformat),
+)
+
+
 class UserRepository:
     """Repository pattern for user operations"""
 
@@ -152,7 +171,6 @@ class UserRepository:
             new_user = User(**user_data)
             session.add(new_user)
             session.flush()
-            session.refresh(new_user)
             return new_user.user_id
 
     @staticmethod
@@ -235,14 +253,20 @@ class UserRepository:
         with session_scope() as session:
             user: User
             if user_id:
-                user = session.execute(select(User).where(User.user_id == user_id)).scalar()
+                user = session.execute(
+                    lambda_stmt(lambda: select(User).where(User.user_id == user_id))
+                ).scalar()
             elif user_uuid:
-                user = session.execute(select(User).where(User.uuid == user_uuid)).scalar()
+                user = session.execute(
+                    lambda_stmt(lambda: select(User).where(User.uuid == user_uuid))
+                ).scalar()
             elif email:
-                user = session.execute(select(User).where(User.email == email)).scalar()
+                user = session.execute(
+                    lambda_stmt(lambda: select(User).where(User.email == email))
+                ).scalar()
             elif plate_number:
                 user = session.execute(
-                    select(User).where(User.plate_number == plate_number)
+                    lambda_stmt(lambda: select(User).where(User.plate_number == plate_number))
                 ).scalar()
             user_info = user.to_dict()
             user_info.pop("otp_secret")
@@ -251,6 +275,46 @@ class UserRepository:
             user_info.pop("verification_expiry")
             return user_info
 
+    @staticmethod
+    def get_users(user_ids: list[int]) -> list[dict]:
+        """
+        Get the users with the given IDs in a single query.
+
+        Parameters:
+        user_ids (list[int]): The IDs of the users.
+
+        Returns:
+        list: A list of dictionaries containing the user information.
+        """
+        if not user_ids:
+            return []
+        with session_scope() as session:
+            return USER_LIST_PROJECTION.to_dicts(session.execute(
+                select(*USER_LIST_PROJECTION.columns).where(User.user_id.in_(user_ids))
+            ))
+
+    @staticmethod
+    def get_users_page(
+        after: tuple = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> tuple[list[dict], str]:
+        """
+        Get a page of the users, ordered by their ID.
+
+        Parameters:
+        after (tuple): The decoded cursor of the previous page.
+        limit (int): The maximum number of users to return.
+
+        Returns:
+        tuple: A list of dictionaries containing the user information, and the next page
+        cursor.
+        """
+        with session_scope(read_only=True) as session:
+            rows, next_cursor = fetch_page(
+                session, select(*USER_LIST_PROJECTION.columns), (User.user_id,),
+                after=after, limit=limit,
+            )
+            return USER_LIST_PROJECTION.to_dicts(rows), next_cursor
+
     @staticmethod
     def get_all_users() -> list[dict]:
         """
@@ -263,17 +327,10 @@ class UserRepository:
         DataError, IntegrityError, OperationalError, DatabaseError: If there is an error
         during the database operation.
         """
-        with session_scope() as session:
-            users = session.execute(select(User)).scalars().all()
-            users_list = []
-            for user in users:
-                user_info = user.to_dict()
-                user_info.pop("otp_secret")
-                user_info.pop("otp_expiry")
-                user_info.pop("verification_token")
-                user_info.pop("verification_expiry")
-                users_list.append(user_info)
-            return users_list
+        with session_scope(read_only=True) as session:
+            return USER_LIST_PROJECTION.to_dicts(
+                session.execute(select(*USER_LIST_PROJECTION.columns))
+            )
         
     @staticmethod
     def update_user(user_id: int, update_data: dict):
@@ -367,7 +424,7 @@ class OTPOperations:
                 update(User).where(User.email == data.get("email"))
                 .values(otp_secret=data.get("otp_secret"), otp_expiry=data.get("otp_expiry"))
             )
-            session.commit()
+            session.flush()
 
     @classmethod
     def delete_otp(cls, email: str):
@@ -381,8 +438,8 @@ class OTPOperations:
             DataError, IntegrityError, OperationalError, DatabaseError: If a
             database error occurs.
         """
-        with get_session() as session:
+        with session_scope() as session:
             session.execute(
                 update(User).where(User.email == email).values(otp_secret=None, otp_expiry=None)
             )
-            session.commit()
+            session.flush()
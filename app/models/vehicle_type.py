@@ -7,7 +7,7 @@
 from enum import Enum as PyEnum
 from typing import overload
 
-from sqlalchemy import BOOLEAN, Column, Integer, Enum, func, String, TIMESTAMP
+from sqlalchemy import BOOLEAN, Column, Integer, Enum, func, select, String, TIMESTAMP
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -71,7 +71,7 @@ class VehicleTypeRepository:  # pylint: disable=R0903
     @classmethod
     def get_all_vehicle_types(cls):
         """Get all vehicle types from the database."""
-        with session_scope() as session:
+        with session_scope(read_only=True) as session:
             vehicle_types = session.query(VehicleType).all()
             return [vehicle_type.to_dict() for vehicle_type in vehicle_types]
     @staticmethod
@@ -95,6 +95,17 @@ class VehicleTypeRepository:  # pylint: disable=R0903
                     uuid=vehicle_type_uuid
                 ).first()
             return vehicle_type.to_dict() if vehicle_type else None
+    @staticmethod
+    def get_existing_vehicle_type_ids(vehicle_type_ids: list[int]) -> set[int]:
+        """Return which of the given vehicle type IDs exist, with a single query."""
+        if not vehicle_type_ids:
+            return set()
+        with session_scope(read_only=True) as session:
+            return set(session.scalars(
+                select(VehicleType.vehicle_type_id).where(
+                    VehicleType.vehicle_type_id.in_(vehicle_type_ids)
+                )
+            ))
 
 
     @staticmethod
@@ -113,5 +124,5 @@ class VehicleTypeRepository:  # pylint: disable=R0903
         with session_scope() as session:
             vehicle_type = session.query(VehicleType).filter_by(
                 vehicle_type_id = vehicle_type_data["vehicle_type_id"]).update(vehicle_type_data)
-            session.commit()
+            session.flush()
             return vehicle_type.vehicle_type_id
@@ -10,7 +10,9 @@ from flask_smorest import Blueprint
 
 from app.exceptions.establishment_lookup_exceptions import EstablishmentDoesNotExist
 from app.schema.ban_query_validation import BanQueryValidation
-from app.schema.common_schema_validation import EstablishmentCommonValidationSchema
+from app.schema.common_schema_validation import (
+    EstablishmentCommonValidationSchema, PaginationQuerySchema
+)
 from app.services.admin_service import AdminService
 from app.services.establishment_service import EstablishmentService
 from app.services.vehicle_type_service import VehicleTypeService
@@ -44,10 +46,11 @@ def admin_role_required():
 
 @admin_blp.route("/users")
 class GetAllUsers(MethodView):
+    @admin_blp.arguments(PaginationQuerySchema, location="query")
     @admin_blp.response(200, {"message": str})
     @admin_blp.doc(
         security=[{"Bearer": []}],
-        description="Get all users.",
+        description="Get a page of the users.",
         responses={
             200: "Users retrieved.",
             401: "Unauthorized",
@@ -58,10 +61,13 @@ class GetAllUsers(MethodView):
     )
     @jwt_required(False)
     @admin_role_required()
-    def get(self, admin_id): # pylint: disable=unused-argument
+    def get(self, query, admin_id): # pylint: disable=unused-argument
         admin_service = AdminService()
-        users = admin_service.get_all_users()
-        return set_response(200, {"code": "success", "data": users})
+        page = admin_service.get_all_users(query)
+        return set_response(
+            200,
+            {"code": "success", "data": page.get("users"), "next_cursor": page.get("next_cursor")}
+        )
 
 
 @admin_blp.route("/ban-user")
@@ -2,7 +2,7 @@
 
 # pylint: disable=missing-function-docstring, missing-class-docstring
 
-from flask import send_file
+from flask import Response, send_file, stream_with_context
 from flask.views import MethodView
 from flask_smorest import Blueprint
 
@@ -11,11 +11,12 @@ from app.exceptions.establishment_lookup_exceptions import (
 )
 from app.schema.establishment_document_schema import EstablishmentDocumentBaseSchema
 from app.schema.query_validation import (
-    EstablishmentQuerySchema, EstablishmentQueryValidationSchema,
+    EstablishmentQuerySchema, EstablishmentQueryValidationSchema, EstablishmentSuggestQuerySchema,
 )
-from app.schema.response_schema import EstablishmentResponseSchema
+from app.schema.response_schema import EstablishmentResponseSchema, SuggestionResponseSchema
 from app.services.establishment_documents import EstablishmentDocument
 from app.services.establishment_service import EstablishmentService
+from app.utils import slot_status_map
 from app.utils.error_handlers.establishment_error_handlers import (
     handle_establishment_does_not_exist, handle_establishment_edits_not_allowed,
 )
@@ -41,12 +42,37 @@ class GetEstablishments(MethodView):
         },
     )
     def get(self, query_params):
-        establishments = EstablishmentService.get_establishments(query_params)
+        page = EstablishmentService.get_establishments(query_params)
         return set_response(
             200,
             {
                 "code": "success", "message": "Establishments retrieved successfully.",
-                "establishments": establishments
+                "establishments": page.get("establishments"),
+                "next_cursor": page.get("next_cursor"),
+                "facets": page.get("facets"),
+            }
+        )
+
+
+@establishment_blp.route("/suggest")
+class SuggestEstablishments(MethodView):
+    @establishment_blp.arguments(EstablishmentSuggestQuerySchema, location="query")
+    @establishment_blp.response(200, SuggestionResponseSchema)
+    @establishment_blp.doc(
+        description="Suggest establishments whose name or nearby landmarks start with q, "
+        "those matched by their name first",
+        responses={
+            200: "Suggestions retrieved successfully.",
+            400: "Bad Request",
+        },
+    )
+    def get(self, query_params):
+        suggestions = EstablishmentService.suggest_establishments(query_params)
+        return set_response(
+            200,
+            {
+                "code": "success", "message": "Suggestions retrieved successfully.",
+                "suggestions": suggestions,
             }
         )
 
@@ -73,6 +99,35 @@ class GetEstablishmentInfo(MethodView):
                 "establishment": establishment,
             }
         )
+@establishment_blp.route("/slots/stream")
+class StreamSlotStatus(MethodView):
+    @establishment_blp.arguments(EstablishmentQueryValidationSchema, location="query")
+    @establishment_blp.doc(
+        description="Stream the live slot status of an establishment as server-sent events. "
+        "A snapshot event carries every slot, then each slots event carries the new status "
+        "of the slots that changed, and a refresh event asks to reload the snapshot.",
+        responses={
+            200: "Slot status stream opened.",
+            400: "Bad Request",
+            404: "Establishment not found.",
+            503: "Live slot status is not enabled.",
+        },
+    )
+    def get(self, query_params):
+        if not slot_status_map.events_enabled():
+            return set_response(
+                503, {"code": "unavailable", "message": "Live slot status is not enabled."}
+            )
+        events = EstablishmentService.stream_slot_status(query_params.get("establishment_uuid"))
+        # The request context, and so the app config and the request's database stats,
+        # stays available while the stream runs and is torn down when it ends.
+        return Response(
+            stream_with_context(events),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
 @establishment_blp.route("/document")
 class GetEstablishmentDocument(MethodView):
     @establishment_blp.arguments(EstablishmentDocumentBaseSchema, location="query")
@@ -1,8 +1,11 @@
 """Health check endpoint."""
 
 from flask.views import MethodView
+from flask_jwt_extended import jwt_required
 from flask_smorest import Blueprint
 
+from app.routes.admin import admin_role_required
+from app.utils.engine import get_pool_telemetry
 from app.utils.response_util import set_response
 
 health = Blueprint(
@@ -22,3 +25,26 @@ class HealthCheck(MethodView):
         Useful for verifying API uptime and monitoring systems.
         """
         return set_response(200, {"code": "success", "message": "Health check passed"})
+
+
+@health.route("/pool")
+class PoolTelemetry(MethodView):
+    """Connection pool telemetry endpoint for monitoring pool pressure."""
+    @health.doc(
+        security=[{"Bearer": []}],
+        description="Connection pool checkout counts, wait times, overflow and invalidations. "
+        "Admin only.",
+        responses={
+            200: {"description": "Pool telemetry retrieved"},
+            401: {"description": "Unauthorized"},
+        }
+    )
+    @jwt_required(False)
+    @admin_role_required()
+    def get(self, admin_id):  # pylint: disable=unused-argument
+        """
+        Return the connection pool telemetry collected since the process started.
+        """
+        return set_response(
+            200, {"code": "success", "pool": get_pool_telemetry().snapshot()}
+        )
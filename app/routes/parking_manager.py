@@ -15,11 +15,15 @@ from app.exceptions.qr_code_exceptions import (
 )
 from app.exceptions.slot_lookup_exceptions import SlotNotFound, SlotAlreadyExists
 from app.routes.transaction import handle_invalid_transaction_status
-from app.schema.common_schema_validation import TransactionCommonValidationSchema
+from app.schema.common_schema_validation import (
+    PaginationQuerySchema, TransactionCommonValidationSchema
+)
 from app.schema.parking_manager_validation import ParkingManagerRequestSchema
 from app.schema.response_schema import ApiResponse
-from app.schema.slot_validation import CreateSlotParkingManagerSchema
-from app.schema.transaction_validation import ValidateEntrySchema, ValidateTransaction
+from app.schema.slot_validation import CreateSlotParkingManagerSchema, ImportSlotsSchema
+from app.schema.transaction_validation import (
+    EstablishmentTransactionQuerySchema, ValidateEntrySchema, ValidateTransaction
+)
 from app.services.auth_service import AuthService
 from app.services.establishment_service import EstablishmentService
 from app.services.operating_hour_service import OperatingHourService
@@ -297,10 +301,11 @@ class UpdateScheduleHours(MethodView):
 
 @parking_manager_blp.route("/slots")
 class Slots(MethodView):
+    @parking_manager_blp.arguments(PaginationQuerySchema, location="query")
     @parking_manager_blp.response(200, ApiResponse)
     @parking_manager_blp.doc(
         security=[{"Bearer": []}],
-        description="Get the slots of the establishment.",
+        description="Get a page of the slots of the establishment.",
         responses={
             200: "Slots retrieved successfully.",
             400: "Bad Request",
@@ -309,13 +314,14 @@ class Slots(MethodView):
     )
     @jwt_required(False)
     @parking_manager_required()
-    def get(self, user_id):
-        slots = ParkingManagerService.get_all_slots(user_id)
+    def get(self, query, user_id):
+        page = ParkingManagerService.get_all_slots(user_id, query)
         return set_response(
             200,
             {
                 "code": "success",
-                "data": slots,
+                "data": page.get("slots"),
+                "next_cursor": page.get("next_cursor"),
             },
         )
 @parking_manager_blp.route("/slot/create")
@@ -344,12 +350,48 @@ class CreateSlot(MethodView):
             },
         )
 
+@parking_manager_blp.route("/slots/import")
+class ImportSlots(MethodView):
+    @parking_manager_blp.response(201, ApiResponse)
+    @parking_manager_blp.doc(
+        security=[{"Bearer": []}],
+        description=(
+            "Create many slots at once from a CSV or JSON file sent as 'file', or from a "
+            "JSON body with a 'slots' list. Invalid rows and slot codes already in use are "
+            "rejected and reported by row number; the other rows are created."
+        ),
+        responses={
+            201: "Slots imported.",
+            400: "Bad Request",
+            401: "Unauthorized",
+            422: "Unprocessable Entity",
+        },
+    )
+    @jwt_required(False)
+    @parking_manager_required()
+    def post(self, user_id):
+        if "file" in request.files:
+            check_file_size(request)
+            rows = ParkingManagerService.read_slot_import_file(request.files["file"])
+        else:
+            rows = ImportSlotsSchema().load(request.get_json(silent=True) or {}).get("slots")
+        result = ParkingManagerService.import_slots(rows, user_id, request.remote_addr)
+        return set_response(
+            201 if result.get("created") else 400,
+            {
+                "code": "success" if result.get("created") else "no_slots_imported",
+                "message": f"{result.get('created')} slots imported.",
+                "data": result,
+            },
+        )
+
 @parking_manager_blp.route('/transactions')
 class GetTransactions(MethodView):
+    @parking_manager_blp.arguments(EstablishmentTransactionQuerySchema, location="query")
     @parking_manager_blp.response(200, ApiResponse)
     @parking_manager_blp.doc(
         security=[{"Bearer": []}],
-        description="Get all the transactions of the user.",
+        description="Get a page of the transactions of the establishment, newest first.",
         responses={
             200: "Transactions fetched successfully.",
             400: "Bad Request",
@@ -359,13 +401,14 @@ class GetTransactions(MethodView):
     )
     @jwt_required(False)
     @parking_manager_required()
-    def get(self, user_id):
-        transactions = TransactionService.get_establishment_transaction(user_id)
+    def get(self, query, user_id):
+        page = TransactionService.get_establishment_transaction(user_id, query)
         return set_response(
             200,
             {
                 "code": "success",
-                "data": transactions,
+                "data": page.get("transactions"),
+                "next_cursor": page.get("next_cursor"),
             },
         )
 @parking_manager_blp.route('/transaction')
@@ -8,19 +8,30 @@ from flask.views import MethodView
 from flask_jwt_extended import get_jwt, jwt_required
 from flask_smorest import Blueprint
 
+from app.exceptions.establishment_lookup_exceptions import EstablishmentDoesNotExist
 from app.exceptions.qr_code_exceptions import InvalidQRContent, InvalidTransactionStatus
+from app.exceptions.slot_lookup_exceptions import (
+    NoSlotsFoundInTheGivenEstablishment, SlotNotFound, SlotStatusTaken
+)
 from app.exceptions.transaction_exception import (
     UserHasNoPlateNumberSetException, HasExistingReservationException
 )
+from app.schema.common_schema_validation import PaginationQuerySchema
 from app.schema.response_schema import ApiResponse
 from app.schema.transaction_validation import (
-    CancelReservationSchema, ReservationCreationSchema, TransactionFormDetailsSchema,
-    ViewTransactionSchemaSchema
+    AnySlotReservationCreationSchema, CancelReservationSchema, ReservationCreationSchema,
+    TransactionFormDetailsSchema, ViewTransactionSchemaSchema
 )
 from app.services.transaction_service import TransactionService
 from app.utils.error_handlers.qr_code_error_handlers import (
     handle_invalid_qr_content, handle_invalid_transaction_status
 )
+from app.utils.error_handlers.establishment_error_handlers import (
+    handle_establishment_does_not_exist
+)
+from app.utils.error_handlers.slot_lookup_error_handlers import (
+    handle_no_slots_found_in_the_given_establishment, handle_slot_not_found, handle_slot_taken
+)
 from app.utils.error_handlers.transaction_error_handlers import (
     handle_user_has_no_plate_number_set, handle_has_existing_reservation,
 )
@@ -62,6 +73,7 @@ class CreateReservation(MethodView):
             201: "Reservation created successfully.",
             400: "Bad Request",
             401: "Unauthorized",
+            404: "Not Found",
         },
     )
     def post(self, reservation_data, user_id):
@@ -72,6 +84,37 @@ class CreateReservation(MethodView):
         return set_response(201, {"message": "Reservation created successfully."})
 
 
+@transactions_blp.route("/create/any-slot")
+class CreateAnySlotReservation(MethodView):
+    @jwt_required(False)
+    @user_role_and_user_id_required()
+    @transactions_blp.arguments(AnySlotReservationCreationSchema)
+    @transactions_blp.response(201, ApiResponse)
+    @transactions_blp.doc(
+        description=(
+            "Reserve the best open slot of an establishment for a vehicle type, "
+            "nearest to the preferred floor."
+        ),
+        responses={
+            201: "Reservation created successfully.",
+            400: "Bad Request",
+            401: "Unauthorized",
+            404: "No open slot is available.",
+        },
+    )
+    def post(self, reservation_data, user_id):
+        reservation_data.update({"user_id": user_id})
+        reservation = TransactionService.reserve_any_slot(reservation_data)
+        return set_response(
+            201,
+            {
+                "code": "success",
+                "message": "Reservation created successfully.",
+                "data": reservation,
+            },
+        )
+
+
 @transactions_blp.route("/cancel")
 class CancelReservation(MethodView):
 
@@ -140,6 +183,7 @@ class TransactionOverview(MethodView):
 
 @transactions_blp.route("/all")
 class GetAllUserTransaction(MethodView):
+    @transactions_blp.arguments(PaginationQuerySchema, location="query")
     @jwt_required(False)
     @user_role_and_user_id_required()
     @transactions_blp.response(200, ApiResponse)
@@ -152,10 +196,17 @@ class GetAllUserTransaction(MethodView):
             404: "Not Found",
         },
     )
-    def get(self, user_id):
+    def get(self, query, user_id):
         transaction_service = TransactionService()
-        transactions = transaction_service.get_all_user_transactions(user_id)
-        return set_response(200, {"code": "success", "transactions": transactions})
+        page = transaction_service.get_all_user_transactions(user_id, query)
+        return set_response(
+            200,
+            {
+                "code": "success",
+                "transactions": page.get("transactions"),
+                "next_cursor": page.get("next_cursor"),
+            },
+        )
 
 
 transactions_blp.register_error_handler(InvalidQRContent, handle_invalid_qr_content)
@@ -168,3 +219,11 @@ transactions_blp.register_error_handler(
 transactions_blp.register_error_handler(
     HasExistingReservationException, handle_has_existing_reservation
 )
+transactions_blp.register_error_handler(SlotNotFound, handle_slot_not_found)
+transactions_blp.register_error_handler(SlotStatusTaken, handle_slot_taken)
+transactions_blp.register_error_handler(
+    NoSlotsFoundInTheGivenEstablishment, handle_no_slots_found_in_the_given_establishment
+)
+transactions_blp.register_error_handler(
+    EstablishmentDoesNotExist, handle_establishment_does_not_exist
+)
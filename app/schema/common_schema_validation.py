@@ -2,7 +2,9 @@
 
 # pylint: disable=R0801
 
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, fields, validate, post_load, ValidationError
+
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
 
 
 class EstablishmentCommonValidationSchema(Schema):
@@ -20,6 +22,28 @@ class SlotCommonValidationSchema(Schema):
     slot_uuid = fields.Str(required=True)
 
 
+class PaginationQuerySchema(Schema):
+    """
+    Common validation schema for paginated lists. The cursor returned as next_cursor by
+    a page is decoded into the sort key the next page starts after.
+    """
+    limit = fields.Int(
+        load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE)
+    )
+    cursor = fields.Str(required=False)
+
+    @post_load
+    def decode_cursor(self, in_data, **kwargs):  # pylint: disable=unused-argument
+        """Decode the cursor into the sort key it points after."""
+        cursor = in_data.pop("cursor", None)
+        if cursor is not None:
+            try:
+                in_data["after"] = decode_cursor(cursor)
+            except ValueError as e:
+                raise ValidationError("Invalid cursor.", "cursor") from e
+        return in_data
+
+
 class UserUpdateProfileSchema(Schema):
     """ Schema for updating user profile. """
     first_name = fields.Str(required=True)
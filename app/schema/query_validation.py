@@ -1,9 +1,9 @@
 """ Wraps all query related to slots and establishments, and their validations. """
 
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
 
 from app.schema.common_schema_validation import (
-    EstablishmentCommonValidationSchema, SlotCommonValidationSchema
+    EstablishmentCommonValidationSchema, SlotCommonValidationSchema, PaginationQuerySchema
 )
 
 class EstablishmentQueryValidationSchema(EstablishmentCommonValidationSchema):
@@ -23,8 +23,54 @@ class SlotCodeValidationSchemaQuerySchema(SlotCommonValidationSchema):
     """Slot code validation query schema."""
 
 
-class EstablishmentQuerySchema(Schema):
+class EstablishmentQuerySchema(PaginationQuerySchema):
     """Validation schema for establishment query parameters."""
-    user_longitude = fields.Float(required=False)
-    user_latitude = fields.Float(required=False)
+    user_longitude = fields.Float(required=False, validate=validate.Range(min=-180, max=180))
+    user_latitude = fields.Float(required=False, validate=validate.Range(min=-90, max=90))
     establishment_name = fields.Str(required=False)
+    name_similarity = fields.Float(required=False, validate=validate.Range(min=0, max=1))
+    radius_km = fields.Float(
+        required=False, validate=validate.Range(min=0, max=100, min_inclusive=False)
+    )
+    slot_features = fields.List(fields.Str(
+        validate=validate.OneOf(["standard", "covered", "vip", "disabled", "ev_charging"])
+    ), required=False)
+    vehicle_size = fields.Str(
+        required=False, validate=validate.OneOf(["SMALL", "MEDIUM", "LARGE"])
+    )
+    is_premium = fields.Bool(required=False)
+    min_rate = fields.Float(required=False, validate=validate.Range(min=0))
+    max_rate = fields.Float(required=False, validate=validate.Range(min=0))
+    rate_type = fields.Str(
+        required=False, validate=validate.OneOf(["hourly", "daily", "monthly"])
+    )
+    space_type = fields.Str(
+        required=False, validate=validate.OneOf(["indoor", "outdoor", "covered", "uncovered"])
+    )
+    open_now = fields.Bool(required=False)
+    open_at = fields.DateTime(required=False)
+    facets = fields.Bool(load_default=False)
+
+    @validates_schema
+    def validate_radius(self, data, **kwargs):  # pylint: disable=unused-argument
+        """A radius is measured from the user's location, so it needs one."""
+        if "radius_km" in data and (
+            data.get("user_longitude") is None or data.get("user_latitude") is None
+        ):
+            raise ValidationError(
+                "user_longitude and user_latitude are required with radius_km.", "radius_km"
+            )
+
+    @validates_schema
+    def validate_rates(self, data, **kwargs):  # pylint: disable=unused-argument
+        """The rate bounds must not be crossed."""
+        if data.get("min_rate") is not None and data.get("max_rate") is not None and (
+            data["min_rate"] > data["max_rate"]
+        ):
+            raise ValidationError("min_rate must not be greater than max_rate.", "min_rate")
+
+
+class EstablishmentSuggestQuerySchema(Schema):
+    """Validation schema for establishment suggestion query parameters."""
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=20))
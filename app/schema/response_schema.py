@@ -10,6 +10,27 @@ class ApiResponse(Schema):
     message = fields.Str(required=True)
 
 
+class SearchFacetsSchema(Schema):
+    """This class contains the schema for the facet counts of an establishment search."""
+    space_type = fields.Dict(keys=fields.Str(), values=fields.Int(), required=True)
+    slot_features = fields.Dict(keys=fields.Str(), values=fields.Int(), required=True)
+    vehicle_size = fields.Dict(keys=fields.Str(), values=fields.Int(), required=True)
+    is_premium = fields.Dict(keys=fields.Str(), values=fields.Int(), required=True)
+
+
 class EstablishmentResponseSchema(ApiResponse):
     """This class contains the schema for the establishment response."""
     establishments = fields.List(fields.Dict(), required=True)
+    next_cursor = fields.Str(allow_none=True)
+    facets = fields.Nested(SearchFacetsSchema, allow_none=True)
+
+
+class EstablishmentSuggestionSchema(Schema):
+    """This class contains the schema for an establishment suggestion."""
+    uuid = fields.Str(required=True)
+    name = fields.Str(required=True)
+
+
+class SuggestionResponseSchema(ApiResponse):
+    """This class contains the schema for the establishment suggestion response."""
+    suggestions = fields.List(fields.Nested(EstablishmentSuggestionSchema), required=True)
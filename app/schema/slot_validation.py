@@ -37,11 +37,16 @@ class CreateSlotParkingManagerSchema(SlotCodeValidationQuerySchema):
     )
     is_active = fields.Boolean(required=False, missing=True)
     slot_multiplier = fields.Decimal(
-        required=True, validate=validate.Range(min=0, max=999999)
+        required=True, validate=validate.Range(min=0, max=999999, min_inclusive=False)
     )
-    floor_level = fields.Integer(required=True, validate=validate.Range(min=0, max=99))
+    floor_level = fields.Integer(required=True, validate=validate.Range(min=1, max=99))
     base_rate = fields.Decimal(required=True, validate=validate.Range(min=0, max=999999))
     is_premium = fields.Boolean(required=True)
     slot_features = fields.Str(required=False, missing="standard", validate=validate.OneOf(
         ['standard', 'covered', "vip", "disabled", "ev_charging"]
     ))
+
+
+class ImportSlotsSchema(Schema):
+    """Validation schema for a JSON bulk slot import."""
+    slots = fields.List(fields.Raw(), required=True, validate=validate.Length(min=1))
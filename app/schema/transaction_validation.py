@@ -4,7 +4,7 @@ from marshmallow import Schema, fields, validate, post_load
 
 from app.schema.common_schema_validation import (
     TransactionCommonValidationSchema, EstablishmentCommonValidationSchema,
-    SlotCommonValidationSchema
+    SlotCommonValidationSchema, PaginationQuerySchema
 )
 
 
@@ -16,8 +16,8 @@ class ViewTransactionSchemaSchema(TransactionCommonValidationSchema):
     """Schema for the transaction view."""
 
 
-class ReservationCreationSchema(SlotCommonValidationSchema):
-    """Schema for the reservation creation."""
+class ReservationDetailsSchema(Schema):
+    """Schema for the details shared by every reservation creation."""
     duration = fields.Int(required=True)
     duration_type = fields.Str(
         required=True, validate=validate.OneOf(['monthly', 'daily', 'hourly'])
@@ -30,6 +30,25 @@ class ReservationCreationSchema(SlotCommonValidationSchema):
         return in_data
 
 
+class ReservationCreationSchema(SlotCommonValidationSchema, ReservationDetailsSchema):
+    """Schema for the reservation creation."""
+
+
+class AnySlotReservationCreationSchema(
+    EstablishmentCommonValidationSchema, ReservationDetailsSchema
+):
+    """
+    Schema for reserving the best open slot of an establishment. The premium flag and the
+    features are requirements, the floor level is a preference.
+    """
+    vehicle_type_id = fields.Int(required=True)
+    floor_level = fields.Int(required=False, validate=validate.Range(min=-99, max=99))
+    is_premium = fields.Bool(required=False)
+    slot_features = fields.Str(required=False, validate=validate.OneOf(
+        ['standard', 'covered', "vip", "disabled", "ev_charging"]
+    ))
+
+
 class TransactionFormDetailsSchema(EstablishmentCommonValidationSchema):
     """Schema for the transaction form details."""
     slot_uuid = fields.Str(required=True)
@@ -42,3 +61,14 @@ class ValidateEntrySchema(Schema):
 class ValidateTransaction(ValidateEntrySchema):
     """Validation schema for transaction validation."""
     payment_status = fields.Str(required=True, validate=validate.OneOf(['pending', 'paid']))
+
+
+
+class EstablishmentTransactionQuerySchema(PaginationQuerySchema):
+    """Validation schema for the establishment transaction listing."""
+    status = fields.Str(
+        required=False,
+        validate=validate.OneOf(["reserved", "active", "completed", "cancelled"])
+    )
+    start_date = fields.DateTime(required=False)
+    end_date = fields.DateTime(required=False)
@@ -11,6 +11,7 @@ from app.models.company_profile import CompanyProfileRepository
 from app.models.parking_establishment import ParkingEstablishmentRepository
 from app.models.user import UserRepository
 from app.tasks import send_mail
+from app.utils.pagination import DEFAULT_PAGE_SIZE
 
 
 # pylint: disable=C0116
@@ -39,9 +40,9 @@ class AdminService:
         """Approve a parking applicant."""
         return ParkingManagerOperations.approve_parking_applicant(establishment_uuid)
     @staticmethod
-    def get_all_users() -> list[dict]:
-        """Get all users."""
-        return UserManagementService.get_users()
+    def get_all_users(query: dict) -> dict:
+        """Get a page of the users."""
+        return UserManagementService.get_users(query)
 
 
 
@@ -122,6 +123,9 @@ class UserManagementService:  # pylint: disable=too-few-public-methods
         """Get user information."""
         return UserRepository.get_user(user_id=user_id)
     @staticmethod
-    def get_users() -> list[dict]:
-        """Get all users."""
-        return UserRepository.get_all_users()
+    def get_users(query: dict) -> dict:
+        """Get a page of the users."""
+        users, next_cursor = UserRepository.get_users_page(
+            after=query.get("after"), limit=query.get("limit", DEFAULT_PAGE_SIZE)
+        )
+        return {"users": users, "next_cursor": next_cursor}
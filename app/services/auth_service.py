@@ -5,6 +5,7 @@
 from datetime import datetime, timedelta
 from os import path
 from tempfile import NamedTemporaryFile
+from uuid import uuid4
 
 import pytz
 from flask import render_template, current_app
@@ -23,6 +24,7 @@ from app.models.pricing_plan import PricingPlanRepository
 from app.models.user import AuthOperations, OTPOperations, UserRepository
 from app.tasks import send_mail
 from app.utils.bucket import R2TransactionalUpload, UploadFile
+from app.utils.db import transaction_scope
 from app.utils.security import generate_otp, generate_token, get_random_string
 
 
@@ -149,41 +151,69 @@ class UserRegistration:  # pylint: disable=R0903
             "verification_expiry": now + timedelta(days=7),
             "created_at": now,
         })
-        user_id = UserRepository.create_user(user_data)
-        print(user_id)
-        if sign_up_data.get("user", {}).get("role") == "parking_manager":
-            company_profile = sign_up_data.get("company_profile", {})
-            company_profile.update({"user_id": user_id, "created_at": now, "updated_at": now})
-            company_profile_id = self.add_new_company_profile(company_profile)
-
-            address = sign_up_data.get("address", {})
-            address.update({"profile_id": company_profile_id, "created_at": now, "updated_at": now})
-            self.add_new_address(address)
-
-            parking_establishment = sign_up_data.get("parking_establishment", {})
-            parking_establishment.update({
-                "profile_id": company_profile_id, "created_at": now, "updated_at": now
-            })
-            parking_establishment_id = self.add_new_parking_establishment(parking_establishment)
+        is_parking_manager = sign_up_data.get("user", {}).get("role") == "parking_manager"
+        establishment_uuid, documents = uuid4(), []
+        if is_parking_manager:
+            # Uploaded before the transaction opens, so it is not held open by the upload.
+            documents = self.upload_establishment_documents(
+                establishment_uuid, sign_up_data.get("documents", [])
+            )
+        try:
+            with transaction_scope():
+                user_id = UserRepository.create_user(user_data)
+                if is_parking_manager:
+                    self.add_parking_manager_records(
+                        user_id, sign_up_data, now, establishment_uuid=establishment_uuid,
+                        documents=documents,
+                    )
+        except Exception:
+            if documents:
+                R2TransactionalUpload().delete(
+                    [document["bucket_path"] for document in documents]
+                )
+            raise
 
-            pricing_plan = sign_up_data.get("pricing_plan", {})
-            self.add_pricing_plan(parking_establishment_id, pricing_plan)
+        return send_mail(
+                sign_up_data.get("user", {}).get("email"), template, "Welcome to EZ Parking"
+            )
 
-            payment_method = sign_up_data.get("payment_method", {})
-            payment_method.update({
-                "establishment_id": parking_establishment_id, "created_at": now, "updated_at": now
-            })
-            self.add_payment_method(payment_method)
+    def add_parking_manager_records(  # pylint: disable=too-many-arguments
+        self, user_id: int, sign_up_data: dict, now: datetime, *, establishment_uuid,
+        documents: list[dict],
+    ):
+        """
+        Add the company profile, establishment and related records of a new parking
+        manager, and the records of its documents already uploaded. Runs inside the
+        registration transaction, so a failure leaves no partial registration behind.
+        """
+        company_profile = sign_up_data.get("company_profile", {})
+        company_profile.update({"user_id": user_id, "created_at": now, "updated_at": now})
+        company_profile_id = self.add_new_company_profile(company_profile)
+
+        address = sign_up_data.get("address", {})
+        address.update({"profile_id": company_profile_id, "created_at": now, "updated_at": now})
+        self.add_new_address(address)
+
+        parking_establishment = sign_up_data.get("parking_establishment", {})
+        parking_establishment.update({
+            "uuid": establishment_uuid, "profile_id": company_profile_id, "created_at": now,
+            "updated_at": now,
+        })
+        parking_establishment_id = self.add_new_parking_establishment(parking_establishment)
 
-            operating_hours = sign_up_data.get("operating_hour", {})
-            self.add_operating_hours(parking_establishment_id, operating_hours)
+        pricing_plan = sign_up_data.get("pricing_plan", {})
+        self.add_pricing_plan(parking_establishment_id, pricing_plan)
 
-            documents = sign_up_data.get("documents", [])
-            self.add_establishment_documents(parking_establishment_id, documents)
+        payment_method = sign_up_data.get("payment_method", {})
+        payment_method.update({
+            "establishment_id": parking_establishment_id, "created_at": now, "updated_at": now
+        })
+        self.add_payment_method(payment_method)
 
-        return send_mail(
-                sign_up_data.get("user", {}).get("email"), template, "Welcome to EZ Parking"
-            )
+        operating_hours = sign_up_data.get("operating_hour", {})
+        self.add_operating_hours(parking_establishment_id, operating_hours)
+
+        self.add_establishment_documents(parking_establishment_id, documents)
 
     @staticmethod
     def add_new_address(address_data: dict):
@@ -230,15 +260,20 @@ class UserRegistration:  # pylint: disable=R0903
         """Add payment methods."""
         return PaymentMethodRepository.create_payment_method(payment_method_data)
     @staticmethod
-    def add_establishment_documents(
-         establishment_id: int, documents: list
-    ):  # pylint: disable=too-many-locals
-        """Add establishment documents."""
+    def upload_establishment_documents(  # pylint: disable=too-many-locals
+         establishment_uuid, documents: list
+    ) -> list[dict]:
+        """
+        Upload the files of the documents of a new establishment, all of them or none.
+
+        Returns:
+            list: The records of the uploaded documents, without their establishment_id.
+        """
         r2_client = R2TransactionalUpload()
         upload_files = []
+        documents_data = []
 
         for doc in documents:
-            print(doc)
             file = doc['file']
             doc_type = doc['type'].lower()
 
@@ -251,7 +286,7 @@ class UserRegistration:  # pylint: disable=R0903
                 file.save(temp_file.name)
                 upload_files.append(UploadFile(
                     file_path=temp_file.name,
-                    destination_key=f"establishments/{establishment_id}/{unique_filename}",
+                    destination_key=f"establishments/{establishment_uuid}/{unique_filename}",
                     content_type=file.content_type
                 ))
 
@@ -267,21 +302,27 @@ class UserRegistration:  # pylint: disable=R0903
             if doc_type not in doc_type_map:
                 raise ValueError(f"Invalid document type: {doc_type}")
 
-            doc_data = {
-                'establishment_id': establishment_id,
+            documents_data.append({
                 'document_type': doc_type_map[doc_type].lower(),
-                'bucket_path': f"establishments/{establishment_id}/{unique_filename}",
+                'bucket_path': f"establishments/{establishment_uuid}/{unique_filename}",
                 'filename': file.filename,
                 'mime_type': file.content_type,
                 'file_size': file.content_length if hasattr(file, 'content_length') else 0,
                 'status': 'pending',
                 'uploaded_at': datetime.now(pytz.timezone('Asia/Manila'))
-            }
-            EstablishmentDocumentRepository.create_establishment_document(doc_data)
+            })
 
-        success, message, details = r2_client.upload(upload_files)  # pylint: disable=W0612
+        success, message, *_ = r2_client.upload(upload_files)
         if not success:
             raise Exception(f"Failed to upload documents: {message}")  # pylint: disable=W0719
+        return documents_data
+
+    @staticmethod
+    def add_establishment_documents(establishment_id: int, documents: list[dict]):
+        """Add the records of uploaded establishment documents with one bulk insert."""
+        EstablishmentDocumentRepository.create_establishment_documents([
+            {**document, 'establishment_id': establishment_id} for document in documents
+        ])
 
 class EmailVerification:  # pylint: disable=R0903
     """Email Verification Service"""
@@ -2,18 +2,19 @@
 
 # pylint: disable=too-few-public-methods
 
-from typing import overload, Union
+from json import dumps
+from typing import Iterator, overload, Union
 
-from app.models.address import AddressRepository
-from app.models.company_profile import CompanyProfileRepository
-from app.models.establishment_document import EstablishmentDocumentRepository
-from app.models.operating_hour import OperatingHoursRepository
+from flask import current_app
+
+from app.exceptions.establishment_lookup_exceptions import EstablishmentDoesNotExist
 from app.models.parking_establishment import (
-    ParkingEstablishmentRepository
+    ESTABLISHMENT_INDEX, ESTABLISHMENT_NAME_INDEX, ParkingEstablishmentRepository, SearchFilters,
 )
 from app.models.parking_slot import ParkingSlotRepository
-from app.models.payment_method import PaymentMethodRepository
-from app.models.pricing_plan import PricingPlanRepository
+from app.utils import slot_status_map
+from app.utils.pagination import DEFAULT_PAGE_SIZE, encode_cursor
+from app.utils.slot_events import stream_events
 
 
 class EstablishmentService:
@@ -23,9 +24,28 @@ class EstablishmentService:
         """Get parking establishment information by UUID."""
         return UserQueryService.get_establishment(establishment_uuid)
 
+    @staticmethod
+    def stream_slot_status(establishment_uuid: str) -> Iterator[str]:
+        """Stream the slot status changes of an establishment as server-sent events."""
+        establishment_id = ParkingEstablishmentRepository.get_establishment(
+            establishment_uuid
+        ).get("establishment_id")
+        if establishment_id is None:
+            raise EstablishmentDoesNotExist("Establishment does not exist.")
+        return stream_events(
+            establishment_id,
+            lambda: dumps({"slots": ParkingSlotRepository.get_slot_grid(establishment_id)}),
+            current_app.config["SLOT_EVENTS_HEARTBEAT_SECONDS"],
+        )
+
+    @staticmethod
+    def suggest_establishments(query_dict: dict) -> list[dict]:
+        """Suggest the establishments whose name or nearby landmarks start with a text."""
+        return ESTABLISHMENT_NAME_INDEX.lookup(query_dict.get("q"), query_dict.get("limit"))
+
     @classmethod
-    def get_establishments(cls, query_dict: dict) -> list:
-        """Get establishments with optional filtering and sorting"""
+    def get_establishments(cls, query_dict: dict) -> dict:
+        """Get a page of establishments with optional filtering and sorting"""
         return GetEstablishmentService.get_establishments(query_dict=query_dict)
 
     @staticmethod
@@ -52,47 +72,73 @@ class GetEstablishmentService:
     """Class for operations related to getting parking establishment."""
 
     @classmethod
-    def get_establishments(cls, query_dict: dict) -> list:
-        """Get establishments with optional filtering and sorting"""
-        return ParkingEstablishmentRepository.get_establishments(
+    def get_establishments(cls, query_dict: dict) -> dict:
+        """Get a page of establishments with optional filtering and sorting"""
+        filters = SearchFilters.from_query(query_dict)
+        located = (
+            query_dict.get("user_longitude") is not None
+            and query_dict.get("user_latitude") is not None
+        )
+        if (
+            current_app.config.get("ESTABLISHMENT_SPATIAL_INDEX")
+            and located
+            and query_dict.get("establishment_name") is None
+            and filters.is_empty()
+            and not query_dict.get("facets")
+        ):
+            return cls.get_nearest_establishments(query_dict)
+        establishments, next_cursor, facets = ParkingEstablishmentRepository.search_establishments(
             establishment_name=query_dict.get("establishment_name"),
             user_longitude=query_dict.get("user_longitude"),
-            user_latitude=query_dict.get("user_latitude")
+            user_latitude=query_dict.get("user_latitude"),
+            after=query_dict.get("after"),
+            limit=query_dict.get("limit", DEFAULT_PAGE_SIZE),
+            radius_km=query_dict.get("radius_km"),
+            name_similarity=query_dict.get("name_similarity"),
+            filters=filters,
+            facets=query_dict.get("facets", False),
         )
+        return {"establishments": establishments, "next_cursor": next_cursor, "facets": facets}
+
+    @classmethod
+    def get_nearest_establishments(cls, query_dict: dict) -> dict:
+        """
+        Get a page of the verified establishments nearest to the user, found by the
+        in-process spatial index and read with one IN query.
+        """
+        limit = query_dict.get("limit", DEFAULT_PAGE_SIZE)
+        nearest = ESTABLISHMENT_INDEX.nearest(
+            query_dict["user_latitude"], query_dict["user_longitude"], limit + 1,
+            radius_km=query_dict.get("radius_km"), after=query_dict.get("after"),
+        )
+        next_cursor = None
+        if len(nearest) > limit:
+            nearest = nearest[:limit]
+            establishment_id, distance = nearest[-1]
+            next_cursor = encode_cursor((distance, establishment_id))
+        return {
+            "establishments": ParkingEstablishmentRepository.get_nearest_establishments(nearest),
+            "next_cursor": next_cursor,
+        }
 
     @classmethod
     def get_establishment(cls, establishment_uuid: str):
         """Get parking establishment information."""
-        parking_establishment_details = ParkingEstablishmentRepository.get_establishment(
-            establishment_uuid=establishment_uuid
-        )
-        parking_establishment_id = parking_establishment_details['establishment_id']
-        parking_establishment_operating_hours = OperatingHoursRepository.get_operating_hours(
-            establishment_id=parking_establishment_id
-        )
-        parking_establishment_slot = ParkingSlotRepository.get_slots(
-            establishment_id=parking_establishment_id
-        )
-        parking_establishment_payment_methods = PaymentMethodRepository.get_payment_methods(
-            establishment_id=parking_establishment_id
-        )
-        parking_establishment_pricing_plans = PricingPlanRepository.get_pricing_plans(
-            establishment_id=parking_establishment_id
-        )
-        company_details = CompanyProfileRepository.get_company_profile(
-            profile_id=parking_establishment_details['profile_id']
-        )
-        establishment_documents = EstablishmentDocumentRepository.get_establishment_documents(
-            establishment_id=parking_establishment_id
+        details = ParkingEstablishmentRepository.get_establishment_details(
+            establishment_uuid=establishment_uuid,
+            include=(
+                "operating_hours", "slots", "payment_methods", "pricing_plans",
+                "company_profile", "documents",
+            ),
         )
         return {
-            "parking_establishment": parking_establishment_details,
-            "operating_hours": parking_establishment_operating_hours,
-            "slots": parking_establishment_slot,
-            "payment_methods": parking_establishment_payment_methods,
-            "pricing_plans": parking_establishment_pricing_plans,
-            "company_profile": company_details,
-            "establishment_documents": establishment_documents
+            "parking_establishment": details["establishment"],
+            "operating_hours": details["operating_hours"],
+            "slots": details["slots"],
+            "payment_methods": details["payment_methods"],
+            "pricing_plans": details["pricing_plans"],
+            "company_profile": details["company_profile"],
+            "establishment_documents": details["documents"]
         }
 
 
@@ -101,32 +147,21 @@ class AdministrativeService:
     @classmethod
     def get_establishment(cls, manager_id: int):
         """Get parking establishment information."""
-        company_profile = CompanyProfileRepository.get_company_profile(user_id=manager_id)
-        company_profile_id = company_profile.get("profile_id")
-        address = AddressRepository.get_address(profile_id=company_profile_id)
-        parking_establishment = ParkingEstablishmentRepository.get_establishment(
-            profile_id=company_profile_id
-        )
-        establishment_document = EstablishmentDocumentRepository.get_establishment_documents(
-            establishment_id=parking_establishment.get("establishment_id")
-        )
-        operating_hour = OperatingHoursRepository.get_operating_hours(
-            parking_establishment.get("establishment_id")
-        )
-        payment_method = PaymentMethodRepository.get_payment_methods(
-            parking_establishment.get("establishment_id")
-        )
-        pricing_plan = PricingPlanRepository.get_pricing_plans(
-            parking_establishment.get("establishment_id")
+        details = ParkingEstablishmentRepository.get_establishment_details(
+            manager_id=manager_id,
+            include=(
+                "company_profile", "address", "documents", "operating_hours",
+                "payment_methods", "pricing_plans",
+            ),
         )
         return {
-            "company_profile": company_profile,
-            "address": address,
-            "parking_establishment": parking_establishment,
-            "establishment_document": establishment_document,
-            "operating_hour": operating_hour,
-            "payment_method": payment_method,
-            "pricing_plan": pricing_plan,
+            "company_profile": details["company_profile"],
+            "address": details["address"],
+            "parking_establishment": details["establishment"],
+            "establishment_document": details["documents"],
+            "operating_hour": details["operating_hours"],
+            "payment_method": details["payment_methods"],
+            "pricing_plan": details["pricing_plans"],
         }
 
 
@@ -135,22 +170,15 @@ class UserQueryService:
     @staticmethod
     def get_establishment(establishment_uuid: str):
         """Get parking establishment information."""
-        establishment_details = ParkingEstablishmentRepository.get_establishment(
-            establishment_uuid=establishment_uuid
-        )
-        establishment_id = establishment_details.get("establishment_id")
-        operating_hours = OperatingHoursRepository.get_operating_hours(
-            establishment_id=establishment_id
-        )
-        slots = ParkingSlotRepository.get_slots(establishment_id=establishment_id)
-        payment_methods = PaymentMethodRepository.get_payment_methods(
-            establishment_id=establishment_id
-        )
-        pricing_plans = PricingPlanRepository.get_pricing_plans(establishment_id=establishment_id)
-        return {
-            "establishment": establishment_details,
-            "operating_hours": operating_hours,
-            "slots": slots,
-            "payment_methods": payment_methods,
-            "pricing_plans": pricing_plans
-        }
+        if not slot_status_map.is_enabled():
+            return ParkingEstablishmentRepository.get_establishment_details(
+                establishment_uuid=establishment_uuid
+            )
+        details = ParkingEstablishmentRepository.get_establishment_details(
+            establishment_uuid=establishment_uuid,
+            include=("operating_hours", "payment_methods", "pricing_plans"),
+        )
+        details["slots"] = ParkingSlotRepository.get_slot_grid(
+            details["establishment"]["establishment_id"]
+        )
+        return details
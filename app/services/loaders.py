@@ -0,0 +1,35 @@
+"""
+    Per-request batching loaders for the lookups by id the services repeat while building
+    a response. Loaders live on flask.g, so every lookup in a request shares one cache.
+"""
+
+from flask import g, has_request_context
+
+from app.models.company_profile import CompanyProfileRepository
+from app.models.parking_establishment import ParkingEstablishmentRepository
+from app.models.parking_slot import ParkingSlotRepository
+from app.models.user import UserRepository
+from app.utils.batch_loader import BatchLoader
+
+
+class Loaders:  # pylint: disable=too-few-public-methods
+    """The batching loaders available to the services."""
+
+    def __init__(self):
+        self.users = BatchLoader(UserRepository.get_users, "user_id")
+        self.slots = BatchLoader(ParkingSlotRepository.get_slots_by_ids, "slot_id")
+        self.establishments = BatchLoader(
+            ParkingEstablishmentRepository.get_establishments_by_ids, "establishment_id"
+        )
+        self.company_profiles = BatchLoader(
+            CompanyProfileRepository.get_company_profiles, "profile_id"
+        )
+
+
+def get_loaders() -> Loaders:
+    """Return the loaders of the current request, or fresh loaders outside a request."""
+    if not has_request_context():
+        return Loaders()
+    if "loaders" not in g:
+        g.loaders = Loaders()
+    return g.loaders
@@ -17,6 +17,10 @@ class OperatingHourService:
     def update_operating_hours(manager_id, operating_hours):
         pass
 
+    @staticmethod
+    def rebuild_schedules():
+        return OperatingHoursRepository.refresh_schedules()
+
 
 class GetOperatingHoursService:
     """Service class for getting operating hours."""
@@ -1,14 +1,23 @@
 """" Wraps the services that the parking manager can call """
 
+from csv import DictReader, Error as CSVError
 from datetime import datetime
+from io import StringIO
+from json import JSONDecodeError, loads
 
 import pytz
+from marshmallow import ValidationError
 
 from app.exceptions.slot_lookup_exceptions import SlotAlreadyExists
 from app.models.audit_log import AuditLogRepository
 from app.models.company_profile import CompanyProfileRepository
 from app.models.parking_establishment import ParkingEstablishmentRepository
-from app.models.parking_slot import ParkingSlotRepository
+from app.models.parking_slot import ParkingSlotRepository, SlotStatus
+from app.models.vehicle_type import VehicleTypeRepository
+from app.schema.slot_validation import CreateSlotParkingManagerSchema
+from app.utils.pagination import DEFAULT_PAGE_SIZE
+
+MAX_IMPORTED_SLOTS = 5000
 
 
 class ParkingManagerService:  # pylint: disable=R0903
@@ -18,27 +27,39 @@ class ParkingManagerService:  # pylint: disable=R0903
         """ Get parking establishment information """
         # return ParkingManagerOperations.get_establishment_info(manager_id)
     @staticmethod
-    def get_all_slots(manager_id: int):
-        """ Get all slots of the establishment """
-        return SlotOperation.get_all_slots(manager_id)
+    def get_all_slots(manager_id: int, query: dict):
+        """ Get a page of the slots of the establishment """
+        return SlotOperation.get_all_slots(manager_id, query)
     @staticmethod
     def create_slot(new_slot_data: dict, user_id: int, ip_address):
         """ Create a new slot """
         return SlotOperation.create_slot(user_id, new_slot_data, ip_address)
+    @staticmethod
+    def read_slot_import_file(file) -> list:
+        """ Read the rows of a CSV or JSON slot import file """
+        return SlotImportOperation.read_file(file)
+    @staticmethod
+    def import_slots(rows: list, user_id: int, ip_address):
+        """ Create the slots of an import in bulk """
+        return SlotImportOperation.import_slots(user_id, rows, ip_address)
 
 
 class SlotOperation:
     """ Wraps all the slot operations """
     @staticmethod
-    def get_all_slots(manager_id: int):
-        """ Get all slots of the establishment """
+    def get_all_slots(manager_id: int, query: dict):
+        """ Get a page of the slots of the establishment """
         profile_id = CompanyProfileRepository.get_company_profile(
             user_id=manager_id
         ).get("profile_id")
         establishment_id = ParkingEstablishmentRepository.get_establishment(
             profile_id=profile_id
         ).get("establishment_id")
-        return ParkingSlotRepository.get_slots(establishment_id=establishment_id)
+        slots, next_cursor = ParkingSlotRepository.get_slots_page(
+            establishment_id, after=query.get("after"),
+            limit=query.get("limit", DEFAULT_PAGE_SIZE),
+        )
+        return {"slots": slots, "next_cursor": next_cursor}
     @classmethod
     def create_slot(cls, manager_id, data, ip_address):
         """ Create a new slot """
@@ -65,3 +86,99 @@ class SlotOperation:
             "performed_at": now,
             "ip_address": ip_address,
         })
+
+
+class SlotImportOperation:
+    """ Wraps the bulk slot import """
+    @staticmethod
+    def read_file(file) -> list:
+        """ Read the rows of a CSV or JSON slot import file """
+        try:
+            content = file.read().decode("utf-8-sig")
+            if file.mimetype == "application/json" or file.filename.lower().endswith(".json"):
+                data = loads(content)
+                return data.get("slots") if isinstance(data, dict) else data
+            return [
+                {
+                    key.strip(): value.strip() for key, value in row.items()
+                    if key is not None and isinstance(value, str) and value.strip()
+                }
+                for row in DictReader(StringIO(content))
+            ]
+        except (CSVError, JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValidationError("The import file could not be read.", "file") from e
+    @classmethod
+    def import_slots(cls, manager_id, rows, ip_address):
+        """
+        Validate every row of the import in one pass, insert the valid ones in bulk and
+        report the rejected ones by row number. Slot codes the establishment already uses
+        are rejected rather than overwritten.
+        """
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError("The import contains no slots.", "slots")
+        if len(rows) > MAX_IMPORTED_SLOTS:
+            raise ValidationError(
+                f"At most {MAX_IMPORTED_SLOTS} slots can be imported at once.", "slots"
+            )
+        now = datetime.now(pytz.timezone('Asia/Manila'))
+        profile_id = CompanyProfileRepository.get_company_profile(
+            user_id=manager_id
+        ).get("profile_id")
+        establishment_id = ParkingEstablishmentRepository.get_establishment(
+            profile_id=profile_id
+        ).get("establishment_id")
+        slots, errors = cls.validate_rows(rows)
+        for slot in slots.values():
+            slot.update({
+                "establishment_id": establishment_id,
+                "created_at": now,
+                "updated_at": now,
+            })
+        created = ParkingSlotRepository.create_slots(list(slots.values()))
+        errors.extend(
+            cls.row_error(row_number, slot.get("slot_code"), "slot_code", "Slot already exists.")
+            for row_number, slot in slots.items() if slot.get("slot_code") not in created
+        )
+        errors.sort(key=lambda error: error.get("row"))
+        AuditLogRepository.create_audit_log({
+            "action_type": "CREATE",
+            "performed_by": manager_id,
+            "details": f"Imported {len(created)} new slots, {len(errors)} rows rejected",
+            "performed_at": now,
+            "ip_address": ip_address,
+        })
+        return {"created": len(created), "rejected": len(errors), "errors": errors}
+    @classmethod
+    def validate_rows(cls, rows: list) -> tuple[dict, list]:
+        """ Return the valid slots by row number and the errors of the invalid rows """
+        schema = CreateSlotParkingManagerSchema()
+        slots, errors, slot_codes = {}, [], set()
+        for row_number, row in enumerate(rows, start=1):
+            slot_code = row.get("slot_code") if isinstance(row, dict) else None
+            try:
+                slot = schema.load(row)
+            except ValidationError as e:
+                errors.append({"row": row_number, "slot_code": slot_code, "errors": e.messages})
+                continue
+            if slot.get("slot_code") in slot_codes:
+                errors.append(cls.row_error(
+                    row_number, slot_code, "slot_code", "Duplicate slot code in the import."
+                ))
+                continue
+            slot_codes.add(slot.get("slot_code"))
+            slot.setdefault("slot_status", SlotStatus.open.value)
+            slots[row_number] = slot
+        vehicle_type_ids = VehicleTypeRepository.get_existing_vehicle_type_ids(
+            list({slot.get("vehicle_type_id") for slot in slots.values()})
+        )
+        for row_number, slot in list(slots.items()):
+            if slot.get("vehicle_type_id") not in vehicle_type_ids:
+                errors.append(cls.row_error(
+                    row_number, slot.get("slot_code"), "vehicle_type_id", "Vehicle type not found."
+                ))
+                del slots[row_number]
+        return slots, errors
+    @staticmethod
+    def row_error(row_number: int, slot_code, field: str, message: str) -> dict:
+        """ Return the error of a rejected import row """
+        return {"row": row_number, "slot_code": slot_code, "errors": {field: [message]}}
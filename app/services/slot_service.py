@@ -31,13 +31,17 @@ class ParkingSlotService:
     def update_slot(slot_data: dict):
         """Update a slot."""
         return UpdateSlotService.update_slot(slot_data)
+    @staticmethod
+    def reconcile_availability():
+        """Correct the slot availability counters that drifted from the slots."""
+        return ParkingSlotRepository.reconcile_availability()
 
 class GetSlotService:
     """Wraps the logic for getting the list of slots, calling the model layer classes."""
     @staticmethod
     def get_all_slots(establishment_uuid: str):  # pylint: disable=C0116
-        return ParkingSlotRepository.get_slots(
-            establishment_id=ParkingEstablishmentRepository.get_establishment(
+        return ParkingSlotRepository.get_slot_grid(
+            ParkingEstablishmentRepository.get_establishment(
             establishment_uuid
         ).get("establishment_id"))
     @staticmethod
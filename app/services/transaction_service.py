@@ -1,11 +1,15 @@
 """This module contains the services for the transaction operations."""
 
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
+from uuid import uuid4
 
 import pytz
 
 from app.exceptions.qr_code_exceptions import QRCodeError, InvalidQRContent
-from app.exceptions.slot_lookup_exceptions import SlotStatusTaken
+from app.exceptions.slot_lookup_exceptions import (
+    NoSlotsFoundInTheGivenEstablishment, SlotStatusTaken
+)
 from app.models.address import AddressRepository
 from app.models.company_profile import CompanyProfileRepository
 from app.models.operating_hour import OperatingHoursRepository
@@ -14,7 +18,9 @@ from app.models.parking_slot import ParkingSlotRepository, ParkingSlot
 from app.models.parking_transaction import ParkingTransactionRepository
 from app.models.payment_method import PaymentMethodRepository
 from app.models.pricing_plan import PricingPlanRepository
-from app.models.user import UserRepository
+from app.services.loaders import get_loaders
+from app.utils.db import transaction_scope
+from app.utils.pagination import DEFAULT_PAGE_SIZE
 from app.utils.qr_utils.generate_transaction_qr_code import QRCodeUtils
 
 
@@ -26,6 +32,16 @@ class TransactionService:  # pylint: disable=too-few-public-methods
         """Reserves the slot for a user."""
         return SlotActionsService.reserve_slot(reservation_data)
 
+    @staticmethod
+    def reserve_any_slot(reservation_data: dict):
+        """Reserves the best open slot of an establishment for a user."""
+        return SlotActionsService.reserve_any_slot(reservation_data)
+
+    @staticmethod
+    def expire_stale_reservations(grace_period_minutes: int, batch_size: int):
+        """Expires the reservations of no-shows and releases their slots."""
+        return ReservationExpiry.expire_stale_reservations(grace_period_minutes, batch_size)
+
     @staticmethod
     def verify_reservation_code(qr_content: str, payment_status: str):
         """Verifies the reservation code for a user."""
@@ -66,13 +82,13 @@ class TransactionService:  # pylint: disable=too-few-public-methods
             establishment_uuid, slot_uuid, user_id
         )
     @staticmethod
-    def get_all_user_transactions(user_id):
-        """Get all the transactions for a user."""
-        return Transaction.get_all_user_transactions(user_id)
+    def get_all_user_transactions(user_id, query: dict):
+        """Get a page of the transactions for a user."""
+        return Transaction.get_all_user_transactions(user_id, query)
     @classmethod
-    def get_establishment_transaction(cls, user_id):
-        """Get all the transactions for the establishment."""
-        return Transaction.get_establishment_transaction(user_id)
+    def get_establishment_transaction(cls, user_id, query: dict):
+        """Get a page of the transactions for the establishment."""
+        return Transaction.get_establishment_transaction(user_id, query)
     @classmethod
     def get_transaction(cls, transaction_uuid):
         """Get the transaction details."""
@@ -83,14 +99,53 @@ class SlotActionsService:  # pylint: disable=too-few-public-methods
 
     @staticmethod
     def reserve_slot(slot_reservation_data: dict):
-        """Reserves the slot for a user."""
+        """
+        Reserves the slot for a user. The slot is claimed only if it is still open and the
+        transaction is created in the same database transaction, so a slot can never be
+        reserved twice.
+        """
         now = datetime.now(pytz.timezone('Asia/Manila'))
         slot_uuid = slot_reservation_data.pop("slot_uuid")
-        slot_reservation_data.update({"slot_id": ParkingSlot.get_id(slot_uuid)})
-        slot_reservation_data.update({"created_at": now})
-        slot_reservation_data.update({"updated_at": now})
-        ParkingTransactionRepository.create_transaction(slot_reservation_data)
-        return ParkingSlotRepository.change_slot_status(slot_uuid=slot_uuid, new_status="reserved")
+        with transaction_scope():
+            slot_id = ParkingSlotRepository.claim_slot(slot_uuid, "reserved")
+            if slot_id is None:
+                # Raises SlotNotFound when the slot does not exist at all.
+                ParkingSlot.get_id(slot_uuid)
+                raise SlotStatusTaken("Slot is no longer available.")
+            slot_reservation_data.update({"slot_id": slot_id})
+            slot_reservation_data.update({"created_at": now})
+            slot_reservation_data.update({"updated_at": now})
+            return ParkingTransactionRepository.create_transaction(slot_reservation_data)
+
+    @staticmethod
+    def reserve_any_slot(reservation_data: dict):
+        """
+        Reserves the best open slot of an establishment for a user. The slot is claimed and
+        the transaction is created in the same database transaction.
+        """
+        now = datetime.now(pytz.timezone('Asia/Manila'))
+        establishment_id = ParkingEstablishmentRepository.get_establishment(
+            establishment_uuid=reservation_data.pop("establishment_uuid")
+        ).get("establishment_id")
+        with transaction_scope():
+            slot = ParkingSlotRepository.claim_open_slot(
+                establishment_id,
+                reservation_data.pop("vehicle_type_id"),
+                floor_level=reservation_data.pop("floor_level", None),
+                is_premium=reservation_data.pop("is_premium", None),
+                slot_features=reservation_data.pop("slot_features", None),
+            )
+            if not slot:
+                raise NoSlotsFoundInTheGivenEstablishment("No open slot is available.")
+            transaction_uuid = uuid4()
+            reservation_data.update({
+                "uuid": transaction_uuid,
+                "slot_id": slot.get("slot_id"),
+                "created_at": now,
+                "updated_at": now,
+            })
+            ParkingTransactionRepository.create_transaction(reservation_data)
+        return {"transaction_uuid": str(transaction_uuid), "slot": slot}
 
     @staticmethod
     def release_slot(slot_data):
@@ -108,27 +163,22 @@ class SlotActionsService:  # pylint: disable=too-few-public-methods
         return ParkingSlotRepository.change_slot_status(slot_id=slot_id, new_status="open")
 
     @staticmethod
-    def view_transaction(transaction_uuid: str):
+    def view_transaction(transaction_uuid: str):  # pylint: disable=too-many-locals
         """View the transaction for a user."""
+        loaders = get_loaders()
         transaction_data = ParkingTransactionRepository.get_transaction(
             transaction_uuid=transaction_uuid
         )
-        slot_info = ParkingSlotRepository.get_slot(
-            slot_id=transaction_data.get("slot_id")
-        )
-        establishment_info = ParkingEstablishmentRepository.get_establishment(
-            establishment_id=slot_info.get("establishment_id")
-        )
-        company_profile = CompanyProfileRepository.get_company_profile(
-            profile_id=establishment_info.get("profile_id")
-        )
-        owner_user_id = company_profile.get("user_id")
-        contact_number = UserRepository.get_user(user_id=owner_user_id).get("contact_number")
+        load_customer = loaders.users.defer(transaction_data.get("user_id"))
+        slot_info = loaders.slots.load(transaction_data.get("slot_id"))
+        establishment_info = loaders.establishments.load(slot_info.get("establishment_id"))
+        company_profile = loaders.company_profiles.load(establishment_info.get("profile_id"))
+        load_owner = loaders.users.defer(company_profile.get("user_id"))
+        # The owner and the customer are fetched together by the first of these loads.
+        contact_number = load_owner().get("contact_number")
+        user_plate_number = load_customer().get("plate_number")
         establishment_profile_id = company_profile.get("profile_id")
         address_info = AddressRepository.get_address(profile_id=establishment_profile_id)
-        user_plate_number = UserRepository.get_user(
-            user_id=transaction_data.get("user_id")
-        ).get("plate_number")
         returned_data = {}
         if transaction_data.get("status") in ["active", "reserved"]:
             qr_code_utils = QRCodeUtils()
@@ -190,18 +240,16 @@ class TransactionVerification:
         establishment_info = ParkingEstablishmentRepository.get_establishment(
             establishment_uuid=establishment_uuid
         )
-        user_id = CompanyProfileRepository.get_company_profile(
-            profile_id=establishment_info.get("profile_id")
-        ).get("user_id")
+        loaders = get_loaders()
+        loaders.establishments.prime(establishment_info)
+        user_id = loaders.company_profiles.load(establishment_info.get("profile_id")).get("user_id")
         if manager_id != user_id:
             raise InvalidQRContent("Invalid QR code content, the establishment does not match.")
         transaction_data = ParkingTransactionRepository.get_transaction(
             transaction_uuid=transaction_uuid
         )
-        parking_slot_info = ParkingSlotRepository.get_slot(
-            slot_id=transaction_data.get("slot_id")
-        )
-        user_info = UserRepository.get_user(user_id=transaction_data.get("user_id"))
+        parking_slot_info = loaders.slots.load(transaction_data.get("slot_id"))
+        user_info = loaders.users.load(transaction_data.get("user_id"))
         return {
             "user_info": user_info,
             "transaction_data": transaction_data,
@@ -257,37 +305,71 @@ class Transaction:  # pylint: disable=too-few-public-methods
     """Wraps the service actions for transaction operations"""
 
     @staticmethod
-    def get_all_user_transactions(user_id):
-        """Get all the transactions for a user."""
-        return ParkingTransactionRepository.get_all_transactions(user_id=user_id)
+    def get_all_user_transactions(user_id, query: dict):
+        """Get a page of the transactions for a user."""
+        transactions, next_cursor = ParkingTransactionRepository.get_user_transactions(
+            user_id, after=query.get("after"), limit=query.get("limit", DEFAULT_PAGE_SIZE)
+        )
+        return {"transactions": transactions, "next_cursor": next_cursor}
     @classmethod
-    def get_establishment_transaction(cls, user_id):
-        """Get all the transactions for the establishment."""
+    def get_establishment_transaction(cls, user_id, query: dict):
+        """Get a page of the transactions for the establishment, with the next page cursor."""
         profile_id = CompanyProfileRepository.get_company_profile(user_id=user_id).get("profile_id")
         establishment_id = ParkingEstablishmentRepository.get_establishment(
             profile_id=profile_id
         ).get("establishment_id")
-        parking_slots = ParkingSlotRepository.get_slots(establishment_id=establishment_id)
-        parking_slots_id = [slot.get("slot_id") for slot in parking_slots]
-        transactions = []
-        for slot_id in parking_slots_id:
-            # transactions.append(ParkingTransactionRepository.get_all_transactions(
-            # slot_id=slot_id
-            # ))
-            transaction = ParkingTransactionRepository.get_all_transactions(slot_id=slot_id)
-            if transaction:
-                transactions.append(transaction)
-        return transactions
+        transactions, next_cursor = ParkingTransactionRepository.get_establishment_transactions(
+            establishment_id,
+            status=query.get("status"),
+            start_date=query.get("start_date"),
+            end_date=query.get("end_date"),
+            after=query.get("after"),
+            limit=query.get("limit", DEFAULT_PAGE_SIZE),
+        )
+        return {"transactions": transactions, "next_cursor": next_cursor}
     @classmethod
     def get_transaction(cls, transaction_uuid):
         """Get the transaction details."""
+        loaders = get_loaders()
         transaction = ParkingTransactionRepository.get_transaction(
             transaction_uuid=transaction_uuid
         )
-        slot_info = ParkingSlotRepository.get_slot(slot_id=transaction.get("slot_id"))
-        user_info = UserRepository.get_user(user_id=transaction.get("user_id"))
+        load_user = loaders.users.defer(transaction.get("user_id"))
+        slot_info = loaders.slots.load(transaction.get("slot_id"))
+        user_info = load_user()
         return {
             "transaction": transaction,
             "slot_info": slot_info,
             "user_info": user_info
         }
+
+
+class ReservationExpiry:  # pylint: disable=too-few-public-methods
+    """Wraps the expiry of the reservations of no-shows"""
+
+    @staticmethod
+    def expire_stale_reservations(grace_period_minutes: int, batch_size: int) -> dict:
+        """
+        Cancel the reservations still unused after the grace period and reopen their
+        slots. Each batch is its own short transaction, so a large backlog never holds
+        many row locks at once.
+        """
+        reserved_before = datetime.now(pytz.timezone('Asia/Manila')) - timedelta(
+            minutes=grace_period_minutes
+        )
+        expired, released_slots = 0, []
+        while True:
+            count, slots = ParkingTransactionRepository.expire_reservations(
+                reserved_before, batch_size
+            )
+            expired += count
+            released_slots.extend(slots)
+            if count < batch_size:
+                break
+        return {
+            "expired": expired,
+            "released_slots": len(released_slots),
+            "released_by_establishment": dict(
+                Counter(slot.get("establishment_id") for slot in released_slots)
+            ),
+        }
@@ -1,8 +1,15 @@
 """ Wrapper for tasks that should be done asynchronously. """
 
+from logging import getLogger
+
 from flask_mail import Message
 
 from app.extension import mail, celery
+from app.services.operating_hour_service import OperatingHourService
+from app.services.slot_service import ParkingSlotService
+from app.services.transaction_service import TransactionService
+
+logger = getLogger(__name__)
 
 
 @celery.task
@@ -11,3 +18,42 @@ def send_mail(email: str, message: str, subject: str):
     msg = Message(subject=subject, recipients=[email])
     msg.html = message
     mail.send(msg)
+
+
+@celery.task
+def expire_stale_reservations(grace_period_minutes: int = 30, batch_size: int = 500):
+    """
+    Expire the reservations nobody showed up for within the grace period and release
+    their slots. Scheduled by celery beat, see CELERYBEAT_SCHEDULE.
+    """
+    counts = TransactionService.expire_stale_reservations(grace_period_minutes, batch_size)
+    logger.info(
+        "Expired %s stale reservations and released %s slots: %s",
+        counts.get("expired"), counts.get("released_slots"),
+        counts.get("released_by_establishment"),
+    )
+    return counts
+
+
+@celery.task
+def reconcile_slot_availability():
+    """
+    Correct the slot availability counters that drifted from the slots, e.g. after slots
+    were edited directly in the database. Scheduled by celery beat, see CELERYBEAT_SCHEDULE.
+    """
+    corrected = ParkingSlotService.reconcile_availability()
+    if corrected:
+        logger.warning("Corrected %s drifted slot availability counters", corrected)
+    return corrected
+
+
+@celery.task
+def rebuild_weekly_schedules():
+    """
+    Rebuild the opening intervals of every establishment from its operating hours, e.g.
+    after they were edited directly in the database. Scheduled by celery beat, see
+    CELERYBEAT_SCHEDULE.
+    """
+    rebuilt = OperatingHourService.rebuild_schedules()
+    logger.info("Rebuilt the weekly schedules of %s establishments", rebuilt)
+    return rebuilt
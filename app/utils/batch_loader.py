@@ -0,0 +1,63 @@
+"""
+    DataLoader-style batching of lookups by id. Keys requested with defer() are collected
+    and fetched together with a single IN (...) query the first time any of them is needed,
+    and every fetched row is memoized for the lifetime of the loader.
+"""
+
+from typing import Callable, Hashable, Iterable
+
+
+class BatchLoader:
+    """Coalesce and memoize lookups of rows by a key."""
+
+    def __init__(self, batch_fn: Callable[[list], list[dict]], key: str):
+        """
+        Parameters:
+            batch_fn: Fetches the rows for a list of keys, as dictionaries.
+            key: Name of the dictionary field holding the key of a row.
+        """
+        self.batch_fn = batch_fn
+        self.key = key
+        self._cache = {}
+        self._pending = set()
+
+    def defer(self, key: Hashable) -> Callable[[], dict]:
+        """Queue a key to be fetched with the next batch and return its resolver."""
+        if key is not None and key not in self._cache:
+            self._pending.add(key)
+        return lambda: self.load(key)
+
+    def load(self, key: Hashable) -> dict:
+        """Return the row for a key, fetching it along all the pending keys if needed."""
+        if key is None:
+            return {}
+        if key not in self._cache:
+            self._pending.add(key)
+            self._dispatch()
+        return self._cache.get(key) or {}
+
+    def load_many(self, keys: Iterable[Hashable]) -> list[dict]:
+        """Return the rows for the given keys, fetching the missing ones in one batch."""
+        keys = list(keys)
+        for key in keys:
+            self.defer(key)
+        if self._pending:
+            self._dispatch()
+        return [self._cache.get(key) or {} for key in keys]
+
+    def prime(self, row: dict):
+        """Store an already fetched row so later lookups of its key are served from memory."""
+        self._cache[row.get(self.key)] = row
+
+    def clear(self):
+        """Forget every memoized row, e.g. after the underlying rows were modified."""
+        self._cache.clear()
+        self._pending.clear()
+
+    def _dispatch(self):
+        keys = list(self._pending)
+        self._pending.clear()
+        for row in self.batch_fn(keys):
+            self._cache[row.get(self.key)] = row
+        for key in keys:
+            self._cache.setdefault(key, None)
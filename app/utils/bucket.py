@@ -65,18 +65,22 @@ class R2TransactionalUpload:
         except Exception as e:
             self.logger.error("Error during upload: %s", str(e))
             self.logger.info("Starting rollback process")
-
-            for key in uploaded_keys:
-                try:
-                    self.s3_client.delete_object(
-                        Bucket=self.bucket_name,
-                        Key=key
-                    )
-                    self.logger.info("Rolled back upload for %s", key)
-                except Exception as delete_error:
-                    self.logger.error("Error during rollback of %s: %s", key, str(delete_error))
-
+            self.delete(uploaded_keys)
             return False, {"error": str(e)}
+    def delete(self, keys: List[str]):
+        """
+        Delete uploaded files, e.g. those of a database transaction that failed.
+        A file that cannot be deleted is logged and skipped.
+        """
+        for key in keys:
+            try:
+                self.s3_client.delete_object(
+                    Bucket=self.bucket_name,
+                    Key=key
+                )
+                self.logger.info("Rolled back upload for %s", key)
+            except Exception as delete_error:
+                self.logger.error("Error during rollback of %s: %s", key, str(delete_error))
     def download(self, key: str) -> tuple[BytesIO, str, str] | tuple[None, None, None]:
         """
         Download a file from R2 bucket and return it as a BytesIO object
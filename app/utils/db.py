@@ -1,12 +1,76 @@
 """Provide a transactional scope around a series of operations."""
 
 from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Callable
+from weakref import WeakKeyDictionary
+
+from flask import Flask, current_app, g, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import DataError, IntegrityError, OperationalError, DatabaseError
-from app.utils.engine import get_session
+
+from app.utils.engine import get_engine, get_session, session_local
+
+logger = getLogger(__name__)
+# The session each connection is running a transaction for, to count its statements.
+_session_connections = WeakKeyDictionary()
+_transaction_session = ContextVar("transaction_session", default=None)
+
+
+def get_request_session():
+    """Return the session bound to the current request, or None outside a request."""
+    if has_request_context():
+        return g.get("db_session")
+    return None
+
+
+def get_outer_session():
+    """Return the session of the enclosing transaction_scope or request, if any."""
+    return _transaction_session.get() or get_request_session()
+
+
+SNAPSHOT_OPTIONS = {"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+
+
+def begin_snapshot(session):
+    """
+    Start the transaction of the session as a read-only REPEATABLE READ transaction, so
+    every statement in it reads the same snapshot. Does nothing on other databases or when
+    the session is already in a transaction.
+    """
+    if session.in_transaction() or get_engine().dialect.name != "postgresql":
+        return
+    session.connection(execution_options=SNAPSHOT_OPTIONS)
+
 
 @contextmanager
-def session_scope():  # pylint: disable=C0116
+def session_scope(read_only: bool = False, snapshot: bool = False):
+    """
+    Provide a transactional scope around a series of operations. Read-only scopes may be
+    routed to a replica; a read-only scope nested in a writing scope stays on the primary.
+    A snapshot scope is read-only and all of its reads see the same snapshot; inside a
+    request-scoped session it joins the request's transaction, which may still write.
+    """
+    read_only = read_only or snapshot
+    request_session = get_outer_session()
+    if request_session is not None:
+        # The enclosing transaction_scope or request owns the transaction: it commits it,
+        # and rolls it back when an error raised here reaches it. Rolling back here would
+        # silently discard the work done before this scope.
+        outer_read_only = request_session.info.get("read_only")
+        request_session.info["read_only"] = read_only and outer_read_only is not False
+        try:
+            yield request_session
+            request_session.flush()
+        finally:
+            request_session.info["read_only"] = outer_read_only
+        return
     session = get_session()
+    session.info["read_only"] = read_only
+    if snapshot:
+        begin_snapshot(session)
     try:
         yield session
         session.commit()
@@ -15,3 +79,147 @@ def session_scope():  # pylint: disable=C0116
         raise e
     finally:
         session.close()
+
+
+@contextmanager
+def transaction_scope():
+    """
+    Run a series of repository calls as one transaction: every session_scope opened inside
+    joins it, so their writes are committed together at the end or rolled back together
+    when anything inside raises. Inside a request-scoped session it joins the request's
+    transaction.
+    """
+    if get_outer_session() is not None:
+        with session_scope() as session:
+            yield session
+        return
+    session = get_session()
+    session.info["read_only"] = False
+    token = _transaction_session.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _transaction_session.reset(token)
+        session.close()
+
+
+def _increment_request_stat(name: str):
+    """Increment a per-request database counter if a request is being served."""
+    if has_request_context() and "db_stats" in g:
+        g.db_stats[name] += 1
+
+
+@event.listens_for(get_engine(), "checkout")
+def count_checkout(dbapi_connection, connection_record, connection_proxy):  # pylint: disable=W0613
+    """Count pool checkouts made while serving the current request."""
+    _increment_request_stat("checkouts")
+
+
+@event.listens_for(session_local, "after_begin")
+def track_session_connection(session, transaction, connection):  # pylint: disable=W0613
+    """Remember the session a connection runs the statements of."""
+    _session_connections[connection] = session
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_statement(
+    conn, cursor, statement, parameters, context, executemany
+):  # pylint: disable=W0613, R0913, R0917
+    """Count the SQL statements run for a session and while serving the current request."""
+    session = _session_connections.get(conn)
+    if session is not None:
+        session.info["statements"] = session.info.get("statements", 0) + 1
+    _increment_request_stat("statements")
+
+
+@contextmanager
+def statement_budget(session, limit: int, name: str = "block"):
+    """
+    Guard a block against running more than limit SQL statements through a session, e.g.
+    an N+1 query slipping back in. Only the statements of the session are counted, not
+    those run meanwhile by other threads or the replica lag probes. Exceeding the budget
+    is logged as a warning, and fails with an AssertionError when
+    DB_STATEMENT_BUDGET_STRICT is enabled, which only TestingConfig does.
+    """
+    start = session.info.get("statements", 0)
+    yield
+    used = session.info.get("statements", 0) - start
+    if used <= limit:
+        return
+    message = f"{name} ran {used} SQL statements, its budget is {limit}."
+    if has_app_context() and current_app.config.get("DB_STATEMENT_BUDGET_STRICT"):
+        raise AssertionError(message)
+    logger.warning(message)
+
+
+@event.listens_for(session_local, "after_commit")
+def count_commit(session):  # pylint: disable=W0613
+    """Count commits made while serving the current request."""
+    _increment_request_stat("commits")
+
+
+def run_after_commit(session, callback: Callable[[], None]):
+    """
+    Run a callback once the session commits, for side effects that must only follow
+    committed writes. It is dropped if the session rolls back.
+    """
+    session.info.setdefault("after_commit_callbacks", []).append(callback)
+
+
+@event.listens_for(session_local, "after_commit")
+def run_commit_callbacks(session):
+    """Run the callbacks registered with run_after_commit."""
+    for callback in session.info.pop("after_commit_callbacks", []):
+        callback()
+
+
+@event.listens_for(session_local, "after_rollback")
+def drop_commit_callbacks(session):
+    """Drop the callbacks registered with run_after_commit."""
+    session.info.pop("after_commit_callbacks", None)
+
+
+def register_request_session(app: Flask):
+    """
+    Bind one session per request when DB_REQUEST_SCOPED_SESSION is enabled, so every
+    repository call made while serving the request shares a single connection checkout
+    and a single commit. When DB_REQUEST_STATS is enabled the number of checkouts,
+    commits and SQL statements is returned in the X-DB-Checkouts, X-DB-Commits and
+    X-DB-Statements response headers.
+    """
+
+    @app.before_request
+    def open_request_session():
+        g.db_stats = {"checkouts": 0, "commits": 0, "statements": 0}
+        if app.config.get("DB_REQUEST_SCOPED_SESSION"):
+            g.db_session = get_session()
+
+    @app.after_request
+    def commit_request_session(response):
+        session = g.pop("db_session", None)
+        if session is not None:
+            try:
+                if response.status_code < 400:
+                    session.commit()
+                else:
+                    session.rollback()
+            finally:
+                session.close()
+        stats = g.get("db_stats")
+        if stats is not None and app.config.get("DB_REQUEST_STATS"):
+            response.headers["X-DB-Checkouts"] = str(stats["checkouts"])
+            response.headers["X-DB-Commits"] = str(stats["commits"])
+            response.headers["X-DB-Statements"] = str(stats["statements"])
+            logger.debug("Database usage for %s: %s", response.status, stats)
+        return response
+
+    @app.teardown_request
+    def close_request_session(error=None):  # pylint: disable=W0613
+        session = g.pop("db_session", None)
+        if session is not None:
+            session.rollback()
+            session.close()
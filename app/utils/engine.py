@@ -8,8 +8,12 @@ import logging
 from logging import FileHandler, StreamHandler, getLogger
 from os import getenv
 
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Delete, Insert, Update, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.utils.pool_telemetry import PoolTelemetry, TimedQueuePool
+from app.utils.replica_router import ReplicaRouter, get_client_key
 
 file_handler = FileHandler("authentication.logs")
 file_handler.setLevel(logging.WARNING)
@@ -22,9 +26,39 @@ logger.setLevel(logging.WARNING)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+
+def uses_transaction_pooler(url) -> bool:
+    """
+    Check if the database is reached through a transaction-mode pooler such as pgbouncer.
+    DATABASE_TRANSACTION_POOLER overrides the detection, which otherwise relies on the
+    default pgbouncer (6432) and Supabase pooler (6543) ports.
+    """
+    configured = getenv("DATABASE_TRANSACTION_POOLER")
+    if configured is not None:
+        return configured.lower() == "true"
+    return url.port in (6432, 6543)
+
+
+def get_connect_args(database_url) -> dict:
+    """
+    Return the driver connect arguments. psycopg 3 prepares a statement server side once it
+    ran DATABASE_PREPARE_THRESHOLD times on a connection, which lets the hot point lookups skip
+    planning. It is switched off behind a transaction-mode pooler, where consecutive statements
+    may run on different server connections.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql" or url.get_driver_name() != "psycopg":
+        return {}
+    if uses_transaction_pooler(url):
+        return {"prepare_threshold": None}
+    return {"prepare_threshold": int(getenv("DATABASE_PREPARE_THRESHOLD", "2"))}
+
+
 engine = create_engine(
     getenv("DATABASE_URL"),
-    echo=True,
+    connect_args=get_connect_args(getenv("DATABASE_URL")),
+    echo=getenv("DATABASE_ECHO", "false").lower() == "true",
+    poolclass=TimedQueuePool,
     pool_size=5,
     max_overflow=10,
     pool_timeout=30,
@@ -32,23 +66,97 @@ engine = create_engine(
     pool_pre_ping=True,
 )
 
-@event.listens_for(engine, 'connect')
-def receive_connect(dbapi_connection, connection_record):
-    print('Connection established:', connection_record)
-    print('Connection:', dbapi_connection)
+pool_telemetry = PoolTelemetry(
+    log_sample_rate=float(getenv("POOL_TELEMETRY_LOG_SAMPLE_RATE", "0.01"))
+)
+pool_telemetry.attach(engine)
+
+replica_engines = [
+    create_engine(
+        replica_url.strip(),
+        connect_args=get_connect_args(replica_url.strip()),
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+    )
+    for replica_url in getenv("DATABASE_REPLICA_URLS", "").split(",") if replica_url.strip()
+]
+
+replica_router = ReplicaRouter(
+    replica_engines,
+    max_lag_seconds=float(getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "5")),
+    check_interval=float(getenv("DATABASE_REPLICA_CHECK_INTERVAL", "5")),
+    sticky_seconds=float(getenv("DATABASE_REPLICA_STICKY_SECONDS", "5")),
+)
+
+
+def client_key(session) -> str:
+    """
+    Return the key of the client a session works for, for write stickiness. It is read when
+    the session is used rather than when it is created, since a request-scoped session is
+    created before the request's JWT is verified.
+    """
+    return session.info.get("client_key") or get_client_key()
+
+
+class RoutingSession(Session):  # pylint: disable=too-few-public-methods
+    """
+    Session that sends read-only work to a replica and everything else to the primary.
+    A session is read-only while session_scope(read_only=True) is active, and stays on
+    the primary once it has written so it always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("read_only") and not self.info.get("wrote") and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+        ):
+            # A transaction stays on the replica it started on, so its reads are consistent.
+            replica = self.info.get("replica") or replica_router.choose(client_key(self))
+            if replica is not None:
+                self.info["replica"] = replica
+                return replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
 
-@event.listens_for(engine, 'checkout')
-def receive_checkout(dbapi_connection, connection_record, connection_proxy):
-    print('Connection checkout:', connection_record)
-    print('Connection proxy:', connection_proxy)
-    print('Connection:', dbapi_connection)
 
 session_local = sessionmaker(
     bind=engine,
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
 )
 
+
+@event.listens_for(session_local, "after_flush")
+def mark_flush_as_write(session, flush_context):  # pylint: disable=unused-argument
+    session.info["wrote"] = True
+
+
+@event.listens_for(session_local, "do_orm_execute")
+def mark_dml_as_write(orm_execute_state):
+    session = orm_execute_state.session
+    if (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+        or (not orm_execute_state.is_select and not session.info.get("read_only"))
+    ):
+        session.info["wrote"] = True
+
+
+@event.listens_for(session_local, "after_commit")
+def keep_writer_on_primary(session):
+    session.info.pop("replica", None)
+    if session.info.pop("wrote", False):
+        replica_router.mark_write(client_key(session))
+
+
+@event.listens_for(session_local, "after_rollback")
+def forget_rolled_back_write(session):
+    session.info.pop("wrote", None)
+    session.info.pop("replica", None)
+
+
 def get_engine():
     """Return the engine"""
     return engine
@@ -57,3 +165,8 @@ def get_engine():
 def get_session():
     """Returns the session"""
     return session_local()
+
+
+def get_pool_telemetry():
+    """Return the telemetry collected for the engine's connection pool"""
+    return pool_telemetry
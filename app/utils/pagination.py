@@ -0,0 +1,131 @@
+"""
+    Keyset pagination shared by the list endpoints. A page is read with
+    WHERE (sort key) > (last key of the previous page) ORDER BY sort key LIMIT n + 1, so
+    reading a page costs the same however deep it is. The position is handed to the
+    client as an opaque cursor.
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from json import dumps, loads
+from typing import Callable, Optional
+from uuid import UUID
+
+from marshmallow import ValidationError
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"decimal": str(value)}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    kind, encoded = next(iter(value.items()))
+    decoders = {
+        "datetime": datetime.fromisoformat,
+        "date": date.fromisoformat,
+        "decimal": Decimal,
+        "uuid": UUID,
+    }
+    return decoders[kind](encoded)
+
+
+def encode_cursor(key: tuple) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    return urlsafe_b64encode(
+        dumps([_encode_value(value) for value in key], separators=(",", ":")).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor into the sort key it points after, raising ValueError if invalid."""
+    try:
+        values = loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or not values:
+            raise ValueError("Invalid cursor.")
+        return tuple(_decode_value(value) for value in values)
+    except (
+        BinasciiError, InvalidOperation, KeyError, StopIteration, TypeError, UnicodeError
+    ) as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def keyset_statement(
+    statement, sort_key: tuple, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+):
+    """
+    Restrict a statement to one page: the rows after the cursor, ordered by a unique sort
+    key, plus one extra row telling whether another page follows.
+
+    Parameters:
+        statement: The select statement, without ORDER BY or LIMIT.
+        sort_key (tuple): The columns ordering the rows; together they must be unique.
+        after (tuple): The decoded cursor of the previous page, if any.
+        limit (int): The maximum number of rows of the page.
+        descending (bool): Order the rows from the highest sort key.
+    """
+    if after is not None:
+        if len(after) != len(sort_key):
+            raise ValidationError("Invalid cursor.", "cursor")
+        position = tuple_(*sort_key)
+        statement = statement.where(
+            position < tuple_(*after) if descending else position > tuple_(*after)
+        )
+    return statement.order_by(
+        *(column.desc() if descending else column.asc() for column in sort_key)
+    ).limit(limit + 1)
+
+
+def split_page(
+    rows: list, sort_key: tuple, limit: int = DEFAULT_PAGE_SIZE, key: Callable = None
+) -> tuple[list, Optional[str]]:
+    """
+    Split the rows read by a keyset statement into the page and the next page cursor.
+
+    Parameters:
+        rows (list): The rows read by the keyset statement.
+        sort_key (tuple): The columns ordering the rows.
+        limit (int): The maximum number of rows of the page.
+        key (Callable): Returns the sort key of a row, by default the sort_key columns of
+            the row, read from its first entity when they are not selected directly.
+
+    Returns:
+        tuple: The rows of the page and the cursor of the next page, None on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last_row = rows[-1]
+    if key is not None:
+        return rows, encode_cursor(key(last_row))
+    return rows, encode_cursor(tuple(
+        getattr(last_row if column.key in last_row._fields else last_row[0], column.key)
+        for column in sort_key
+    ))
+
+
+def fetch_page(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    session, statement, sort_key: tuple, after: tuple = None, limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False, key: Callable = None,
+) -> tuple[list, Optional[str]]:
+    """Read one page of a statement, see keyset_statement and split_page."""
+    rows = session.execute(
+        keyset_statement(statement, sort_key, after, limit, descending)
+    ).all()
+    return split_page(rows, sort_key, limit, key)
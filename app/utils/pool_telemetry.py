@@ -0,0 +1,135 @@
+"""
+    Connection pool telemetry. Collects checkout counts, checkout wait time, overflow usage,
+    invalidations and connection age without logging on every checkout.
+"""
+
+# pylint: disable=unused-argument, attribute-defined-outside-init
+
+from logging import getLogger
+from random import random
+from threading import Lock
+from time import monotonic, perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = getLogger(__name__)
+
+
+class PoolTelemetry:  # pylint: disable=too-many-instance-attributes
+    """Thread-safe counters describing the pressure on a connection pool."""
+
+    def __init__(self, log_sample_rate: float = 0.0):
+        self.log_sample_rate = log_sample_rate
+        self._lock = Lock()
+        self._engine = None
+        self.reset()
+
+    def reset(self):
+        """Reset all the counters."""
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.overflow_peak = 0
+            self.connection_age_total = 0.0
+            self.connection_age_max = 0.0
+
+    def record_wait(self, seconds: float):
+        """Record how long a checkout waited for a connection from the pool."""
+        with self._lock:
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+
+    def attach(self, engine):
+        """Attach the telemetry listeners to the pool of the given engine."""
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_soft_invalidate)
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.telemetry = self
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = monotonic()
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        age = monotonic() - connection_record.info.get("connected_at", monotonic())
+        pool = self._engine.pool
+        overflow = pool.overflow() if isinstance(pool, QueuePool) else 0
+        with self._lock:
+            self.checkouts += 1
+            self.connection_age_total += age
+            self.connection_age_max = max(self.connection_age_max, age)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+        if self.log_sample_rate and random() < self.log_sample_rate:
+            logger.info("Connection pool telemetry: %s", self.snapshot())
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.soft_invalidations += 1
+
+    def snapshot(self) -> dict:
+        """Return the current counters and pool state as a dictionary."""
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            checkouts = self.checkouts
+            data = {
+                "connects": self.connects,
+                "checkouts": checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "checkout_wait_avg_ms": (
+                    self.checkout_wait_total / checkouts * 1000 if checkouts else 0.0
+                ),
+                "checkout_wait_max_ms": self.checkout_wait_max * 1000,
+                "overflow_peak": self.overflow_peak,
+                "connection_age_avg_s": (
+                    self.connection_age_total / checkouts if checkouts else 0.0
+                ),
+                "connection_age_max_s": self.connection_age_max,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    telemetry: PoolTelemetry = None
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.record_wait(perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
@@ -0,0 +1,128 @@
+"""
+    In-process prefix index answering autocomplete lookups without a database round trip.
+
+    Every indexed text is normalized into keys kept in sorted lists of (key, id), so the
+    entries starting with a prefix are found by binary search and read in order until
+    enough distinct ids are collected. Names are kept apart from the other keys, so the
+    ids whose name starts with the prefix are suggested first.
+
+    The entries are refreshed like every ReloadingIndex.
+"""
+
+from bisect import bisect_left, insort
+from re import compile as compile_regex
+from typing import Iterable
+from unicodedata import category, normalize
+
+from app.utils.reloading_index import ReloadingIndex
+
+_SEPARATORS = compile_regex(r"[^\w]+")
+_PHRASE_SEPARATORS = compile_regex(r"[,;\n]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase a text and strip its accents and punctuation, for matching."""
+    text = "".join(
+        character for character in normalize("NFKD", text.casefold())
+        if category(character) != "Mn"
+    )
+    return " ".join(_SEPARATORS.sub(" ", text).split())
+
+
+def text_keys(text: str) -> set[str]:
+    """Get the keys a text is found by: the text from each of its words on."""
+    words = normalize_text(text).split()
+    return {" ".join(words[start:]) for start in range(len(words))}
+
+
+class PrefixEntries:
+    """The sorted (key, id) lists of the names and other texts, and the value of each id."""
+
+    def __init__(self):
+        self.names: list[tuple[str, int]] = []
+        self.others: list[tuple[str, int]] = []
+        self.keys: dict[int, tuple[set, set]] = {}
+        self.values: dict[int, object] = {}
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple]) -> "PrefixEntries":
+        """Build the entries of (id, name, texts, value) rows, sorting the lists once."""
+        entries = cls()
+        for row in rows:
+            entries.add(*row, sort=False)
+        entries.names.sort()
+        entries.others.sort()
+        return entries
+
+    def add(  # pylint: disable=too-many-arguments
+        self, entry_id: int, name: str, texts: Iterable[str], value, *, sort=True
+    ):
+        """Add an entry, found by its name from its first word and by its texts."""
+        full_name = normalize_text(name or "")
+        name_keys = {full_name} if full_name else set()
+        # The name from its later words on, and the texts split into phrases.
+        other_keys = text_keys(name or "") - name_keys
+        for text in texts:
+            for phrase in _PHRASE_SEPARATORS.split(text or ""):
+                other_keys |= text_keys(phrase)
+        self.keys[entry_id] = (name_keys, other_keys)
+        self.values[entry_id] = value
+        for entries, keys in ((self.names, name_keys), (self.others, other_keys)):
+            for key in keys:
+                if sort:
+                    insort(entries, (key, entry_id))
+                else:
+                    entries.append((key, entry_id))
+
+    def remove(self, entry_id: int):
+        """Remove an entry, if present."""
+        name_keys, other_keys = self.keys.pop(entry_id, (set(), set()))
+        self.values.pop(entry_id, None)
+        for entries, keys in ((self.names, name_keys), (self.others, other_keys)):
+            for key in keys:
+                position = bisect_left(entries, (key, entry_id))
+                if position < len(entries) and entries[position] == (key, entry_id):
+                    del entries[position]
+
+    def lookup(self, prefix: str, limit: int) -> list:
+        """Get the values of up to limit entries starting with a normalized prefix."""
+        found: dict[int, None] = {}
+        for entries in (self.names, self.others):
+            position = bisect_left(entries, (prefix,))
+            while len(found) < limit and position < len(entries):
+                key, entry_id = entries[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(entry_id)
+                position += 1
+        return [self.values[entry_id] for entry_id in found]
+
+
+class PrefixIndex(ReloadingIndex):
+    """
+    Prefix lookups of ids by their name and other searchable texts. Its load reads the
+    (id, name, texts, value) of the entries to index, texts being an iterable of other
+    texts to find the entry by and value what a lookup returns for the entry.
+    """
+
+    def lookup(self, prefix: str, limit: int = 10) -> list:
+        """
+        Get the values of the entries with a name or text starting with a prefix, those
+        whose name starts with it first, then in key order.
+        """
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+        self._refresh()
+        with self._lock:
+            return self._snapshot.lookup(prefix, limit)
+
+    def _build(self, rows: list[tuple]) -> PrefixEntries:
+        return PrefixEntries.build(rows)
+
+    def _update(self, snapshot: PrefixEntries, ids: set[int], rows: list[tuple]):
+        for entry_id in ids:
+            snapshot.remove(entry_id)
+        for row in rows:
+            snapshot.add(*row)
+        return snapshot
@@ -0,0 +1,57 @@
+"""
+    Column projections for list reads. A projection selects only the columns a response
+    returns and maps each result row straight to a response dictionary, without building
+    ORM entities or adding them to the identity map.
+"""
+
+from typing import Callable
+
+
+def to_str(value):
+    """Convert UUID and Decimal values the way the models' to_dict does."""
+    return str(value)
+
+
+def to_text(value):
+    """Return the value, or an empty string when it is empty."""
+    return value if value else ""
+
+
+def to_enum_value(value):
+    """Return the value of an enum member, or None."""
+    return value.value if value else None
+
+
+def to_isoformat(value):
+    """Return a date or datetime in ISO 8601 format, or None."""
+    return value.isoformat() if value else None
+
+
+class Projection:
+    """The columns of a response and the converters applied to their values."""
+
+    def __init__(self, **fields):
+        """
+        Parameters:
+            fields: The response keys, each mapped to a column or column expression, or to
+                a (column, converter) tuple when the value needs converting.
+        """
+        self.columns = []
+        self._converters: list[tuple[str, int, Callable]] = []
+        for index, (name, field) in enumerate(fields.items()):
+            column, converter = field if isinstance(field, tuple) else (field, None)
+            self.columns.append(column.label(name))
+            if converter is not None:
+                self._converters.append((name, index, converter))
+        self.names = tuple(fields)
+
+    def to_dict(self, row) -> dict:
+        """Map a result row of the projected columns to a response dictionary."""
+        data = dict(zip(self.names, row))
+        for name, index, converter in self._converters:
+            data[name] = converter(row[index])
+        return data
+
+    def to_dicts(self, rows) -> list[dict]:
+        """Map result rows of the projected columns to response dictionaries."""
+        return [self.to_dict(row) for row in rows]
@@ -0,0 +1,78 @@
+"""
+    Base of the in-process indexes kept in step with the database. The rows written are
+    marked dirty once their transaction commits and re-read by the next query, and the
+    whole index is reloaded once it is older than max_age_seconds, which bounds how long a
+    write made by another worker process goes unseen.
+
+    Only the first load makes queries wait: a reload is done by one query while the others
+    keep reading the previous snapshot, and no database read is made while holding the lock.
+"""
+
+from threading import Lock
+from time import monotonic
+from typing import Callable, Iterable, Optional
+
+
+class ReloadingIndex:
+    """An index snapshot built from loaded rows, refreshed before every query."""
+
+    def __init__(
+        self,
+        load: Callable[[Optional[list[int]]], list[tuple]],
+        max_age_seconds: float = 300,
+    ):
+        """
+        Parameters:
+            load: Reads the rows to index, all of them when given None, otherwise those
+                among the given ids that are still to be indexed.
+            max_age_seconds: The age after which the whole index is reloaded.
+        """
+        self._load = load
+        self.max_age_seconds = max_age_seconds
+        self._snapshot = None
+        self._loaded_at: Optional[float] = None
+        self._dirty: set[int] = set()
+        self._lock = Lock()
+        self._reload_lock = Lock()
+
+    def mark_dirty(self, ids: Iterable[int]):
+        """Mark rows that were written, to be re-read."""
+        with self._lock:
+            self._dirty.update(ids)
+
+    def invalidate(self):
+        """Reload the whole index on the next query."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _build(self, rows: list[tuple]):
+        """Build a snapshot of the index from all the rows."""
+        raise NotImplementedError
+
+    def _update(self, snapshot, ids: set[int], rows: list[tuple]):
+        """Return the snapshot with the rows of ids replaced, called holding the lock."""
+        raise NotImplementedError
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or monotonic() - self._loaded_at > self.max_age_seconds
+
+    def _refresh(self):
+        if self._is_stale() and self._reload_lock.acquire(  # pylint: disable=R1732
+            blocking=self._snapshot is None
+        ):
+            try:
+                if self._is_stale():
+                    # The rows written from now on are re-read after the reload.
+                    with self._lock:
+                        self._dirty.clear()
+                    snapshot = self._build(self._load(None))
+                    with self._lock:
+                        self._snapshot, self._loaded_at = snapshot, monotonic()
+            finally:
+                self._reload_lock.release()
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if dirty:
+            rows = self._load(sorted(dirty))
+            with self._lock:
+                self._snapshot = self._update(self._snapshot, dirty, rows)
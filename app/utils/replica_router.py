@@ -0,0 +1,131 @@
+"""
+    Routes read-only sessions to replica engines. Replicas whose replication lag is above the
+    allowed maximum (or that cannot be reached) are skipped, and clients that wrote recently
+    are kept on the primary so they read their own writes.
+
+    The lag of the replicas is probed by a background thread, so a slow or dead replica never
+    holds up a request: choosing a replica only reads the result of the last probe.
+"""
+
+from itertools import count
+from logging import getLogger
+from threading import Event, Lock, Thread
+from time import monotonic
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt
+from sqlalchemy import text
+from sqlalchemy.exc import DatabaseError, OperationalError
+
+logger = getLogger(__name__)
+
+REPLICATION_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+def get_client_key():
+    """Return the key identifying the client of the current request for write stickiness."""
+    if not has_request_context():
+        return None
+    try:
+        identity = get_jwt().get("sub")
+    except RuntimeError:
+        identity = None
+    if isinstance(identity, dict) and identity.get("user_id"):
+        return f"user:{identity.get('user_id')}"
+    return f"addr:{request.remote_addr}"
+
+
+class ReplicaRouter:  # pylint: disable=too-many-instance-attributes
+    """Chooses a replica engine for read-only work."""
+
+    def __init__(
+        self, replicas: list, max_lag_seconds: float = 5.0, check_interval: float = 5.0,
+        sticky_seconds: float = 5.0,
+    ):  # pylint: disable=too-many-arguments
+        self.replicas = list(replicas)
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        # No replica is used until the first probe tells which are healthy.
+        self._healthy = []
+        self._next = count()
+        self._sticky = {}
+        self._lock = Lock()
+        self._prober = None
+        self._stopped = Event()
+
+    def choose(self, client_key: str = None):
+        """Return a replica engine, or None when the primary must be used."""
+        if not self.replicas or self.is_sticky(client_key):
+            return None
+        self._start_prober()
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return self.replicas[healthy[next(self._next) % len(healthy)]]
+
+    def mark_write(self, client_key: str):
+        """Keep the client on the primary for the sticky window after a write."""
+        if client_key is None or not self.replicas:
+            return
+        now = monotonic()
+        with self._lock:
+            if len(self._sticky) > 10000:
+                self._sticky = {
+                    key: until for key, until in self._sticky.items() if until > now
+                }
+            self._sticky[client_key] = now + self.sticky_seconds
+
+    def is_sticky(self, client_key: str) -> bool:
+        """Check if the client wrote within the sticky window."""
+        if client_key is None:
+            return False
+        until = self._sticky.get(client_key)
+        return until is not None and until > monotonic()
+
+    def stop(self):
+        """Stop probing the replicas."""
+        self._stopped.set()
+
+    def _start_prober(self):
+        # Started on first use rather than on import, so every forked worker has its own.
+        if self._prober is not None and self._prober.is_alive():
+            return
+        with self._lock:
+            if self._prober is None or not self._prober.is_alive():
+                self._prober = Thread(target=self._probe, name="replica-lag-probe", daemon=True)
+                self._prober.start()
+
+    def _probe(self):
+        while not self._stopped.is_set():
+            self.refresh_health()
+            self._stopped.wait(self.check_interval)
+
+    def refresh_health(self):
+        """Measure the lag of every replica and keep those within max_lag_seconds."""
+        healthy = []
+        for index, replica in enumerate(self.replicas):
+            lag = self.measure_lag(replica)
+            if lag is not None and lag <= self.max_lag_seconds:
+                healthy.append(index)
+            else:
+                logger.warning("Replica %s skipped, replication lag: %s", replica.url, lag)
+        self._healthy = healthy
+
+    @staticmethod
+    def measure_lag(replica):
+        """Return the replication lag of the replica in seconds, or None if unreachable."""
+        try:
+            with replica.connect() as connection:
+                return float(connection.execute(REPLICATION_LAG_QUERY).scalar() or 0)
+        except (OperationalError, DatabaseError) as e:
+            logger.warning("Replica %s is unreachable: %s", replica.url, e)
+            return None
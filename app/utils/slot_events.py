@@ -0,0 +1,140 @@
+"""
+    Fan-out of the published slot status changes to the live slot status streams. Each
+    worker process keeps one Redis pub/sub connection, read by one listener thread, and
+    hands every message to the in-process queues of the streams of its establishment. An
+    idle stream therefore costs a queue and the request waiting on it, not a Redis
+    connection. Streams are meant to be served by gevent workers (see gunicorn_sse.conf.py),
+    where that request is a greenlet; a threaded server holds a thread per open stream.
+"""
+
+from collections import defaultdict
+from json import dumps
+from logging import getLogger
+from os import getenv
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import sleep
+from typing import Callable, Iterator
+
+from redis import Redis, RedisError
+
+from app.utils.slot_status_map import EVENTS_CHANNEL_PREFIX, get_redis_url
+
+logger = getLogger(__name__)
+
+# Sent to a stream that may have missed messages, so the client reloads the whole grid.
+REFRESH_EVENT = dumps({"refresh": True})
+
+
+class SlotEventHub:
+    """The streams subscribed to each establishment in this process."""
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self._streams: dict[int, set[Queue]] = defaultdict(set)
+        self._lock = Lock()
+        self._listener = None
+        self._subscribed = Event()
+
+    def subscribe(self, establishment_id: int) -> Queue:
+        """Return a new queue receiving the messages published for an establishment."""
+        queue = Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._streams[establishment_id].add(queue)
+            if self._listener is None:
+                self._listener = Thread(target=self._listen, name="slot-events", daemon=True)
+                self._listener.start()
+        # The first streams wait for the subscription, so their snapshot misses no change.
+        self._subscribed.wait(timeout=1)
+        return queue
+
+    def unsubscribe(self, establishment_id: int, queue: Queue):
+        """Stop delivering the messages of an establishment to a queue."""
+        with self._lock:
+            streams = self._streams.get(establishment_id)
+            if streams is not None:
+                streams.discard(queue)
+                if not streams:
+                    del self._streams[establishment_id]
+
+    def publish_locally(self, establishment_id: int, message: str):
+        """
+        Hand a message to every stream of an establishment. A stream too slow to keep up
+        has its pending messages replaced with a refresh.
+        """
+        with self._lock:
+            streams = tuple(self._streams.get(establishment_id, ()))
+        for queue in streams:
+            try:
+                queue.put_nowait(message)
+            except Full:
+                self._reset(queue)
+
+    def refresh_all(self):
+        """Tell every stream to reload the grid, after messages may have been lost."""
+        with self._lock:
+            streams = [queue for queues in self._streams.values() for queue in queues]
+        for queue in streams:
+            self._reset(queue)
+
+    @staticmethod
+    def _reset(queue: Queue):
+        try:
+            while True:
+                queue.get_nowait()
+        except Empty:
+            pass
+        try:
+            queue.put_nowait(REFRESH_EVENT)
+        except Full:
+            pass
+
+    def _listen(self):
+        client = Redis.from_url(get_redis_url(), health_check_interval=30)
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{EVENTS_CHANNEL_PREFIX}*")
+                self._subscribed.set()
+                for message in pubsub.listen():
+                    establishment_id = message["channel"].decode()[len(EVENTS_CHANNEL_PREFIX):]
+                    self.publish_locally(int(establishment_id), message["data"].decode())
+            except (RedisError, ValueError) as error:
+                logger.warning("Slot events subscription lost, resubscribing: %s", error)
+                self.refresh_all()
+                sleep(1)
+
+
+_hub = SlotEventHub(int(getenv("SLOT_EVENTS_QUEUE_SIZE", "64")))
+
+
+def stream_events(
+    establishment_id: int, snapshot: Callable[[], str], heartbeat_seconds: float
+) -> Iterator[str]:
+    """
+    Stream the slot status changes of an establishment as server-sent events.
+
+    Parameters:
+        establishment_id (int): The ID of the establishment.
+        snapshot (Callable): Builds the data of the first event, read after subscribing so
+            no change is missed between the two.
+        heartbeat_seconds (float): The idle time after which a comment is sent, so dropped
+            connections are noticed and proxies keep the stream open.
+
+    Returns:
+        Iterator: The server-sent events.
+    """
+    queue = _hub.subscribe(establishment_id)
+    try:
+        yield "retry: 3000\n\n"
+        yield f"event: snapshot\ndata: {snapshot()}\n\n"
+        while True:
+            try:
+                message = queue.get(timeout=heartbeat_seconds)
+            except Empty:
+                yield ": keep-alive\n\n"
+                continue
+            event = "refresh" if message == REFRESH_EVENT else "slots"
+            yield f"event: {event}\ndata: {message}\n\n"
+    finally:
+        _hub.unsubscribe(establishment_id, queue)
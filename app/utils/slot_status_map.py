@@ -0,0 +1,273 @@
+"""
+    Redis copy of the slot grid of every establishment, so the slot-grid reads do not touch
+    the database. The slots of an establishment are stored once as JSON, and their statuses
+    in a Redis string of 4-bit fields indexed by the slot's ordinal in the grid.
+
+    A status change is written through to its field with BITFIELD once the transaction that
+    made it commits. Any other slot write drops the grid, and the next read rebuilds it from
+    the database. When SLOT_STATUS_EVENTS_ENABLED is set, the same writes are also published
+    on the establishment's channel for the live slot status streams.
+"""
+
+from json import dumps, loads
+from logging import getLogger
+from os import getenv
+from threading import Lock
+from typing import Callable, Iterable
+
+from redis import Redis, RedisError, WatchError
+from sqlalchemy import event
+
+from app.utils.engine import session_local
+
+logger = getLogger(__name__)
+
+# The 4-bit code of every slot status, 0 being a missing status.
+STATUS_CODES = {"open": 1, "occupied": 2, "reserved": 3, "closed": 4}
+STATUSES = (None, *STATUS_CODES)
+
+# Bumps the version of the grid and renews the TTL of its keys, then sets the status field
+# of every slot present in it. KEYS: the slots, ordinals, statuses and version keys.
+# ARGV: the TTL, then slot_id, code pairs.
+SET_STATUSES_SCRIPT = """
+redis.call('INCR', KEYS[4])
+for i = 1, #KEYS do
+    redis.call('EXPIRE', KEYS[i], ARGV[1])
+end
+for i = 2, #ARGV, 2 do
+    local ordinal = redis.call('HGET', KEYS[2], ARGV[i])
+    if ordinal then
+        redis.call('BITFIELD', KEYS[3], 'SET', 'u4', '#' .. ordinal, ARGV[i + 1])
+    end
+end
+return 1
+"""
+
+EVENTS_CHANNEL_PREFIX = "slot_status:"
+
+_lock = Lock()
+_client = None  # pylint: disable=invalid-name
+_set_statuses = None  # pylint: disable=invalid-name
+
+
+def is_enabled() -> bool:
+    """Whether the slot grids are kept in Redis."""
+    return getenv("SLOT_STATUS_MAP_ENABLED", "false").lower() == "true"
+
+
+def events_enabled() -> bool:
+    """Whether the slot status changes are published for the live slot status streams."""
+    return getenv("SLOT_STATUS_EVENTS_ENABLED", "false").lower() == "true"
+
+
+def get_ttl() -> int:
+    """
+    The seconds a grid is kept after its last write, which bounds how long a grid stays
+    stale when its write-through failed.
+    """
+    return int(getenv("SLOT_STATUS_MAP_TTL_SECONDS", "3600"))
+
+
+def get_redis_url() -> str:
+    """Return the URL of the Redis server."""
+    return getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def get_client() -> Redis:
+    """Return the Redis client, creating it on first use."""
+    global _client, _set_statuses  # pylint: disable=W0603
+    with _lock:
+        if _client is None:
+            timeout = float(getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "0.1"))
+            _client = Redis.from_url(
+                get_redis_url(),
+                socket_timeout=timeout,
+                socket_connect_timeout=timeout,
+            )
+            _set_statuses = _client.register_script(SET_STATUSES_SCRIPT)
+        return _client
+
+
+def grid_keys(establishment_id: int) -> tuple[str, str, str, str]:
+    """
+    Return the slots, ordinals, statuses and version keys of the grid of an establishment.
+    They share a hash tag, so they live on the same Redis Cluster node.
+    """
+    prefix = f"slot_grid:{{{establishment_id}}}"
+    return f"{prefix}:slots", f"{prefix}:ordinals", f"{prefix}:statuses", f"{prefix}:version"
+
+
+def events_channel(establishment_id: int) -> str:
+    """Return the channel the slot status changes of an establishment are published on."""
+    return f"{EVENTS_CHANNEL_PREFIX}{establishment_id}"
+
+
+def encode_statuses(slots: list[dict]) -> bytes:
+    """Pack the status of every slot into 4-bit fields, the first slot in the high bits."""
+    statuses = bytearray((len(slots) + 1) // 2)
+    for ordinal, slot in enumerate(slots):
+        code = STATUS_CODES.get(slot.get("slot_status"), 0)
+        statuses[ordinal // 2] |= code << 4 if ordinal % 2 == 0 else code
+    return bytes(statuses)
+
+
+def decode_slots(slots: bytes, statuses: bytes) -> list[dict]:
+    """Read the slots of a grid and overwrite their status with the status fields."""
+    slots = loads(slots)
+    size = len(statuses)
+    for ordinal, slot in enumerate(slots):
+        field = statuses[ordinal // 2] if ordinal // 2 < size else 0
+        slot["slot_status"] = STATUSES[field >> 4 if ordinal % 2 == 0 else field & 0x0F]
+    return slots
+
+
+def get_slots(establishment_id: int, load: Callable[[int], list[dict]]) -> list[dict]:
+    """
+    Get the slots of an establishment from its grid in Redis, rebuilding the grid when it
+    is missing. The database is read instead when Redis is unavailable.
+
+    Parameters:
+        establishment_id (int): The ID of the establishment.
+        load (Callable): Reads the slots of an establishment from the database.
+
+    Returns:
+        list: The slots, shaped like the result of load.
+    """
+    slots_key, _, statuses_key, _ = grid_keys(establishment_id)
+    try:
+        slots, statuses = get_client().pipeline(transaction=False).get(
+            slots_key
+        ).get(statuses_key).execute()
+    except RedisError as error:
+        logger.warning("Cannot read the slot grid of %s: %s", establishment_id, error)
+        return load(establishment_id)
+    if slots is not None and statuses is not None:
+        return decode_slots(slots, statuses)
+    return rebuild(establishment_id, load)
+
+
+def rebuild(establishment_id: int, load: Callable[[int], list[dict]]) -> list[dict]:
+    """
+    Rebuild the grid of an establishment from the database. The grid is not stored when
+    a slot write was committed meanwhile, since the slots read may not include it.
+
+    Parameters:
+        establishment_id (int): The ID of the establishment.
+        load (Callable): Reads the slots of an establishment from the database.
+
+    Returns:
+        list: The slots read from the database.
+    """
+    slots_key, ordinals_key, statuses_key, version_key = grid_keys(establishment_id)
+    ttl = get_ttl()
+    slots = None
+    try:
+        with get_client().pipeline() as pipe:
+            pipe.watch(version_key)
+            slots = load(establishment_id)
+            pipe.multi()
+            pipe.delete(ordinals_key)
+            if slots:
+                pipe.hset(ordinals_key, mapping={
+                    slot["slot_id"]: ordinal for ordinal, slot in enumerate(slots)
+                })
+            pipe.set(slots_key, dumps(slots, separators=(",", ":")), ex=ttl)
+            pipe.set(statuses_key, encode_statuses(slots), ex=ttl)
+            pipe.expire(ordinals_key, ttl)
+            pipe.execute()
+    except WatchError:
+        # A slot write was committed during the read; the next read rebuilds the grid.
+        pass
+    except RedisError as error:
+        logger.warning("Cannot rebuild the slot grid of %s: %s", establishment_id, error)
+    return slots if slots is not None else load(establishment_id)
+
+
+def queue_status_changes(session, changes: Iterable[tuple]):
+    """
+    Queue status changes to be written to the grids once the session commits.
+
+    Parameters:
+        session: The session making the changes.
+        changes: (establishment_id, slot_id, new_status) tuples.
+    """
+    if not is_enabled() and not events_enabled():
+        return
+    statuses = session.info.setdefault("slot_grid_statuses", {})
+    for establishment_id, slot_id, new_status in changes:
+        statuses.setdefault(establishment_id, {})[slot_id] = getattr(
+            new_status, "value", new_status
+        )
+
+
+def queue_invalidation(session, establishment_ids: Iterable[int]):
+    """Queue dropping the grids of establishments once the session commits."""
+    if not is_enabled() and not events_enabled():
+        return
+    session.info.setdefault("slot_grid_invalidations", set()).update(establishment_ids)
+
+
+@event.listens_for(session_local, "after_commit")
+def write_through_slot_grids(session):
+    """
+    Write the queued status changes and invalidations of a committed session, and publish
+    them, in one round trip.
+    """
+    statuses = session.info.pop("slot_grid_statuses", {})
+    invalidations = session.info.pop("slot_grid_invalidations", set())
+    if not statuses and not invalidations:
+        return
+    try:
+        pipe = get_client().pipeline(transaction=False)
+        if is_enabled():
+            write_grids(pipe, statuses, invalidations)
+        if events_enabled():
+            publish_events(pipe, statuses, invalidations)
+        pipe.execute()
+    except RedisError as error:
+        logger.error(
+            "Cannot write the slot grids of %s through: %s",
+            sorted({*statuses, *invalidations}), error,
+        )
+
+
+def write_grids(pipe, statuses: dict, invalidations: set):
+    """Queue the grid writes of committed status changes and invalidations on a pipeline."""
+    ttl = get_ttl()
+    for establishment_id in invalidations:
+        slots_key, ordinals_key, statuses_key, version_key = grid_keys(establishment_id)
+        pipe.delete(slots_key, ordinals_key, statuses_key)
+        pipe.incr(version_key)
+        pipe.expire(version_key, ttl)
+    for establishment_id, slot_statuses in statuses.items():
+        if establishment_id in invalidations:
+            continue
+        arguments = [ttl]
+        for slot_id, status in slot_statuses.items():
+            arguments += [slot_id, STATUS_CODES.get(status, 0)]
+        _set_statuses(keys=list(grid_keys(establishment_id)), args=arguments, client=pipe)
+
+
+def publish_events(pipe, statuses: dict, invalidations: set):
+    """
+    Queue publishing committed status changes and invalidations on a pipeline. A status
+    change is published as the new status of each slot, an invalidation as a refresh.
+    """
+    for establishment_id in invalidations:
+        pipe.publish(events_channel(establishment_id), dumps({"refresh": True}))
+    for establishment_id, slot_statuses in statuses.items():
+        if establishment_id in invalidations:
+            continue
+        pipe.publish(events_channel(establishment_id), dumps({
+            "slots": [
+                {"slot_id": slot_id, "slot_status": status}
+                for slot_id, status in slot_statuses.items()
+            ]
+        }))
+
+
+@event.listens_for(session_local, "after_rollback")
+def forget_slot_grid_writes(session):
+    """Drop the queued grid writes of a rolled back session."""
+    session.info.pop("slot_grid_statuses", None)
+    session.info.pop("slot_grid_invalidations", None)
@@ -0,0 +1,142 @@
+"""
+    In-process spatial index answering nearest and radius queries over the coordinates of
+    the searchable establishments without a database round trip.
+
+    The points are kept in NumPy arrays sorted by latitude, so the latitude band of a
+    query's bounding box is found by binary search. The longitude bounds are checked on
+    that band, and the exact haversine distance is computed, vectorized, only for the
+    points left. A nearest query widens its radius until it holds enough points.
+
+    A query picks the current arrays under a lock, and they are replaced, never modified,
+    so the search itself runs unlocked. The arrays are refreshed like every ReloadingIndex.
+"""
+
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+from app.utils.reloading_index import ReloadingIndex
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180
+# Half the circumference: every point on Earth is within this distance.
+MAX_DISTANCE_KM = EARTH_RADIUS_KM * np.pi
+
+
+class IndexedPoints(NamedTuple):
+    """The points of the index, sorted by latitude."""
+    ids: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+
+
+class SpatialIndex(ReloadingIndex):
+    """Nearest and radius queries over (id, latitude, longitude) points."""
+
+    def __init__(
+        self,
+        load: Callable[[Optional[list[int]]], list[tuple]],
+        max_age_seconds: float = 300,
+        initial_radius_km: float = 2,
+    ):
+        """
+        Parameters:
+            load: Reads the (id, latitude, longitude) of the points to index, all of them
+                when given None, otherwise those among the given ids that are still to
+                be indexed.
+            max_age_seconds: The age after which the whole index is reloaded.
+            initial_radius_km: The first radius a nearest query looks within.
+        """
+        super().__init__(load, max_age_seconds)
+        self.initial_radius_km = initial_radius_km
+
+    def nearest(  # pylint: disable=too-many-arguments
+        self, latitude: float, longitude: float, k: int, *, radius_km: float = None,
+        after: tuple = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Get the k points nearest to coordinates, nearest first and by id on ties.
+
+        Parameters:
+            latitude (float): The latitude of the location.
+            longitude (float): The longitude of the location.
+            k (int): The number of points to return.
+            radius_km (float): Only return the points within this distance, if given.
+            after (tuple): The (distance, id) the points must be ordered after.
+
+        Returns:
+            list: The (id, distance in km) of the points.
+        """
+        points = self._current_points()
+        limit = MAX_DISTANCE_KM if radius_km is None else radius_km
+        radius = min(max(self.initial_radius_km, after[0] * 2 if after else 0), limit)
+        while True:
+            ids, distances = self._within(points, latitude, longitude, radius)
+            if after is not None:
+                later = (distances > after[0]) | ((distances == after[0]) & (ids > after[1]))
+                ids, distances = ids[later], distances[later]
+            # Every point within the radius is found, so the first k of them are the nearest.
+            if len(ids) >= k or radius >= limit:
+                order = np.lexsort((ids, distances))[:k]
+                return list(zip(ids[order].tolist(), distances[order].tolist()))
+            radius = min(radius * 4, limit)
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> list[tuple]:
+        """Get the (id, distance in km) of every point within a radius, nearest first."""
+        ids, distances = self._within(self._current_points(), latitude, longitude, radius_km)
+        order = np.lexsort((ids, distances))
+        return list(zip(ids[order].tolist(), distances[order].tolist()))
+
+    @staticmethod
+    def _within(points: IndexedPoints, latitude: float, longitude: float, radius_km: float):
+        latitude_delta = radius_km / KM_PER_DEGREE
+        start = np.searchsorted(points.latitudes, latitude - latitude_delta, side="left")
+        stop = np.searchsorted(points.latitudes, latitude + latitude_delta, side="right")
+        ids = points.ids[start:stop]
+        latitudes = points.latitudes[start:stop]
+        longitudes = points.longitudes[start:stop]
+        if abs(latitude) + latitude_delta < 90:
+            longitude_delta = np.degrees(np.arcsin(min(
+                1.0, np.sin(np.radians(latitude_delta)) / np.cos(np.radians(latitude))
+            )))
+            # The difference wrapped to [-180, 180), so the box may cross the antimeridian.
+            in_band = np.abs((longitudes - longitude + 180) % 360 - 180) <= longitude_delta
+            ids, latitudes, longitudes = ids[in_band], latitudes[in_band], longitudes[in_band]
+        distances = haversine_km(latitude, longitude, latitudes, longitudes)
+        within_radius = distances <= radius_km
+        return ids[within_radius], distances[within_radius]
+
+    def _current_points(self) -> IndexedPoints:
+        self._refresh()
+        with self._lock:
+            return self._snapshot
+
+    def _build(self, rows: list[tuple]) -> IndexedPoints:
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        latitudes = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        longitudes = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(latitudes, kind="stable")
+        return IndexedPoints(ids[order], latitudes[order], longitudes[order])
+
+    def _update(self, snapshot: IndexedPoints, ids: set[int], rows: list[tuple]) -> IndexedPoints:
+        points = snapshot
+        kept = ~np.isin(points.ids, np.fromiter(ids, dtype=np.int64, count=len(ids)))
+        added = self._build(rows)
+        latitudes = np.concatenate((points.latitudes[kept], added.latitudes))
+        order = np.argsort(latitudes, kind="stable")
+        return IndexedPoints(
+            np.concatenate((points.ids[kept], added.ids))[order],
+            latitudes[order],
+            np.concatenate((points.longitudes[kept], added.longitudes))[order],
+        )
+
+
+def haversine_km(latitude: float, longitude: float, latitudes, longitudes) -> np.ndarray:
+    """Get the great-circle distances in km from coordinates to arrays of coordinates."""
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = (
+        np.sin((latitudes - latitude) / 2) ** 2
+        + np.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -0,0 +1,79 @@
+"""
+    Weekly schedules as sorted, disjoint (start, end) intervals of minutes of the week, in
+    Asia/Manila time, minute 0 being Monday 00:00. Whether a schedule is open at a minute
+    is found by binary search over its intervals, and at most eight intervals are needed
+    for the seven OperatingHour rows of an establishment.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, time
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+SCHEDULE_TIMEZONE = ZoneInfo("Asia/Manila")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAYS_OF_WEEK = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+ALWAYS_OPEN = [(0, MINUTES_PER_WEEK)]
+
+
+def minute_of_week(moment: datetime = None) -> int:
+    """
+    Get the minute of the week of a moment in Asia/Manila time, of now when not given. A
+    naive moment is taken as Asia/Manila time.
+    """
+    if moment is None:
+        moment = datetime.now(SCHEDULE_TIMEZONE)
+    elif moment.tzinfo is None:
+        moment = moment.replace(tzinfo=SCHEDULE_TIMEZONE)
+    else:
+        moment = moment.astimezone(SCHEDULE_TIMEZONE)
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def build_intervals(days: Iterable[tuple], is24_7: bool = False) -> list[tuple[int, int]]:
+    """
+    Build the intervals of a weekly schedule.
+
+    Parameters:
+        days: (day_of_week, is_enabled, opening_time, closing_time) tuples, a closing time
+            not after the opening time closing on the next day.
+        is24_7 (bool): Whether the establishment never closes, whatever its days.
+
+    Returns:
+        list: The sorted, disjoint (start, end) minutes of the week it is open, the end
+            excluded.
+    """
+    if is24_7:
+        return list(ALWAYS_OPEN)
+    intervals = []
+    for day_of_week, is_enabled, opening_time, closing_time in days:
+        if not is_enabled or opening_time is None or closing_time is None:
+            continue
+        day_start = DAYS_OF_WEEK.index(day_of_week.lower()) * MINUTES_PER_DAY
+        start = day_start + _minute_of_day(opening_time)
+        end = day_start + _minute_of_day(closing_time)
+        if end <= start:
+            end += MINUTES_PER_DAY
+        if end > MINUTES_PER_WEEK:
+            # Open past Sunday midnight, into the start of the week.
+            intervals += [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
+        else:
+            intervals.append((start, end))
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def is_open_at(intervals: list[tuple[int, int]], minute: int) -> bool:
+    """Whether a schedule built by build_intervals is open at a minute of the week."""
+    position = bisect_right(intervals, (minute, MINUTES_PER_WEEK))
+    return position > 0 and minute < intervals[position - 1][1]
@@ -0,0 +1,101 @@
+"""
+    Time the trigram search of establishment names, misspelled ones included, and print
+    the EXPLAIN ANALYZE plan of the search statement of each name, to check that it reads
+    the ix_parking_establishment_name_trgm GIN index rather than scanning the table. The
+    search ranks every establishment it finds, so its time grows with their number: the
+    summary gives it for each name, against the 10ms target.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema and the pg_trgm extension, seeding it on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.establishment_name_search \
+            --seed 100000 --slots 1
+"""
+
+# pylint: disable=E1102
+
+from argparse import ArgumentParser
+from statistics import quantiles
+from time import perf_counter
+
+from sqlalchemy import func, select, text
+
+from app import create_app
+from app.models.parking_establishment import ParkingEstablishmentRepository
+from app.utils.db import session_scope
+from app.utils.pagination import keyset_statement
+from benchmarks.seed import seed_establishments
+
+# Misspelled place names, misspelled and exact common words, each in a few percent of the
+# seeded names, and a name none of them resembles.
+NAMES = (
+    "Tabunk", "Malagn Mal", "SM Megmall", "Robinsns Plaza", "Ortigas", "Shangri-La",
+)
+INDEX_NAME = "ix_parking_establishment_name_trgm"
+TARGET_MS = 10
+
+
+def explain(session, name: str) -> list[str]:
+    """Get the EXPLAIN ANALYZE plan of the first page of the search of a name."""
+    session.execute(ParkingEstablishmentRepository.name_similarity_statement())
+    compiled = keyset_statement(
+        ParkingEstablishmentRepository.search_statement(name),
+        ParkingEstablishmentRepository.search_sort_key(establishment_name=name),
+    ).compile(session.get_bind())
+    return session.connection().exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS) {compiled}", compiled.params
+    ).scalars().all()
+
+
+def count_matches(session, name: str) -> int:
+    """Count the establishments the search of a name finds, on every page."""
+    session.execute(ParkingEstablishmentRepository.name_similarity_statement())
+    return session.execute(select(func.count()).select_from(
+        ParkingEstablishmentRepository.search_statement(name).subquery()
+    )).scalar()
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--slots", type=int, default=5, help="Slots of each seeded one.")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    create_app()
+    if args.seed:
+        seed_establishments(args.seed, slots=args.slots)
+    with session_scope() as session:
+        session.execute(text("ANALYZE"))
+        establishments = session.execute(
+            text("SELECT count(*) FROM parking_establishment")
+        ).scalar()
+    print(f"{establishments} establishments, {args.repeat} searches of each name")
+    results = []
+    for name in NAMES:
+        with session_scope() as session:
+            plan = explain(session, name)
+        with session_scope() as session:
+            matches = count_matches(session, name)
+        print(f"\n{name}: {'uses' if any(INDEX_NAME in line for line in plan) else 'SKIPS'} "
+              f"{INDEX_NAME}")
+        for line in plan:
+            print(f"  {line}")
+        timings = []
+        for _ in range(args.repeat):
+            started = perf_counter()
+            ParkingEstablishmentRepository.search_establishments(name)
+            timings.append((perf_counter() - started) * 1000)
+        percentiles = quantiles(timings, n=100)
+        results.append((name, matches, percentiles[49], percentiles[94]))
+
+    print(f"\n{'name':<16}{'matches':>8}{'p50':>9}{'p95':>9}  within {TARGET_MS}ms")
+    for name, matches, p50, p95 in results:
+        print(
+            f"{name:<16}{matches:>8}{p50:>7.1f}ms{p95:>7.1f}ms  "
+            f"{'yes' if p50 < TARGET_MS else 'no'}"
+        )
+
+if __name__ == "__main__":
+    main()
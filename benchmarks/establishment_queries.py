@@ -0,0 +1,113 @@
+"""
+    Time the public establishment endpoints under concurrent requests: /establishment/query
+    searches by location and by name, and /establishment/view reads one establishment.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding it on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.establishment_queries \
+            --seed 2000 --threads 16 --requests 2000
+"""
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+from statistics import quantiles
+from threading import local
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app import create_app
+from app.models.parking_establishment import ParkingEstablishment
+from app.utils.db import session_scope
+from benchmarks.seed import NAME_WORDS, seed_establishments
+
+ENDPOINTS = ("query by location", "query by name", "view")
+
+
+def build_requests(uuids: list[str], count: int, seed: int = 7) -> list[tuple[str, str, dict]]:
+    """Build count (endpoint, path, query string) requests, the endpoints in turn."""
+    random = Random(seed)
+    requests = []
+    for number in range(count):
+        endpoint = ENDPOINTS[number % len(ENDPOINTS)]
+        if endpoint == "query by location":
+            query = {
+                "user_latitude": round(14.4 + random.random() * 0.4, 6),
+                "user_longitude": round(120.9 + random.random() * 0.3, 6),
+            }
+            requests.append((endpoint, "/api/v1/establishment/query", query))
+        elif endpoint == "query by name":
+            query = {"establishment_name": random.choice(NAME_WORDS)}
+            requests.append((endpoint, "/api/v1/establishment/query", query))
+        else:
+            query = {"establishment_uuid": random.choice(uuids)}
+            requests.append((endpoint, "/api/v1/establishment/view", query))
+    return requests
+
+
+def run(app, requests: list, threads: int) -> tuple[float, dict[str, list[float]]]:
+    """
+    Send the requests from a number of threads.
+
+    Returns:
+        tuple: The seconds taken, and the latencies of each endpoint in milliseconds.
+    """
+    clients = local()
+
+    def send(request):
+        endpoint, path, query = request
+        if not hasattr(clients, "client"):
+            clients.client = app.test_client()
+        started = perf_counter()
+        response = clients.client.get(path, query_string=query)
+        elapsed = (perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} answered {response.status_code}: {response.text}")
+        return endpoint, elapsed
+
+    started = perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(send, requests))
+    seconds = perf_counter() - started
+    latencies = {endpoint: [] for endpoint in ENDPOINTS}
+    for endpoint, elapsed in results:
+        latencies[endpoint].append(elapsed)
+    return seconds, latencies
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.seed:
+        seed_establishments(args.seed)
+    with session_scope() as session:
+        uuids = [
+            str(establishment_uuid) for establishment_uuid in session.execute(
+                select(ParkingEstablishment.uuid)
+                .where(ParkingEstablishment.verified.is_(True))
+                .limit(1000)
+            ).scalars()
+        ]
+    requests = build_requests(uuids, args.requests)
+    print(f"{args.requests} requests from {args.threads} threads")
+    run(app, requests[:100], args.threads)
+    seconds, latencies = run(app, requests, args.threads)
+    print(f"{args.requests / seconds:.0f} requests/s")
+    for endpoint, values in latencies.items():
+        percentiles = quantiles(values, n=100)
+        print(
+            f"  {endpoint}: p50 {percentiles[49]:.1f}ms, p95 {percentiles[94]:.1f}ms, "
+            f"p99 {percentiles[98]:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+    Time the establishment suggestions of /establishment/suggest, the way the search box
+    asks for them: for every prefix of the words of the seeded names, one to six characters
+    long. Each prefix is looked up in ESTABLISHMENT_NAME_INDEX alone and requested from
+    the endpoint, whose X-DB-Statements header shows it did not read the database. The
+    summary gives the latency percentiles against the 5ms p99 target.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding it on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.establishment_suggestions \
+            --seed 100000
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from statistics import quantiles
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app import create_app
+from app.models.parking_establishment import ESTABLISHMENT_NAME_INDEX, ParkingEstablishment
+from app.utils.db import session_scope
+from benchmarks.seed import seed_establishments
+
+TARGET_P99_MS = 5
+PATH = "/api/v1/establishment/suggest"
+
+
+def typed_prefixes(names: list[str], count: int, seed: int = 5) -> list[str]:
+    """Draw count prefixes of one to six characters of the words of names."""
+    random = Random(seed)
+    prefixes = []
+    while len(prefixes) < count:
+        word = random.choice(random.choice(names).split())
+        prefixes.append(word[:random.randint(1, 6)])
+    return prefixes
+
+
+def time_suggestions(client, prefixes: list[str]) -> tuple[list, list, int]:
+    """
+    Look every prefix up in the index, then request it from the endpoint.
+
+    Returns:
+        tuple: The milliseconds of every lookup and request, and the number of database
+            statements the requests ran.
+    """
+    lookups, requests, statements = [], [], 0
+    for prefix in prefixes:
+        started = perf_counter()
+        ESTABLISHMENT_NAME_INDEX.lookup(prefix)
+        lookups.append((perf_counter() - started) * 1000)
+        started = perf_counter()
+        response = client.get(PATH, query_string={"q": prefix})
+        requests.append((perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{PATH} answered {response.status_code}: {response.text}")
+        statements += int(response.headers["X-DB-Statements"])
+    return lookups, requests, statements
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config["DB_REQUEST_STATS"] = True
+    if args.seed:
+        seed_establishments(args.seed, slots=1)
+    with session_scope() as session:
+        names = list(session.execute(
+            select(ParkingEstablishment.name).where(ParkingEstablishment.verified)
+        ).scalars())
+    started = perf_counter()
+    ESTABLISHMENT_NAME_INDEX.lookup("a")
+    print(f"{len(names)} establishments indexed in {perf_counter() - started:.2f}s")
+
+    prefixes = typed_prefixes(names, args.repeat)
+    lookups, requests, statements = time_suggestions(app.test_client(), prefixes)
+    print(f"{len(prefixes)} prefixes, {statements} database statements in all the requests")
+    print(f"{'':<10}{'p50':>9}{'p95':>9}{'p99':>9}  p99 within {TARGET_P99_MS}ms")
+    for name, timings in (("index", lookups), ("endpoint", requests)):
+        percentiles = quantiles(timings, n=100)
+        print(
+            f"{name:<10}{percentiles[49]:>7.3f}ms{percentiles[94]:>7.3f}ms"
+            f"{percentiles[98]:>7.3f}ms  {'yes' if percentiles[98] < TARGET_P99_MS else 'no'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+    Time the first page of the establishments nearest to a user as it is now (found by the
+    in-process ESTABLISHMENT_INDEX, then read with one IN query) and as it was before (the
+    database search ordering every verified establishment by distance), and check that
+    both return the same establishments in the same order.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding it on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.nearest_establishments \
+            --seed 100000
+"""
+
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+
+from app import create_app
+from app.models.parking_establishment import (
+    ESTABLISHMENT_INDEX, ParkingEstablishmentRepository
+)
+from app.utils.spatial_index import MAX_DISTANCE_KM
+from benchmarks.point_lookups import time_calls
+from benchmarks.seed import seed_establishments, user_locations
+
+PAGE_SIZE = 50
+
+
+def nearest_before(location):
+    """The first page of GetEstablishmentService.get_establishments before the index."""
+    latitude, longitude = location
+    return ParkingEstablishmentRepository.search_establishments(
+        user_longitude=longitude, user_latitude=latitude, limit=PAGE_SIZE
+    )[0]
+
+
+def nearest_indexed(location):
+    """The nearest establishments found by the index alone."""
+    latitude, longitude = location
+    return ESTABLISHMENT_INDEX.nearest(latitude, longitude, PAGE_SIZE + 1)
+
+
+def nearest_after(location):
+    """The first page of GetEstablishmentService.get_nearest_establishments."""
+    return ParkingEstablishmentRepository.get_nearest_establishments(
+        nearest_indexed(location)[:PAGE_SIZE]
+    )
+
+
+def main():
+    """Run the benchmark."""
+    create_app()
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_establishments(args.seed, slots=1)
+    started = perf_counter()
+    # Loads the index, every point being within MAX_DISTANCE_KM.
+    indexed = len(ESTABLISHMENT_INDEX.within(0, 0, MAX_DISTANCE_KM))
+    print(f"{indexed} establishments indexed in {perf_counter() - started:.2f}s")
+    locations = user_locations(50)
+    for location in locations[:5]:
+        before = [establishment["uuid"] for establishment in nearest_before(location)]
+        after = [establishment["uuid"] for establishment in nearest_after(location)]
+        assert before == after, f"the nearest establishments of {location} differ"
+
+    searches = (
+        ("before: database search", nearest_before),
+        ("after: index and IN query", nearest_after),
+        ("index alone", nearest_indexed),
+    )
+    time_calls(tuple(search for _, search in searches), locations, 10)
+    timings = time_calls(tuple(search for _, search in searches), locations, args.repeat)
+    before = median(timings[0])
+    print(f"first page of {PAGE_SIZE}, {args.repeat} searches each")
+    for (name, _), search_timings in zip(searches, timings):
+        print(
+            f"{name}: median {median(search_timings) / 1000:.2f}ms "
+            f"({median(search_timings) / before - 1:+.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
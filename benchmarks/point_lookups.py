@@ -0,0 +1,137 @@
+"""
+    Time the hot point lookups per call, as they are now (cached lambda statements) and as
+    they were before (a new ORM Query or select built for every call), on the same engine.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding it on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.point_lookups --seed 1000
+
+    Rerun it with DATABASE_TRANSACTION_POOLER=true to time the lookups without server-side
+    prepared statements.
+"""
+
+from argparse import ArgumentParser
+from random import Random
+from statistics import mean, median
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app import create_app
+from app.models.company_profile import CompanyProfile, CompanyProfileRepository
+from app.models.parking_establishment import ParkingEstablishment
+from app.models.parking_slot import ParkingSlot
+from app.models.user import User, UserRepository
+from app.utils.db import session_scope
+from app.utils.engine import get_connect_args, get_engine
+from benchmarks.seed import seed_establishments
+
+
+def slot_id_before(uuid):
+    """ParkingSlot.get_id before the lambda statements."""
+    with session_scope() as session:
+        slot = session.query(ParkingSlot).filter_by(uuid=uuid).first()
+        return slot.slot_id
+
+
+def establishment_id_before(establishment_uuid):
+    """ParkingEstablishment.get_establishment_id before the lambda statements."""
+    with session_scope() as session:
+        establishment = (
+            session.query(ParkingEstablishment)
+            .filter(ParkingEstablishment.uuid == establishment_uuid)
+            .first()
+        )
+        return establishment.establishment_id
+
+
+def user_before(user_id):
+    """UserRepository.get_user by ID before the lambda statements."""
+    with session_scope() as session:
+        user = session.execute(select(User).where(User.user_id == user_id)).scalar()
+        user_info = user.to_dict()
+        user_info.pop("otp_secret")
+        return user_info
+
+
+def company_profile_before(user_id):
+    """CompanyProfileRepository.get_company_profile by user ID before the lambda statements."""
+    with session_scope() as session:
+        company_profile = session.query(CompanyProfile).filter_by(user_id=user_id).first()
+        return company_profile.to_dict() if company_profile else {}
+
+
+def time_calls(lookups: tuple, arguments: list, repeat: int) -> list[list[float]]:
+    """
+    Call lookups in turn repeat times, cycling through the arguments, so a slowdown of the
+    machine affects them alike.
+
+    Returns:
+        list: The microseconds of every call, for each lookup.
+    """
+    timings = [[] for _ in lookups]
+    for number in range(repeat):
+        argument = arguments[number % len(arguments)]
+        for lookup, lookup_timings in zip(lookups, timings):
+            started = perf_counter()
+            lookup(argument)
+            lookup_timings.append((perf_counter() - started) * 1_000_000)
+    return timings
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    create_app()
+    if args.seed:
+        seed_establishments(args.seed)
+    random = Random(3)
+    with session_scope() as session:
+        slot_uuids = session.execute(select(ParkingSlot.uuid).limit(1000)).scalars().all()
+        establishment_uuids = session.execute(
+            select(ParkingEstablishment.uuid).limit(1000)
+        ).scalars().all()
+        user_ids = session.execute(select(CompanyProfile.user_id)).scalars().all()
+    slot_uuids, establishment_uuids = list(slot_uuids), list(establishment_uuids)
+    random.shuffle(slot_uuids)
+    random.shuffle(establishment_uuids)
+
+    lookups = (
+        ("ParkingSlot.get_id", slot_id_before, ParkingSlot.get_id, slot_uuids),
+        (
+            "ParkingEstablishment.get_establishment_id", establishment_id_before,
+            ParkingEstablishment.get_establishment_id, establishment_uuids,
+        ),
+        (
+            "UserRepository.get_user", user_before,
+            lambda user_id: UserRepository.get_user(user_id=user_id), user_ids,
+        ),
+        (
+            "CompanyProfileRepository.get_company_profile", company_profile_before,
+            lambda user_id: CompanyProfileRepository.get_company_profile(user_id=user_id),
+            user_ids,
+        ),
+    )
+    print(
+        f"{args.repeat} calls each, connect args "
+        f"{get_connect_args(get_engine().url.render_as_string(hide_password=False))}"
+    )
+    for name, before, after, arguments in lookups:
+        # The warm-up fills the caches and gets the statements prepared.
+        time_calls((before, after), arguments, 200)
+        before_timings, after_timings = time_calls((before, after), arguments, args.repeat)
+        print(
+            f"{name}: before median {median(before_timings):.0f}us "
+            f"(mean {mean(before_timings):.0f}us), after median {median(after_timings):.0f}us "
+            f"(mean {mean(after_timings):.0f}us), "
+            f"{median(after_timings) / median(before_timings) - 1:+.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
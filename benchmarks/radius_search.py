@@ -0,0 +1,131 @@
+"""
+    Time the distance ordering of the location search as it is now (the first page of the
+    establishments within a radius, prefiltered by the bounding box of the circle on the
+    ix_parking_establishment_verified_location index, with the exact distance computed for
+    the candidates only) and as it was before (the spherical-law-of-cosines distance
+    computed for every verified establishment, all of them sorted, without a radius or a
+    limit). The whole search of the first page, with its slot counts and pricing plans, is
+    timed for every radius too.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding it on the first run, then again after topping it up to
+    100k establishments:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.radius_search --seed 10000
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.radius_search --seed 90000
+"""
+
+# pylint: disable=E1102
+
+from argparse import ArgumentParser
+from statistics import median
+
+from sqlalchemy import func, select, text
+
+from app import create_app
+from app.models.parking_establishment import (
+    ParkingEstablishment, ParkingEstablishmentRepository
+)
+from app.utils.db import session_scope
+from benchmarks.point_lookups import time_calls
+from benchmarks.seed import seed_establishments, user_locations
+
+RADII_KM = (1, 5, 25)
+PAGE_SIZE = 50
+INDEX_NAME = "ix_parking_establishment_verified_location"
+
+
+def search_before(location):
+    """The location search before the radius, ordered by ParkingEstablishment.order_by_distance."""
+    latitude, longitude = location
+    distance = 6371 * func.acos(
+        func.cos(func.radians(latitude))
+        * func.cos(func.radians(ParkingEstablishment.latitude))
+        * func.cos(func.radians(ParkingEstablishment.longitude) - func.radians(longitude))
+        + func.sin(func.radians(latitude)) * func.sin(func.radians(ParkingEstablishment.latitude))
+    )
+    with session_scope(read_only=True) as session:
+        return session.execute(
+            select(ParkingEstablishment.establishment_id, distance)
+            .where(ParkingEstablishment.verified.is_(True))
+            .order_by(distance.asc())
+        ).all()
+
+
+def nearest_within(radius_km):
+    """Build the ordering of the first page of the establishments within a radius."""
+    def nearest(location):
+        latitude, longitude = location
+        distance = ParkingEstablishment.distance_from(latitude, longitude)
+        with session_scope(read_only=True) as session:
+            return session.execute(
+                select(ParkingEstablishment.establishment_id, distance)
+                .where(
+                    ParkingEstablishment.verified,
+                    *ParkingEstablishment.within_radius(latitude, longitude, radius_km),
+                )
+                .order_by(distance.asc())
+                .limit(PAGE_SIZE)
+            ).all()
+    return nearest
+
+
+def search_within(radius_km):
+    """Build the whole search of the first page of the establishments within a radius."""
+    def search(location):
+        latitude, longitude = location
+        return ParkingEstablishmentRepository.search_establishments(
+            user_longitude=longitude, user_latitude=latitude, radius_km=radius_km,
+            limit=PAGE_SIZE,
+        )[0]
+    return search
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    create_app()
+    if args.seed:
+        seed_establishments(args.seed, slots=1)
+    locations = user_locations(50)
+    with session_scope() as session:
+        session.execute(text("ANALYZE parking_establishment"))
+        establishments = session.execute(
+            select(func.count()).where(ParkingEstablishment.verified.is_(True))
+        ).scalar()
+        latitude, longitude = locations[0]
+        compiled = select(ParkingEstablishment.establishment_id).where(
+            ParkingEstablishment.verified,
+            *ParkingEstablishment.within_radius(latitude, longitude, RADII_KM[0]),
+        ).compile(session.get_bind())
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN {compiled}", compiled.params
+        ).scalars().all()
+    print(
+        f"{establishments} verified establishments, {args.repeat} searches each; the radius "
+        f"prefilter {'uses' if any(INDEX_NAME in line for line in plan) else 'SKIPS'} {INDEX_NAME}"
+    )
+
+    searches = (
+        ("before: all sorted", search_before),
+        *((f"after: {radius_km}km, first {PAGE_SIZE}", nearest_within(radius_km))
+          for radius_km in RADII_KM),
+        *((f"whole search: {radius_km}km, first {PAGE_SIZE}", search_within(radius_km))
+          for radius_km in RADII_KM),
+    )
+    time_calls(tuple(search for _, search in searches), locations, 10)
+    timings = time_calls(tuple(search for _, search in searches), locations, args.repeat)
+    before = median(timings[0])
+    for (name, _), search_timings in zip(searches, timings):
+        print(
+            f"{name}: median {median(search_timings) / 1000:.1f}ms "
+            f"({median(search_timings) / before - 1:+.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+    Seed a scratch database for the benchmarks with verified establishments, each with
+    slots, pricing plans, payment methods and operating hours. The tables must already
+    exist, as migrated in production. Never run it against a database holding real data.
+"""
+
+from datetime import time
+from random import Random
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+
+from app.models.company_profile import CompanyProfile
+from app.models.operating_hour import OperatingHour, OperatingHoursRepository
+from app.models.parking_establishment import ParkingEstablishment
+from app.models.parking_slot import ParkingSlot, ParkingSlotRepository
+from app.models.payment_method import PaymentMethod
+from app.models.pricing_plan import PricingPlan
+from app.models.user import User
+from app.models.vehicle_type import VehicleType
+from app.utils.db import session_scope, transaction_scope
+
+NAME_WORDS = (
+    "SM", "Mega", "Mall", "Ayala", "Robinsons", "Harbor", "Bay", "City", "Plaza", "Tower",
+    "Central", "North", "South", "East", "West", "Market", "Park", "Square", "Terminal",
+    "Gateway", "Greenhills", "Makati", "Pasig", "Quezon", "Manila", "Ortigas", "Bonifacio",
+    "Station", "Arcade", "Commons", "Heights", "Landing", "Point", "Residences", "Hub",
+)
+# Made-up place names, e.g. "Tabunok", so most names are distinct, as real ones are.
+PLACE_WORDS = tuple(
+    (first + second + third).capitalize()
+    for first in ("ta", "ma", "ba", "li", "san", "ka", "lo", "pa", "du", "si", "bu", "na")
+    for second in ("bu", "la", "ri", "ngo", "ya", "ga", "mi", "so", "pe", "ti", "ro")
+    for third in ("nok", "bay", "tan", "gan", "lo", "dao", "mes", "nit", "pil", "yan", "roc")
+)
+DAYS_OF_WEEK = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def establishment_name(random: Random) -> str:
+    """
+    A name of two to four words, e.g. "SM Tabunok Mall": each one of the NAME_WORDS one
+    time in five, otherwise one of the PLACE_WORDS.
+    """
+    return " ".join(
+        random.choice(NAME_WORDS if random.random() < 0.2 else PLACE_WORDS)
+        for _ in range(random.randint(2, 4))
+    )
+
+
+def seed_establishments(count: int, slots: int = 5, batch_size: int = 5000, seed: int = 42):
+    """
+    Add count verified establishments around Metro Manila, with their slots, three pricing
+    plans, payment methods and operating hours, then their opening intervals and slot
+    availability counters.
+
+    Returns:
+        list: The UUIDs of the establishments added.
+    """
+    random = Random(seed)
+    with session_scope() as session:
+        user_id = session.execute(insert(User).values(
+            uuid=uuid4(), email=f"benchmark-{uuid4().hex[:12]}@example.com",
+            # Not drawn from random, which repeats on every seeding of the same database.
+            phone_number=str(uuid4().int % 10 ** 10).zfill(10),
+            role="parking_manager", is_verified=True,
+        ).returning(User.user_id)).scalar_one()
+        profile_id = session.execute(insert(CompanyProfile).values(
+            user_id=user_id, owner_type="company",
+        ).returning(CompanyProfile.profile_id)).scalar_one()
+        vehicle_type_id = session.execute(
+            select(VehicleType.vehicle_type_id).limit(1)
+        ).scalar() or session.execute(insert(VehicleType).values(
+            uuid=uuid4(), code="CAR", name="Car", description="Car", size_category="SMALL",
+            is_active=True,
+        ).returning(VehicleType.vehicle_type_id)).scalar_one()
+    uuids = []
+    for start in range(0, count, batch_size):
+        with transaction_scope() as session:
+            rows = [
+                {
+                    "uuid": uuid4(), "profile_id": profile_id, "space_type": "indoor",
+                    "space_layout": "parallel", "name": establishment_name(random),
+                    "lighting": "bright", "accessibility": "ramp", "facilities": "cctv",
+                    "nearby_landmarks": establishment_name(random),
+                    "latitude": round(14.4 + random.random() * 0.4, 6),
+                    "longitude": round(120.9 + random.random() * 0.3, 6),
+                    "is24_7": random.random() < 0.2, "verified": True,
+                }
+                for _ in range(min(batch_size, count - start))
+            ]
+            ids = session.execute(
+                insert(ParkingEstablishment).returning(
+                    ParkingEstablishment.establishment_id, sort_by_parameter_order=True
+                ),
+                rows,
+            ).scalars().all()
+            uuids += [str(row["uuid"]) for row in rows]
+            session.execute(insert(ParkingSlot), [
+                {
+                    "uuid": uuid4(), "establishment_id": establishment_id,
+                    "slot_code": f"S{number}", "vehicle_type_id": vehicle_type_id,
+                    "slot_status": random.choice(("open", "occupied", "reserved")),
+                    "base_rate": 20, "is_active": True, "slot_multiplier": 1,
+                    "floor_level": 1, "is_premium": False, "slot_features": "standard",
+                }
+                for establishment_id in ids for number in range(slots)
+            ])
+            session.execute(insert(PricingPlan), [
+                {
+                    "establishment_id": establishment_id, "rate_type": rate_type,
+                    "rate": rate, "is_enabled": True,
+                }
+                for establishment_id in ids
+                for rate_type, rate in (("hourly", 40), ("daily", 250), ("monthly", 4000))
+            ])
+            session.execute(insert(PaymentMethod), [
+                {"establishment_id": establishment_id, "accepts_cash": True}
+                for establishment_id in ids
+            ])
+            session.execute(insert(OperatingHour), [
+                {
+                    "establishment_id": establishment_id, "day_of_week": day,
+                    "is_enabled": True, "opening_time": time(7), "closing_time": time(22),
+                }
+                for establishment_id in ids for day in DAYS_OF_WEEK
+            ])
+            OperatingHoursRepository.refresh_schedules(ids)
+    ParkingSlotRepository.reconcile_availability()
+    return uuids
+
+
+def user_locations(count: int, seed: int = 3) -> list[tuple[float, float]]:
+    """The (latitude, longitude) of count users among the seeded establishments."""
+    random = Random(seed)
+    return [
+        (14.45 + random.random() * 0.3, 120.95 + random.random() * 0.2) for _ in range(count)
+    ]
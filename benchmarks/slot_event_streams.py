@@ -0,0 +1,89 @@
+"""
+    Open many live slot status streams against a running server, then measure what they
+    cost the server and how long one published change takes to reach all of them.
+
+    Start the server with SLOT_STATUS_EVENTS_ENABLED=true and REDIS_URL set, e.g.
+    gunicorn -c gunicorn_sse.conf.py --workers 1 run:app, then run:
+
+        python -m benchmarks.slot_event_streams http://localhost:5001 <establishment_uuid> \
+            <establishment_id> --streams 2000 --pid <worker_pid>
+"""
+
+import asyncio
+from argparse import ArgumentParser
+from os import getenv
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from redis import Redis
+
+from app.utils.slot_status_map import EVENTS_CHANNEL_PREFIX
+
+STREAM_PATH = "/api/v1/establishment/slots/stream"
+
+
+async def open_stream(host: str, port: int, establishment_uuid: str, opened: asyncio.Event):
+    """Open a stream, wait for its snapshot, then return the time of its first change."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"GET {STREAM_PATH}?establishment_uuid={establishment_uuid} HTTP/1.1\r\n"
+        f"Host: {host}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(f"The stream failed to open: {status.decode().strip()}")
+    while not (await reader.readline()).startswith(b"event: snapshot"):
+        pass
+    opened.set()
+    while not (await reader.readline()).startswith(b"event: slots"):
+        pass
+    received_at = perf_counter()
+    writer.close()
+    return received_at
+
+
+def worker_usage(pid: int) -> str:
+    """Get the resident memory and thread count of a server process."""
+    with open(f"/proc/{pid}/status", encoding="utf-8") as status:
+        fields = dict(line.split(":", 1) for line in status)
+    return f"rss {fields['VmRSS'].strip()}, threads {fields['Threads'].strip()}"
+
+
+async def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("url")
+    parser.add_argument("establishment_uuid")
+    parser.add_argument("establishment_id", type=int)
+    parser.add_argument("--streams", type=int, default=1000)
+    parser.add_argument("--pid", type=int, help="The server worker process to measure.")
+    args = parser.parse_args()
+    url = urlsplit(args.url)
+
+    if args.pid:
+        print(f"idle worker: {worker_usage(args.pid)}")
+    started = perf_counter()
+    opened = [asyncio.Event() for _ in range(args.streams)]
+    streams = [
+        asyncio.create_task(open_stream(url.hostname, url.port, args.establishment_uuid, event))
+        for event in opened
+    ]
+    await asyncio.gather(*(event.wait() for event in opened))
+    print(f"{args.streams} streams opened in {perf_counter() - started:.2f}s")
+    if args.pid:
+        print(f"worker with the streams open: {worker_usage(args.pid)}")
+
+    redis = Redis.from_url(getenv("REDIS_URL", "redis://localhost:6379/0"))
+    published_at = perf_counter()
+    redis.publish(f"{EVENTS_CHANNEL_PREFIX}{args.establishment_id}", '{"0": "occupied"}')
+    received = await asyncio.gather(*streams)
+    delays = sorted(received_at - published_at for received_at in received)
+    print(
+        f"change delivered to every stream: median {delays[len(delays) // 2] * 1000:.1f}ms, "
+        f"slowest {delays[-1] * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+    Time the slot-grid reads of establishments from PostgreSQL (ParkingSlotRepository.get_slots)
+    and from their grids in Redis (ParkingSlotRepository.get_slot_grid), on the same
+    establishments.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema and a scratch Redis, seeding the database on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... REDIS_URL=redis://localhost:6379/0 \
+            python -m benchmarks.slot_grid_reads --seed 1000 --slots 50
+"""
+
+from argparse import ArgumentParser
+from os import environ
+from random import Random
+from statistics import median, quantiles
+
+from sqlalchemy import select
+
+from app import create_app
+from app.models.parking_slot import ParkingSlot, ParkingSlotRepository
+from app.utils.db import session_scope
+from benchmarks.point_lookups import time_calls
+from benchmarks.seed import seed_establishments
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--slots", type=int, default=50, help="Slots of each seeded one.")
+    parser.add_argument("--establishments", type=int, default=200, help="Grids to read.")
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    environ["SLOT_STATUS_MAP_ENABLED"] = "true"
+    create_app()
+    if args.seed:
+        seed_establishments(args.seed, slots=args.slots)
+    with session_scope() as session:
+        establishment_ids = list(session.execute(
+            select(ParkingSlot.establishment_id).distinct().limit(args.establishments)
+        ).scalars())
+    Random(3).shuffle(establishment_ids)
+    for establishment_id in establishment_ids:
+        # Builds the grid of every establishment, so the timed reads all hit Redis.
+        ParkingSlotRepository.get_slot_grid(establishment_id)
+    slots = len(ParkingSlotRepository.get_slots(establishment_ids[0]))
+
+    reads = (
+        ("PostgreSQL", ParkingSlotRepository.get_slots),
+        ("Redis", ParkingSlotRepository.get_slot_grid),
+    )
+    time_calls(tuple(read for _, read in reads), establishment_ids, 200)
+    timings = time_calls(tuple(read for _, read in reads), establishment_ids, args.repeat)
+    print(
+        f"{args.repeat} reads each over {len(establishment_ids)} establishments "
+        f"of {slots} slots"
+    )
+    for (name, _), read_timings in zip(reads, timings):
+        percentiles = quantiles(read_timings, n=100)
+        print(
+            f"{name}: median {median(read_timings):.0f}us, p95 {percentiles[94]:.0f}us, "
+            f"p99 {percentiles[98]:.0f}us"
+        )
+    print(f"Redis median {median(timings[1]) / median(timings[0]) - 1:+.0%}")
+
+
+if __name__ == "__main__":
+    main()
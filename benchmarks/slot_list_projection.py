@@ -0,0 +1,102 @@
+"""
+    Time the slot list of an establishment with 10k slots and measure its peak allocations,
+    as it is now (ParkingSlotRepository.get_slots, through SLOT_LIST_PROJECTION) and as it
+    was before (ORM entities loaded, then converted with to_dict), and check that both
+    return the same dictionaries.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding the establishment on the first run:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.slot_list_projection \
+            --seed 1 --slots 10000
+"""
+
+# pylint: disable=E1102
+
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.models.parking_slot import ParkingSlot, ParkingSlotRepository
+from app.models.vehicle_type import VehicleType
+from app.utils.db import session_scope
+from benchmarks.seed import seed_establishments
+
+
+def slots_before(establishment_id):
+    """ParkingSlotRepository.get_slots before the column projections."""
+    with session_scope(read_only=True) as session:
+        query = session.query(
+            ParkingSlot,
+            VehicleType.name.label("vehicle_type_name"),
+            VehicleType.code.label("vehicle_type_code"),
+            VehicleType.size_category.label("vehicle_type_size"),
+        ).filter_by(establishment_id=establishment_id).join(
+            VehicleType, ParkingSlot.vehicle_type_id == VehicleType.vehicle_type_id
+        ).all()
+        slots = []
+        for slot, name, code, size in query:
+            slot_dict = {
+                **slot.to_dict(), "vehicle_type_name": name, "vehicle_type_code": code,
+                "vehicle_type_size": size.value,
+            }
+            del slot_dict["vehicle_type_id"]
+            slots.append(slot_dict)
+        return slots
+
+
+def peak_allocations(read, establishment_id) -> int:
+    """Get the peak bytes allocated by one read."""
+    start()
+    reset_peak()
+    read(establishment_id)
+    peak = get_traced_memory()[1]
+    stop()
+    return peak
+
+
+def main():
+    """Run the benchmark."""
+    create_app()
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--slots", type=int, default=10000, help="Slots of each seeded one.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_establishments(args.seed, slots=args.slots)
+    with session_scope(read_only=True) as session:
+        establishment_id, slots = session.execute(
+            select(ParkingSlot.establishment_id, func.count())
+            .group_by(ParkingSlot.establishment_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).one()
+    after = ParkingSlotRepository.get_slots
+    assert slots_before(establishment_id) == after(establishment_id), "the slot lists differ"
+
+    timings = ([], [])
+    for _ in range(args.repeat):
+        for read, read_timings in zip((slots_before, after), timings):
+            started = perf_counter()
+            read(establishment_id)
+            read_timings.append((perf_counter() - started) * 1000)
+    before_peak, after_peak = (
+        peak_allocations(read, establishment_id) for read in (slots_before, after)
+    )
+    print(f"{args.repeat} reads each of the {slots} slots of establishment {establishment_id}")
+    print(f"before: median {median(timings[0]):.0f}ms, peak {before_peak / 2 ** 20:.1f}MiB")
+    print(f"after: median {median(timings[1]):.0f}ms, peak {after_peak / 2 ** 20:.1f}MiB")
+    print(
+        f"after vs before: median {median(timings[1]) / median(timings[0]) - 1:+.0%}, "
+        f"peak {after_peak / before_peak - 1:+.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
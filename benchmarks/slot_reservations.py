@@ -0,0 +1,108 @@
+"""
+    Reserve the same open slots from many threads at once through
+    SlotActionsService.reserve_slot, as users do at rush hour, and print the reservations
+    per second and the slots reserved more than once, which must be none.
+
+    Run it from the repository root against a scratch PostgreSQL database holding the
+    migrated schema, seeding it on the first run. Every run reserves the open slots it
+    picks, so rerun it with --seed once they run out:
+
+        DATABASE_URL=postgresql+psycopg://... python -m benchmarks.slot_reservations \
+            --seed 1000 --threads 16
+"""
+
+# pylint: disable=E1102
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+from time import perf_counter
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.exceptions.slot_lookup_exceptions import SlotStatusTaken
+from app.models.parking_slot import ParkingSlot, SlotStatus
+from app.models.parking_transaction import ParkingTransaction
+from app.services.transaction_service import SlotActionsService
+from app.utils.db import session_scope
+from benchmarks.seed import seed_establishments
+
+
+def reserve_slots(flask_app, slot_uuids: list, seed: int) -> tuple[int, int]:
+    """
+    Try to reserve every slot, in a random order.
+
+    Returns:
+        tuple: The number of slots reserved and of the ones already taken.
+    """
+    random = Random(seed)
+    reserved = taken = 0
+    with flask_app.app_context():
+        for slot_uuid in random.sample(slot_uuids, len(slot_uuids)):
+            try:
+                SlotActionsService.reserve_slot({
+                    "slot_uuid": slot_uuid, "duration_type": "hourly", "duration": 1,
+                })
+                reserved += 1
+            except SlotStatusTaken:
+                taken += 1
+    return reserved, taken
+
+
+def main():
+    """Run the benchmark."""
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="Establishments to add first.")
+    parser.add_argument("--slots", type=int, default=500, help="Open slots to reserve.")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    flask_app = create_app()
+    if args.seed:
+        seed_establishments(args.seed)
+    with session_scope() as session:
+        slots = session.execute(
+            select(ParkingSlot.slot_id, ParkingSlot.uuid)
+            .where(ParkingSlot.slot_status == SlotStatus.open)
+            .order_by(ParkingSlot.slot_id)
+            .limit(args.slots)
+        ).all()
+        last_transaction_id = session.execute(
+            select(func.max(ParkingTransaction.transaction_id))
+        ).scalar() or 0
+    slot_ids = [slot.slot_id for slot in slots]
+    slot_uuids = [str(slot.uuid) for slot in slots]
+
+    started = perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        results = list(executor.map(
+            lambda seed: reserve_slots(flask_app, slot_uuids, seed), range(args.threads)
+        ))
+    elapsed = perf_counter() - started
+
+    reserved = sum(result[0] for result in results)
+    taken = sum(result[1] for result in results)
+    with session_scope() as session:
+        double_booked = session.execute(
+            select(func.count()).select_from(
+                select(ParkingTransaction.slot_id)
+                .where(
+                    ParkingTransaction.slot_id.in_(slot_ids),
+                    ParkingTransaction.transaction_id > last_transaction_id,
+                )
+                .group_by(ParkingTransaction.slot_id)
+                .having(func.count() > 1)
+                .subquery()
+            )
+        ).scalar()
+    print(
+        f"{len(slot_uuids)} open slots, {args.threads} threads trying each of them: "
+        f"{reserved} reserved, {taken} already taken in {elapsed:.2f}s, "
+        f"{reserved / elapsed:.0f} reservations/s ({(reserved + taken) / elapsed:.0f} "
+        f"attempts/s), {double_booked} slots reserved more than once"
+    )
+
+
+if __name__ == "__main__":
+    main()
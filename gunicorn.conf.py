@@ -0,0 +1,14 @@
+""" Gunicorn settings for serving the API in production: gunicorn run:app """
+
+# pylint: disable=C0103
+
+from os import getenv
+
+bind = getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(getenv("GUNICORN_WORKERS", "2"))
+
+# Plain threads, so the replica lag prober and the index reload threads run as real
+# threads. The live slot status streams are served by the gevent workers of
+# gunicorn_sse.conf.py instead.
+worker_class = "gthread"
+threads = int(getenv("GUNICORN_THREADS", "8"))
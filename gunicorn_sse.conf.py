@@ -0,0 +1,21 @@
+"""
+    Gunicorn settings for serving the live slot status streams in production:
+    gunicorn -c gunicorn_sse.conf.py run:app
+
+    Route only /api/v1/establishment/slots/stream to these workers, and every other path
+    to those of gunicorn.conf.py.
+"""
+
+# pylint: disable=C0103
+
+from os import getenv
+
+bind = getenv("GUNICORN_SSE_BIND", "0.0.0.0:5001")
+workers = int(getenv("GUNICORN_SSE_WORKERS", "1"))
+
+# A stream holds its request open for as long as the client watches. gevent workers serve
+# every request in a greenlet, so an idle stream costs a few kilobytes instead of a
+# thread, and a worker keeps up to worker_connections of them open. Only the streams are
+# routed here, so the in-process indexes are never loaded in these patched workers.
+worker_class = "gevent"
+worker_connections = int(getenv("GUNICORN_SSE_WORKER_CONNECTIONS", "5000"))
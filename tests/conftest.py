@@ -0,0 +1,163 @@
+"""
+    Fixtures of the tests, which run against the PostgreSQL database of TEST_DATABASE_URL,
+    e.g. postgresql+psycopg://postgres@localhost:5432/ez_parking_test; test modules skip
+    themselves without one. The tables are created once and emptied after every test.
+"""
+
+# pylint: disable=C0415, W0613, W0621
+
+from os import environ
+
+import pytest
+
+TEST_DATABASE_URL = environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # The engine is created from DATABASE_URL when the app package is imported.
+    environ["DATABASE_URL"] = TEST_DATABASE_URL
+    environ.setdefault("SECRET_KEY", "test")
+    environ.setdefault("JWT_SECRET_KEY", "test")
+    environ.setdefault("FRONTEND_URL", "http://localhost:5000")
+
+# The tables the tests write to or read. The tables they reference are created too; the
+# other ones need functions that only the managed schema defines.
+TABLES = (
+    "parking_establishment", "parking_slot", "pricing_plan", "operating_hour",
+    "opening_interval", "slot_availability", "address", "payment_method",
+    "public.establishment_document",
+)
+
+
+def default_sequences(tables) -> set[str]:
+    """Get the names of the sequences the server defaults of the tables draw from."""
+    from re import search
+
+    sequences = set()
+    for table in tables:
+        for column in table.columns:
+            default = column.server_default
+            match = default is not None and search(r"nextval\('(\w+)'", str(default.arg))
+            if match:
+                sequences.add(match.group(1))
+    return sequences
+
+
+def referenced_tables(metadata, names):
+    """Get the tables of the given names and all the tables they reference."""
+    tables, pending = set(), [metadata.tables[name] for name in names]
+    while pending:
+        table = pending.pop()
+        if table not in tables:
+            tables.add(table)
+            pending.extend(key.column.table for key in table.foreign_keys)
+    return tables
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The app, built with TestingConfig, and its tables."""
+    from sqlalchemy import Enum, text
+
+    from app import create_app
+    from app.config.testing_config import TestingConfig
+    from app.models.base import Base
+    from app.utils.engine import get_engine
+
+    flask_app = create_app(TestingConfig)
+    flask_app.config["DB_REQUEST_STATS"] = True
+    # PostgreSQL creates every enum type of the metadata, which must all be named.
+    for table in Base.metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, Enum) and column.type.name is None:
+                column.type.name = column.name
+    tables = referenced_tables(Base.metadata, TABLES)
+    sequences = default_sequences(tables)
+    with get_engine().begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for sequence in sequences:
+            connection.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence}"))
+    Base.metadata.create_all(get_engine(), tables=list(tables))
+    yield flask_app
+    Base.metadata.drop_all(get_engine(), tables=list(tables))
+    with get_engine().begin() as connection:
+        for sequence in sequences:
+            connection.execute(text(f"DROP SEQUENCE IF EXISTS {sequence}"))
+
+
+@pytest.fixture(autouse=True)
+def empty_tables(app):
+    """Empty the tables after every test."""
+    from sqlalchemy import text
+
+    from app.models.base import Base
+    from app.utils.engine import get_engine
+
+    yield
+    names = ", ".join(
+        f'"{table.name}"' for table in referenced_tables(Base.metadata, TABLES)
+    )
+    with get_engine().begin() as connection:
+        connection.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def add_establishments(app):
+    """
+    A function adding verified establishments, each with open slots and pricing plans,
+    and returning their IDs. The slot counters are left for reconcile_availability.
+    """
+    from uuid import uuid4
+
+    from app.models.address import Address
+    from app.models.company_profile import CompanyProfile
+    from app.models.parking_establishment import ParkingEstablishment
+    from app.models.parking_slot import ParkingSlot
+    from app.models.pricing_plan import PricingPlan
+    from app.models.user import User
+    from app.models.vehicle_type import VehicleType
+    from app.utils.db import session_scope
+
+    def add(count: int, slots: int = 3) -> list[int]:
+        with session_scope() as session:
+            user = User(
+                email="manager@example.com", phone_number="09170000000",
+                role="parking_manager", is_verified=True,
+            )
+            session.add(user)
+            session.flush()
+            profile = CompanyProfile(user_id=user.user_id, owner_type="individual")
+            session.add(profile)
+            session.flush()
+            session.add(Address(
+                profile_id=profile.profile_id, street="Street", barangay="Barangay",
+                city="City", province="Province", postal_code="1000",
+            ))
+            vehicle_type = VehicleType(
+                uuid=uuid4(), code="CAR", name="Car", description="Car", size_category="SMALL"
+            )
+            session.add(vehicle_type)
+            session.flush()
+            establishment_ids = []
+            for number in range(count):
+                establishment = ParkingEstablishment(
+                    profile_id=profile.profile_id, space_type="indoor",
+                    space_layout="parallel", name=f"Harbor Parking {number}",
+                    lighting="bright", accessibility="ramp", facilities="cctv",
+                    latitude=14.5 + number / 100, longitude=121.0, verified=True,
+                )
+                session.add(establishment)
+                session.flush()
+                establishment_ids.append(establishment.establishment_id)
+                for slot in range(slots):
+                    session.add(ParkingSlot(
+                        uuid=uuid4(), establishment_id=establishment.establishment_id,
+                        slot_code=f"S{slot}", vehicle_type_id=vehicle_type.vehicle_type_id,
+                        base_rate=20, slot_status="open",
+                    ))
+                for rate_type in ("hourly", "daily", "monthly"):
+                    session.add(PricingPlan(
+                        establishment_id=establishment.establishment_id, rate_type=rate_type,
+                        rate=50, is_enabled=True,
+                    ))
+            return establishment_ids
+
+    return add
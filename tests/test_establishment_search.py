@@ -0,0 +1,96 @@
+""" Tests of the number of SQL statements the establishment search runs. """
+
+# pylint: disable=C0413, W0621
+
+from os import environ
+from threading import Thread
+
+import pytest
+from sqlalchemy import select
+
+if not environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set.", allow_module_level=True)
+
+from app.schema.response_schema import EstablishmentResponseSchema
+from app.utils.db import session_scope, statement_budget
+
+
+@pytest.mark.parametrize("count", [1, 5])
+def test_name_search_statements(app, add_establishments, count):
+    """A name search runs the same three statements however many establishments it finds."""
+    add_establishments(count)
+    response = app.test_client().get(
+        "/api/v1/establishment/query", query_string={"establishment_name": "harbor"}
+    )
+    assert response.status_code == 200
+    establishments = response.json["establishments"]
+    assert len(establishments) == count
+    assert all(len(establishment["pricing_plans"]) == 3 for establishment in establishments)
+    # The similarity threshold, the search and the pricing plans of the page.
+    assert response.headers["X-DB-Statements"] == "3"
+
+
+@pytest.mark.parametrize("count", [1, 5])
+def test_location_search_statements(app, add_establishments, count):
+    """A location search runs the search and the pricing plans of the page."""
+    add_establishments(count)
+    response = app.test_client().get(
+        "/api/v1/establishment/query",
+        query_string={"user_latitude": 14.5, "user_longitude": 121.0},
+    )
+    assert response.status_code == 200
+    assert len(response.json["establishments"]) == count
+    assert response.headers["X-DB-Statements"] == "2"
+
+
+def test_name_search_pages(app, add_establishments):
+    """Paging a misspelled name search returns every match once, across tied similarities."""
+    add_establishments(7)
+    client, uuids, query = app.test_client(), [], {"establishment_name": "harbr parkng"}
+    while True:
+        response = client.get("/api/v1/establishment/query", query_string={**query, "limit": 2})
+        assert response.status_code == 200
+        uuids += [establishment["uuid"] for establishment in response.json["establishments"]]
+        if response.json["next_cursor"] is None:
+            break
+        query["cursor"] = response.json["next_cursor"]
+    assert len(uuids) == len(set(uuids)) == 7
+
+
+def test_facets_match_the_response_schema(app, add_establishments):
+    """The facet counts of a search are returned in the shape of the response schema."""
+    add_establishments(3)
+    response = app.test_client().get(
+        "/api/v1/establishment/query",
+        query_string={"establishment_name": "harbor", "facets": "true"},
+    )
+    assert response.status_code == 200
+    assert EstablishmentResponseSchema().validate(response.json) == {}
+    assert response.json["facets"]["space_type"]["indoor"] == 3
+    assert response.json["facets"]["is_premium"]["false"] == 3
+
+
+def test_budget_fails_when_exceeded(app):
+    """Exceeding a budget raises under TestingConfig."""
+    with app.app_context(), session_scope() as session:
+        with pytest.raises(AssertionError, match="ran 2 SQL statements, its budget is 1"):
+            with statement_budget(session, 1, "Test block"):
+                session.execute(select(1))
+                session.execute(select(2))
+
+
+def test_budget_ignores_other_sessions(app):
+    """The statements of other sessions, e.g. those of another thread, are not counted."""
+
+    def query_elsewhere():
+        with session_scope() as other_session:
+            for _ in range(3):
+                other_session.execute(select(1))
+
+    with app.app_context(), session_scope() as session:
+        with statement_budget(session, 1, "Test block"):
+            session.execute(select(1))
+            thread = Thread(target=query_elsewhere)
+            thread.start()
+            thread.join()
+            query_elsewhere()
@@ -0,0 +1,67 @@
+""" Tests of the rebuild of the opening intervals from the operating hours. """
+
+# pylint: disable=C0413
+
+from datetime import time
+from os import environ
+from threading import Event, Thread
+
+import pytest
+from sqlalchemy import select
+
+if not environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set.", allow_module_level=True)
+
+from app.models.opening_interval import OpeningInterval
+from app.models.operating_hour import OperatingHoursRepository
+from app.utils.db import session_scope, transaction_scope
+
+
+def hours(opening: int, closing: int) -> dict:
+    """The same operating hours every weekday."""
+    return {
+        day: {"is_enabled": True, "opening_time": time(opening), "closing_time": time(closing)}
+        for day in ("monday", "tuesday", "wednesday", "thursday", "friday")
+    }
+
+
+def intervals(establishment_id: int) -> list[tuple[int, int]]:
+    """Get the opening intervals of an establishment."""
+    with session_scope() as session:
+        return session.execute(
+            select(OpeningInterval.opens_at, OpeningInterval.closes_at)
+            .where(OpeningInterval.establishment_id == establishment_id)
+            .order_by(OpeningInterval.opens_at)
+        ).all()
+
+
+def test_full_rebuild_keeps_concurrent_hours(add_establishments):
+    """A full rebuild racing an hours update leaves the intervals of the updated hours."""
+    establishment_id, unscheduled_id = add_establishments(2)
+    OperatingHoursRepository.create_operating_hours(establishment_id, hours(8, 17))
+    with session_scope() as session:
+        session.add(OpeningInterval(establishment_id=unscheduled_id, opens_at=0, closes_at=60))
+    updated, release = Event(), Event()
+
+    def update_hours():
+        with transaction_scope():
+            OperatingHoursRepository.update_operating_hours(establishment_id, hours(6, 22))
+            updated.set()
+            release.wait(timeout=10)
+
+    writer = Thread(target=update_hours)
+    writer.start()
+    updated.wait(timeout=10)
+    rebuild = Thread(target=OperatingHoursRepository.refresh_schedules)
+    rebuild.start()
+    # The rebuild waits on the rows of the update until it commits.
+    rebuild.join(timeout=0.5)
+    release.set()
+    writer.join()
+    rebuild.join()
+
+    expected = intervals(establishment_id)
+    assert expected[0] == (6 * 60, 22 * 60)
+    OperatingHoursRepository.refresh_schedules([establishment_id])
+    assert intervals(establishment_id) == expected
+    assert not intervals(unscheduled_id)
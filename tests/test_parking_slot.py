@@ -0,0 +1,95 @@
+""" Tests of the slot writes under concurrent requests. """
+
+# pylint: disable=C0413
+
+from concurrent.futures import ThreadPoolExecutor
+from os import environ
+from random import Random
+from time import perf_counter
+
+import pytest
+from sqlalchemy import select
+
+if not environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set.", allow_module_level=True)
+
+from app.models.parking_slot import ParkingSlot, ParkingSlotRepository
+from app.utils.db import session_scope
+
+
+def slot_uuids(establishment_id: int) -> list[str]:
+    """Get the UUIDs of the slots of an establishment."""
+    with session_scope() as session:
+        return [
+            str(uuid) for uuid in session.execute(
+                select(ParkingSlot.uuid).where(ParkingSlot.establishment_id == establishment_id)
+            ).scalars()
+        ]
+
+
+def test_concurrent_status_changes_keep_counters(app, add_establishments):
+    """Status changes racing on the same slots leave no slot counter to reconcile."""
+    (establishment_id,) = add_establishments(1, slots=2)
+    ParkingSlotRepository.reconcile_availability()
+    uuids = slot_uuids(establishment_id)
+
+    def change_statuses(seed):
+        random = Random(seed)
+        for _ in range(40):
+            ParkingSlotRepository.change_slot_status(
+                slot_uuid=random.choice(uuids),
+                new_status=random.choice(("open", "occupied", "reserved")),
+            )
+
+    with app.app_context(), ThreadPoolExecutor(8) as executor:
+        list(executor.map(change_statuses, range(8)))
+    assert ParkingSlotRepository.reconcile_availability() == 0
+
+
+def test_concurrent_claims_never_double_book(app, add_establishments, record_property):
+    """Claims racing on the same slots reserve each slot exactly once."""
+    (establishment_id,) = add_establishments(1, slots=20)
+    ParkingSlotRepository.reconcile_availability()
+    uuids = slot_uuids(establishment_id)
+
+    def claim_slots(seed):
+        random = Random(seed)
+        return [
+            ParkingSlotRepository.claim_slot(uuid)
+            for uuid in random.sample(uuids, len(uuids))
+        ]
+
+    started = perf_counter()
+    with app.app_context(), ThreadPoolExecutor(8) as executor:
+        claims = [
+            slot_id for claimed in executor.map(claim_slots, range(8)) for slot_id in claimed
+        ]
+    elapsed = perf_counter() - started
+    record_property("reservations_per_second", round(len(claims) / elapsed))
+    reserved = [slot_id for slot_id in claims if slot_id is not None]
+    assert len(reserved) == len(set(reserved)) == len(uuids)
+    assert ParkingSlotRepository.reconcile_availability() == 0
+
+
+def test_concurrent_open_slot_claims_take_distinct_slots(app, add_establishments):
+    """Claims of any open slot take a different slot each until none is left."""
+    (establishment_id,) = add_establishments(1, slots=20)
+    ParkingSlotRepository.reconcile_availability()
+    with session_scope() as session:
+        vehicle_type_id = session.execute(
+            select(ParkingSlot.vehicle_type_id).limit(1)
+        ).scalar()
+
+    def claim_open_slots(_):
+        return [
+            ParkingSlotRepository.claim_open_slot(establishment_id, vehicle_type_id).get("slot_id")
+            for _ in range(5)
+        ]
+
+    with app.app_context(), ThreadPoolExecutor(8) as executor:
+        claims = [
+            slot_id for claimed in executor.map(claim_open_slots, range(8)) for slot_id in claimed
+        ]
+    reserved = [slot_id for slot_id in claims if slot_id is not None]
+    assert len(reserved) == len(set(reserved)) == 20
+    assert ParkingSlotRepository.reconcile_availability() == 0
@@ -0,0 +1,51 @@
+""" Tests of the connection checkouts and commits of a request with DB_REQUEST_SCOPED_SESSION. """
+
+# pylint: disable=C0413
+
+from os import environ
+
+import pytest
+
+if not environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set.", allow_module_level=True)
+
+from app.models.operating_hour import OperatingHoursRepository
+from app.models.parking_establishment import ParkingEstablishmentRepository
+from app.models.parking_slot import ParkingSlotRepository
+from app.models.payment_method import PaymentMethodRepository
+from app.models.pricing_plan import PricingPlanRepository
+
+
+def view_establishment(app, establishment_id: int) -> dict:
+    """
+    Read an establishment the way the establishment view did before it read everything in
+    one session, with one repository call per part, in a request.
+
+    Returns:
+        dict: The X-DB-* response headers of the request.
+    """
+    with app.test_request_context("/api/v1/establishment/view"):
+        app.preprocess_request()
+        ParkingEstablishmentRepository.get_establishment(establishment_id=establishment_id)
+        OperatingHoursRepository.get_operating_hours(establishment_id)
+        ParkingSlotRepository.get_slots(establishment_id)
+        PaymentMethodRepository.get_payment_methods(establishment_id)
+        PricingPlanRepository.get_pricing_plans(establishment_id)
+        response = app.process_response(app.response_class())
+    return {
+        header: int(value) for header, value in response.headers.items()
+        if header.startswith("X-DB-")
+    }
+
+
+@pytest.mark.parametrize("scoped, expected", [
+    (False, {"X-DB-Checkouts": 5, "X-DB-Commits": 5, "X-DB-Statements": 5}),
+    (True, {"X-DB-Checkouts": 1, "X-DB-Commits": 1, "X-DB-Statements": 5}),
+])
+def test_request_session_shares_one_checkout(
+    app, add_establishments, monkeypatch, scoped, expected
+):
+    """The repository calls of a request share one checkout and one commit when scoped."""
+    (establishment_id,) = add_establishments(1)
+    monkeypatch.setitem(app.config, "DB_REQUEST_SCOPED_SESSION", scoped)
+    assert view_establishment(app, establishment_id) == expected
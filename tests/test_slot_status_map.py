@@ -0,0 +1,41 @@
+""" Tests of the slot grids kept in the Redis of TEST_REDIS_URL. """
+
+# pylint: disable=C0413, W0621
+
+from os import environ
+
+import pytest
+
+if not environ.get("TEST_DATABASE_URL") or not environ.get("TEST_REDIS_URL"):
+    pytest.skip("TEST_DATABASE_URL or TEST_REDIS_URL is not set.", allow_module_level=True)
+
+from app.models.parking_slot import ParkingSlotRepository
+from app.utils import slot_status_map
+
+
+@pytest.fixture
+def grids(monkeypatch):
+    """Keep the slot grids in the emptied test Redis, and drop them afterwards."""
+    monkeypatch.setenv("REDIS_URL", environ["TEST_REDIS_URL"])
+    monkeypatch.setenv("SLOT_STATUS_MAP_ENABLED", "true")
+    client = slot_status_map.get_client()
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+def test_status_change_renews_the_grid_ttl(grids, add_establishments, monkeypatch):
+    """A status change written through keeps the whole grid for another TTL."""
+    (establishment_id,) = add_establishments(1, slots=3)
+    monkeypatch.setenv("SLOT_STATUS_MAP_TTL_SECONDS", "100")
+    slot = ParkingSlotRepository.get_slot_grid(establishment_id)[1]
+
+    monkeypatch.setenv("SLOT_STATUS_MAP_TTL_SECONDS", "1000")
+    ParkingSlotRepository.change_slot_status(slot_id=slot["slot_id"], new_status="occupied")
+
+    for key in slot_status_map.grid_keys(establishment_id):
+        assert grids.ttl(key) > 100
+    statuses = [
+        slot["slot_status"] for slot in ParkingSlotRepository.get_slot_grid(establishment_id)
+    ]
+    assert statuses == ["open", "occupied", "open"]